@@ -13,11 +13,22 @@ Date: 2025-11-05
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import joblib
 import numpy as np
 import pandas as pd
 from datetime import datetime
 import logging
+import os
+import sys
+
+# Model registry lives in the training scripts package
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'scripts'))
+from ml_utils.registry import ModelRegistry
+
+MODELS_DIR = os.getenv('MAGGOT_MODELS_DIR', os.path.join(BASE_DIR, '..', 'models'))
+# Registry selector per model: production (default), latest, best:<metric> or a pinned version
+PENETASAN_MODEL = os.getenv('MAGGOT_MODEL_PENETASAN', 'production')
+PANEN_MODEL = os.getenv('MAGGOT_MODEL_PANEN', 'production')
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -30,17 +41,22 @@ CORS(app)  # Enable CORS untuk akses dari mobile app
 try:
     logger.info("Loading models...")
     
+    registry = ModelRegistry(MODELS_DIR)
+    
     # Load Penetasan model
-    model_penetasan = joblib.load('../models/../models/model_penetasan_maggot.pkl')
-    metadata_penetasan = joblib.load('../models/../models/model_penetasan_metadata.pkl')
-    le_media = joblib.load('../models/../models/label_encoder_media.pkl')
-    le_weather = joblib.load('../models/../models/label_encoder_weather.pkl')
-    le_season = joblib.load('../models/../models/label_encoder_season.pkl')
+    penetasan = registry.load('penetasan', PENETASAN_MODEL)
+    model_penetasan = penetasan['model']
+    metadata_penetasan = penetasan['metadata']
+    le_media = penetasan['label_encoder_media']
+    le_weather = penetasan['label_encoder_weather']
+    le_season = penetasan['label_encoder_season']
     
     # Load Panen model
-    model_panen = joblib.load('../models/../models/model_panen_maggot.pkl')
-    metadata_panen = joblib.load('../models/../models/model_panen_metadata.pkl')
+    panen = registry.load('panen', PANEN_MODEL)
+    model_panen = panen['model']
+    metadata_panen = panen['metadata']
     
+    logger.info(f"Penetasan: {penetasan['version'] or 'legacy files'} | Panen: {panen['version'] or 'legacy files'}")
     logger.info("✓ All models loaded successfully!")
     
 except Exception as e:
@@ -163,6 +179,7 @@ def model_info():
     return jsonify({
         'penetasan_model': {
             'name': metadata_penetasan['model_name'],
+            'version': penetasan['version'],
             'accuracy': f"{metadata_penetasan['test_accuracy']:.2%}",
             'cv_score': f"{metadata_penetasan['cv_mean']:.2%}",
             'num_features': metadata_penetasan['num_features'],
@@ -171,7 +188,8 @@ def model_info():
             'season_options': list(le_season.classes_)
         },
         'panen_model': {
-            'name': metadata_panen['model_name'],
+            'name': metadata_panen['model_type'],
+            'version': panen['version'],
             'r2_score': f"{metadata_panen['r2_score']:.4f}",
             'mae': f"{metadata_panen['mae']:.2f} gram",
             'mape': f"{metadata_panen['mape']:.2f}%"
@@ -0,0 +1,180 @@
+"""
+Embedding Dispatch Benchmark
+Run AzureOpenAIEmbedding against a local stand-in for the Azure embeddings
+endpoint (no API key or quota used): serial vs concurrent batches, with
+simulated latency, throttling/server errors and an optional RPM/TPM
+budget. Checks that every embedding comes back for the right text, in
+input order, and counts the HTTP connections opened and requests retried.
+
+Usage:
+    python benchmark_embeddings.py
+    python benchmark_embeddings.py --chunks 5000 --latency 0.4 --concurrency 1 4 8
+    python benchmark_embeddings.py --rpm 600 --tpm 200000     # time spent waiting for quota
+    python benchmark_embeddings.py --fail-rate 0.1            # 10% of requests get 429/503
+"""
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from utils.azure_embeddings import AzureOpenAIEmbedding
+
+DIMENSION = 8
+
+
+def fake_embedding(text: str) -> list:
+    """Deterministic vector of a text, so results can be checked against their input"""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [b / 255 for b in digest[:DIMENSION]]
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Answers POSTs like the Azure embeddings endpoint after `latency` seconds"""
+
+    daemon_threads = True
+
+    def __init__(self, latency: float, fail_rate: float = 0.0):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(0)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/openai/deployments/stand-in/embeddings"
+
+    def reset(self):
+        with self.lock:
+            self.connections = self.requests = self.failed = self.peak_in_flight = 0
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.headers.get("api-key") != "stand-in":
+            self.send_response(401)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+            fail = server.rng.random() < server.fail_rate and server.rng.choice([429, 503])
+            server.failed += bool(fail)
+        time.sleep(server.latency)
+        with server.lock:
+            server.in_flight -= 1
+
+        if fail:
+            self.send_response(fail)
+            if fail == 429:
+                self.send_header("retry-after-ms", "200")
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        texts = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+        data = [{"object": "embedding", "index": i, "embedding": fake_embedding(text)} for i, text in enumerate(texts)]
+        random.shuffle(data)  # the API does not promise order; clients must use "index"
+        body = json.dumps({"object": "list", "data": data}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(server: StandInServer, texts: list, concurrency: int, args) -> dict:
+    embedder = AzureOpenAIEmbedding(
+        api_key="stand-in",
+        endpoint=server.url,
+        dimension=DIMENSION,
+        max_concurrency=concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm
+    )
+    server.reset()
+    start = time.perf_counter()
+    embeddings = embedder.generate_embeddings_batch(texts)
+    seconds = time.perf_counter() - start
+    embedder.close()
+
+    expected = np.array([fake_embedding(text) for text in texts])
+    return {
+        "concurrency": concurrency,
+        "seconds": round(seconds, 2),
+        "requests": server.requests,
+        "requests_per_second": round(server.requests / seconds, 1),
+        "connections": server.connections,
+        "retried": server.failed,
+        "peak_in_flight": server.peak_in_flight,
+        "in_order": bool(embeddings.shape == expected.shape and np.allclose(embeddings, expected))
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark embedding dispatch against a local stand-in server")
+    parser.add_argument("--chunks", type=int, default=2000, help="Texts to embed (default: 2000)")
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per request (default: 0.3)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8],
+                        help="Batches in flight to compare (default: 1 4 8)")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests-per-minute budget (default: none)")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens-per-minute budget (default: none)")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="Share of requests answered 429 (Retry-After) or 503 (default: 0)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(0)
+    texts = [f"chunk {i}: " + " ".join(rng.choice(["maggot", "BSF", "larva", "pakan"]) for _ in range(rng.randint(20, 150)))
+             for i in range(args.chunks)]
+
+    server = StandInServer(args.latency, args.fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🧪 Stand-in endpoint: {server.url} ({args.latency}s per request)")
+
+    try:
+        results = [run(server, texts, concurrency, args) for concurrency in args.concurrency]
+    finally:
+        server.shutdown()
+
+    print("\n" + "=" * 80)
+    print(f"📊 EMBEDDING DISPATCH ({args.chunks} texts, batches of 16"
+          + (f", {args.rpm} RPM" if args.rpm else "") + (f", {args.tpm} TPM" if args.tpm else "") + ")")
+    print("=" * 80)
+    print(f"{'In flight':>9} {'Time':>9} {'Requests':>9} {'Retried':>8} {'Req/s':>7} {'Connections':>12} {'Peak':>5} {'Order':>6}")
+    for r in results:
+        print(f"{r['concurrency']:>9} {r['seconds']:>8.2f}s {r['requests']:>9} {r['retried']:>8} {r['requests_per_second']:>7} "
+              f"{r['connections']:>12} {r['peak_in_flight']:>5} {'ok' if r['in_order'] else 'WRONG':>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Local Embedding Benchmark
+Compare the EmbeddingGenerator backends on CPU: fp32 PyTorch (reference),
+fp32 ONNX Runtime and int8-quantized ONNX Runtime. Reports model load time,
+throughput (chunks/s) and parity with the fp32 model: cosine similarity
+per chunk and how many of the top-k neighbours of a chunk stay the same.
+
+Texts: chunks of the given PDFs/.txt files (500 characters) plus a seeded
+synthetic corpus. ONNX exports are written to --model-dir on first use.
+
+Usage:
+    python benchmark_local_embeddings.py
+    python benchmark_local_embeddings.py storage/uploads/*.pdf --chunks 2000 --threads 4
+    python benchmark_local_embeddings.py --backends torch onnx-int8 --min-cosine 0.99 --output local_embeddings.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+from pypdf import PdfReader
+
+from utils.text_processor import EmbeddingGenerator, EMBEDDING_BACKENDS
+from utils.text_splitter import RecursiveTextSplitter
+
+
+def synthetic_chunks(count: int, seed: int = 0) -> list:
+    """Chunk-like texts from a few sentences up to ~500 characters"""
+    rng = random.Random(seed)
+    words = ["budidaya", "maggot", "BSF", "larva", "pakan", "sampah", "organik", "protein", "kompos",
+             "suhu", "kelembapan", "panen", "telur", "menetas", "hari", "media", "ayam", "ikan", "lele"]
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(3, 20))).capitalize() + "."
+
+    return [" ".join(sentence() for _ in range(rng.randint(1, 6)))[:500] for _ in range(count)]
+
+
+def file_chunks(paths: list) -> list:
+    """500-character chunks of the native text of PDFs and of plain text files"""
+    splitter = RecursiveTextSplitter(chunk_size=500, chunk_overlap=50)
+    chunks = []
+    for path in paths:
+        if path.lower().endswith(".pdf"):
+            text = "\n\n".join((page.extract_text() or "").strip() for page in PdfReader(path).pages)
+        else:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        chunks.extend(splitter.split_text(text))
+    return chunks
+
+
+def throughput(generator: EmbeddingGenerator, texts: list, batch_size: int, repeat: int):
+    """(embeddings, chunks/s best of `repeat` runs) after a warm-up batch"""
+    generator.model.encode(texts[:batch_size], batch_size=batch_size, show_progress_bar=False)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        embeddings = generator.model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                                            show_progress_bar=False)
+        best = min(best, time.perf_counter() - start)
+    return np.asarray(embeddings, dtype=np.float32), len(texts) / best
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+
+def parity(embeddings: np.ndarray, reference: np.ndarray, queries: int, top_k: int) -> dict:
+    """Cosine similarity with the reference per chunk, and top-k neighbour overlap of the first chunks as queries"""
+    embeddings, reference = normalize(embeddings), normalize(reference)
+    cosine = (embeddings * reference).sum(axis=1)
+
+    queries = min(queries, len(embeddings))
+    top_k = min(top_k, len(embeddings) - 1)
+    overlap = 1.0
+    if top_k > 0:
+        # Neighbours other than the query chunk itself
+        found = np.argsort(-(embeddings[:queries] @ embeddings.T), axis=1)[:, 1:top_k + 1]
+        expected = np.argsort(-(reference[:queries] @ reference.T), axis=1)[:, 1:top_k + 1]
+        overlap = float(np.mean([len(set(a) & set(b)) / top_k for a, b in zip(found, expected)]))
+    return {
+        "cosine_mean": round(float(cosine.mean()), 6),
+        "cosine_min": round(float(cosine.min()), 6),
+        "cosine_p1": round(float(np.percentile(cosine, 1)), 6),
+        f"top{top_k}_overlap": round(overlap, 4)
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark local embedding backends (chunks/s and parity with fp32)")
+    parser.add_argument("files", nargs="*", help="PDFs or .txt files to chunk and add to the synthetic corpus")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence transformer model (default: all-MiniLM-L6-v2)")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"], choices=EMBEDDING_BACKENDS,
+                        help="Backends compared with torch (default: onnx onnx-int8)")
+    parser.add_argument("--chunks", type=int, default=1000, help="Synthetic chunks (default: 1000)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Texts per forward pass (default: 32)")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime threads, 0 = physical cores (default: 0)")
+    parser.add_argument("--model-dir", default=os.path.join("storage", "models"), help="ONNX exports (default: storage/models)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs, best is reported (default: 3)")
+    parser.add_argument("--queries", type=int, default=100, help="Chunks used as queries for the top-k overlap (default: 100)")
+    parser.add_argument("--top-k", type=int, default=5, help="Neighbours compared per query (default: 5)")
+    parser.add_argument("--min-cosine", type=float, default=0.99,
+                        help="Fail (exit 1) if a chunk's cosine with fp32 is lower (default: 0.99)")
+    parser.add_argument("--output", help="Write results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    texts = file_chunks(args.files) + synthetic_chunks(args.chunks)
+    print(f"📄 {len(texts)} chunks, {sum(len(text) for text in texts) / len(texts):.0f} characters on average")
+
+    rows = []
+    reference = None
+    for backend in ["torch"] + [backend for backend in args.backends if backend != "torch"]:
+        start = time.perf_counter()
+        generator = EmbeddingGenerator(args.model, backend=backend, model_dir=args.model_dir, threads=args.threads)
+        load_seconds = time.perf_counter() - start
+        embeddings, chunks_per_second = throughput(generator, texts, args.batch_size, args.repeat)
+        if reference is None:
+            reference = embeddings
+        rows.append({
+            "backend": backend,
+            "load_seconds": round(load_seconds, 2),
+            "chunks_per_second": round(chunks_per_second, 1),
+            **parity(embeddings, reference, args.queries, args.top_k)
+        })
+
+    overlap_key = next(key for key in rows[0] if key.endswith("_overlap"))
+    overlap_label = overlap_key.replace("_", " ").capitalize()
+    print("\n" + "=" * 84)
+    print(f"📊 LOCAL EMBEDDINGS ({args.model}, {len(texts)} chunks, batch {args.batch_size}, reference: torch fp32)")
+    print("=" * 84)
+    print(f"{'Backend':<10} {'Load':>7} {'Chunks/s':>9} {'Speedup':>8} {'Cos mean':>9} {'Cos min':>9} {'Cos p1':>9} {overlap_label:>12}")
+    for row in rows:
+        print(f"{row['backend']:<10} {row['load_seconds']:>6.1f}s {row['chunks_per_second']:>9.1f} "
+              f"{row['chunks_per_second'] / rows[0]['chunks_per_second']:>7.2f}x {row['cosine_mean']:>9.5f} "
+              f"{row['cosine_min']:>9.5f} {row['cosine_p1']:>9.5f} {row[overlap_key]:>12.3f}")
+
+    failed = [row["backend"] for row in rows if row["cosine_min"] < args.min_cosine]
+    print(f"\n{'❌' if failed else '✅'} Parity: cosine with fp32 >= {args.min_cosine} for every chunk"
+          + (f" except with {', '.join(failed)}" if failed else ""))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"model": args.model, "chunks": len(texts), "batch_size": args.batch_size,
+                       "threads": args.threads, "results": rows}, f, indent=2)
+        print(f"✓ Results saved: {args.output}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+OCR Preprocessing Benchmark
+Compare the fast/balanced/quality OCR profiles on sample PDF pages:
+time per page (render, preprocess, Tesseract) and character accuracy
+against the page's native text layer (use born-digital PDFs as samples).
+
+Usage:
+    python benchmark_ocr.py storage/uploads/jurnal_bsf.pdf
+    python benchmark_ocr.py a.pdf b.pdf --pages 3 --noise 12     # simulate noisy scans
+    python benchmark_ocr.py a.pdf --profiles fast balanced --output ocr_benchmark.json
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+from difflib import SequenceMatcher
+
+import numpy as np
+import pytesseract
+from PIL import Image
+from dotenv import load_dotenv
+
+from utils.pdf_processor import PDFProcessor, PREPROCESS_PROFILES, MIN_TEXT_CHARS, estimate_noise
+
+# Load environment variables
+load_dotenv()
+
+
+def normalize(text: str) -> str:
+    """Collapse whitespace so layout differences do not count as errors"""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def char_accuracy(reference: str, ocr_text: str) -> float:
+    """Matched characters / length of the longer text (1.0 = identical)"""
+    reference, ocr_text = normalize(reference), normalize(ocr_text)
+    if not reference and not ocr_text:
+        return 1.0
+    matcher = SequenceMatcher(None, reference, ocr_text, autojunk=False)
+    matched = sum(block.size for block in matcher.get_matching_blocks())
+    return matched / max(len(reference), len(ocr_text))
+
+
+def sample_pages(processor: PDFProcessor, pdf_path: str, max_pages: int) -> list:
+    """Pages with a usable text layer (the ground truth), at most max_pages"""
+    pages = [p for p in processor.analyze_pages(pdf_path) if not p["needs_ocr"]]
+    return pages[:max_pages]
+
+
+def add_noise(image: Image.Image, sigma: float, rng) -> Image.Image:
+    """Gaussian pixel noise, to mimic a scanned page"""
+    gray = np.asarray(image.convert("L")).astype(np.int16)
+    noisy = gray + rng.normal(0, sigma, gray.shape)
+    return Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8))
+
+
+def benchmark_profile(profile: str, pdf_paths: list, args) -> dict:
+    processor = PDFProcessor(
+        tesseract_cmd=os.getenv("TESSERACT_CMD"),
+        lang=args.lang,
+        ocr_workers=1,
+        ocr_profile=profile
+    )
+    rng = np.random.default_rng(0)
+    settings = PREPROCESS_PROFILES[profile]
+    rows = []
+
+    for pdf_path in pdf_paths:
+        pages = sample_pages(processor, pdf_path, args.pages)
+        if not pages:
+            print(f"⚠️ {os.path.basename(pdf_path)}: no pages with a text layer to compare against")
+            continue
+        native = {p["page"]: p["native_text"] for p in pages}
+
+        render_start = time.perf_counter()
+        for page_num, image in processor.render_pages(pdf_path, page_numbers=list(native), batch_size=1):
+            render_seconds = time.perf_counter() - render_start
+
+            if args.noise:
+                image = add_noise(image, args.noise, rng)
+
+            start = time.perf_counter()
+            gray = np.asarray(image.convert("L"))
+            noise = estimate_noise(gray)
+            preprocessed = processor.preprocess_image_for_ocr(image)
+            preprocess_seconds = time.perf_counter() - start
+
+            row = {
+                "pdf": os.path.basename(pdf_path),
+                "page": page_num,
+                "render_seconds": round(render_seconds, 4),
+                "preprocess_seconds": round(preprocess_seconds, 4),
+                "noise_sigma": round(noise, 2),
+                "denoised": bool(settings["denoise"]) and noise > settings["noise_threshold"],
+                "ocr_seconds": None,
+                "char_accuracy": None
+            }
+            if not args.no_ocr:
+                start = time.perf_counter()
+                text = pytesseract.image_to_string(preprocessed, lang=args.lang)
+                row["ocr_seconds"] = round(time.perf_counter() - start, 4)
+                row["char_accuracy"] = round(char_accuracy(native[page_num], text), 4)
+            rows.append(row)
+            print(f"  [{profile}] {row['pdf']} page {page_num}: "
+                  f"preprocess {row['preprocess_seconds']:.2f}s"
+                  + (f", OCR {row['ocr_seconds']:.2f}s, accuracy {row['char_accuracy']:.1%}" if not args.no_ocr else ""))
+
+            render_start = time.perf_counter()
+
+    def mean(key):
+        values = [r[key] for r in rows if r[key] is not None]
+        return round(sum(values) / len(values), 4) if values else None
+
+    return {
+        "profile": profile,
+        "settings": settings,
+        "pages": len(rows),
+        "denoised_pages": sum(r["denoised"] for r in rows),
+        "render_seconds": mean("render_seconds"),
+        "preprocess_seconds": mean("preprocess_seconds"),
+        "ocr_seconds": mean("ocr_seconds"),
+        "char_accuracy": mean("char_accuracy"),
+        "rows": rows
+    }
+
+
+def print_summary(results: list):
+    print("\n" + "=" * 80)
+    print("📊 OCR PROFILE BENCHMARK (mean per page)")
+    print("=" * 80)
+    print(f"{'Profile':<10} {'Pages':>6} {'Denoised':>9} {'Render':>9} {'Preproc':>9} {'OCR':>9} {'Total':>9} {'Accuracy':>9}")
+    for r in results:
+        total = sum(v for v in (r["render_seconds"], r["preprocess_seconds"], r["ocr_seconds"]) if v)
+        accuracy = f"{r['char_accuracy']:.1%}" if r["char_accuracy"] is not None else "n/a"
+        ocr = f"{r['ocr_seconds']:.2f}s" if r["ocr_seconds"] is not None else "n/a"
+        print(f"{r['profile']:<10} {r['pages']:>6} {r['denoised_pages']:>9} "
+              f"{r['render_seconds'] or 0:>8.2f}s {r['preprocess_seconds'] or 0:>8.2f}s {ocr:>9} "
+              f"{total:>8.2f}s {accuracy:>9}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark OCR preprocessing profiles")
+    parser.add_argument("pdfs", nargs="+", help="Sample PDFs with a text layer (ground truth)")
+    parser.add_argument("--profiles", nargs="+", default=list(PREPROCESS_PROFILES),
+                        choices=list(PREPROCESS_PROFILES))
+    parser.add_argument("--pages", type=int, default=5, help="Pages per PDF (default: 5)")
+    parser.add_argument("--noise", type=float, default=0.0,
+                        help="Add Gaussian noise with this sigma to simulate scans")
+    parser.add_argument("--lang", default=os.getenv("OCR_LANG", "eng+ind"))
+    parser.add_argument("--no-ocr", action="store_true", help="Time rendering/preprocessing only")
+    parser.add_argument("--output", help="Write full results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f"Pages need at least {MIN_TEXT_CHARS} chars of native text to be used as ground truth")
+
+    results = [benchmark_profile(profile, args.pdfs, args) for profile in args.profiles]
+    print_summary(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"noise": args.noise, "lang": args.lang, "results": results}, f, indent=2)
+        print(f"\n✓ Results saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
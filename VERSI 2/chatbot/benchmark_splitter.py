@@ -0,0 +1,207 @@
+"""
+Text Splitter Benchmark
+Check that the built-in RecursiveTextSplitter gives exactly the chunks of
+LangChain's RecursiveCharacterTextSplitter (same separators), and compare
+throughput (MB/s) and import time.
+
+Texts: the native text layer of the given PDFs/.txt files plus a seeded
+synthetic corpus (paragraphs, long words, repeated separators, unicode).
+Needs langchain (or langchain-text-splitters) installed for the comparison.
+
+Usage:
+    python benchmark_splitter.py
+    python benchmark_splitter.py storage/uploads/*.pdf --repeat 5
+    python benchmark_splitter.py notes.txt --sizes 500:50 1000:100 --output splitter_benchmark.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+import importlib.util
+
+from pypdf import PdfReader
+
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+NATIVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils", "text_splitter.py")
+
+# Loaded from the file so that utils/__init__ (embedding models etc.) is not imported
+_spec = importlib.util.spec_from_file_location("text_splitter", NATIVE_PATH)
+text_splitter = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(text_splitter)
+
+LANGCHAIN_IMPORTS = [
+    ("langchain_text_splitters", "from langchain_text_splitters import RecursiveCharacterTextSplitter"),
+    ("langchain.text_splitter", "from langchain.text_splitter import RecursiveCharacterTextSplitter"),
+]
+
+
+def load_langchain():
+    """(module name, RecursiveCharacterTextSplitter class), or (None, None) if not installed"""
+    for module, statement in LANGCHAIN_IMPORTS:
+        try:
+            namespace = {}
+            exec(statement, namespace)
+            return module, namespace["RecursiveCharacterTextSplitter"]
+        except ImportError:
+            continue
+    return None, None
+
+
+def synthetic_texts(seed: int = 0) -> dict:
+    """Texts that exercise every separator level and the edge cases"""
+    rng = random.Random(seed)
+    words = ["budidaya", "maggot", "BSF", "larva", "pakan", "sampah", "organik", "protein",
+             "kompos", "suhu", "kelembapan", "panen", "Hermetia", "illucens", "é", "日本語", "—"]
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(3, 25))).capitalize() + "."
+
+    def paragraph():
+        return " ".join(sentence() for _ in range(rng.randint(1, 8)))
+
+    return {
+        "paragraphs": "\n\n".join(paragraph() for _ in range(400)),
+        "lines": "\n".join(sentence() for _ in range(3000)),
+        "mixed": "".join(rng.choice([paragraph(), sentence(), "\n", "\n\n", "\n\n\n", "  ", " . ", ". . "])
+                         for _ in range(3000)),
+        "long_words": " ".join("x" * rng.randint(1, 1500) for _ in range(300)),
+        "no_separators": "".join(rng.choice("abcdefghij") for _ in range(50000)),
+        "whitespace": "  \n \n\n   \t\n\n" * 500 + paragraph() + "\n \n" * 200,
+        "short": "Satu kalimat saja.",
+        "empty": "",
+    }
+
+
+def file_texts(paths: list) -> dict:
+    """Native text of PDFs (pages joined like join_pages) and plain text files"""
+    texts = {}
+    for path in paths:
+        name = os.path.basename(path)
+        if path.lower().endswith(".pdf"):
+            pages = [(page.extract_text() or "").strip() for page in PdfReader(path).pages]
+            texts[name] = "\n\n".join(page for page in pages if page)
+        else:
+            with open(path, encoding="utf-8") as f:
+                texts[name] = f.read()
+    return texts
+
+
+def check_parity(texts: dict, sizes: list, langchain_cls) -> list:
+    """Every (text, size) whose chunks or offsets differ; empty list = identical"""
+    mismatches = []
+    for chunk_size, chunk_overlap in sizes:
+        native = text_splitter.RecursiveTextSplitter(chunk_size, chunk_overlap, SEPARATORS)
+        reference = langchain_cls(chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                  length_function=len, separators=SEPARATORS)
+        for name, text in texts.items():
+            located = native.split_with_offsets(text)
+            expected = reference.split_text(text)
+            chunks = [chunk for _, chunk in located]
+            if chunks != expected:
+                first = next((i for i, (a, b) in enumerate(zip(chunks, expected)) if a != b),
+                             min(len(chunks), len(expected)))
+                mismatches.append({"text": name, "size": f"{chunk_size}:{chunk_overlap}",
+                                   "chunks": len(chunks), "expected": len(expected), "first_difference": first})
+            elif any(text[start:start + len(chunk)] != chunk for start, chunk in located):
+                mismatches.append({"text": name, "size": f"{chunk_size}:{chunk_overlap}", "offsets": "wrong"})
+    return mismatches
+
+
+def throughput(splitter, texts: dict, repeat: int) -> float:
+    """MB/s (UTF-8 bytes) over all texts, best of `repeat` runs"""
+    megabytes = sum(len(text.encode("utf-8")) for text in texts.values()) / 1024 / 1024
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts.values():
+            splitter.split_text(text)
+        best = min(best, time.perf_counter() - start)
+    return megabytes / best
+
+
+def import_seconds(statement: str, repeat: int) -> float:
+    """Median cold import time, each in a fresh interpreter"""
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        times.append(float(output.stdout.strip()))
+    return sorted(times)[len(times) // 2]
+
+
+def parse_size(value: str):
+    size, _, overlap = value.partition(":")
+    return int(size), int(overlap or 0)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare the built-in text splitter with LangChain's")
+    parser.add_argument("files", nargs="*", help="PDFs or .txt files to add to the synthetic corpus")
+    parser.add_argument("--sizes", nargs="+", type=parse_size,
+                        default=[(500, 50), (1000, 200), (200, 0), (100, 20), (40, 39)],
+                        help="chunk_size:chunk_overlap pairs (default: 500:50 1000:200 200:0 100:20 40:39)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs, best/median is reported (default: 3)")
+    parser.add_argument("--output", help="Write results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    module, langchain_cls = load_langchain()
+    if langchain_cls is None:
+        print("❌ LangChain is not installed: pip install langchain-text-splitters")
+        sys.exit(1)
+
+    texts = {**synthetic_texts(), **file_texts(args.files)}
+    total_mb = sum(len(text.encode("utf-8")) for text in texts.values()) / 1024 / 1024
+    print(f"📄 {len(texts)} texts, {total_mb:.2f} MB, reference: {module}")
+
+    mismatches = check_parity(texts, args.sizes, langchain_cls)
+    for mismatch in mismatches:
+        print(f"  ✗ {mismatch}")
+    print(f"{'✅' if not mismatches else '❌'} Parity: {len(texts) * len(args.sizes) - len(mismatches)}/"
+          f"{len(texts) * len(args.sizes)} text/size combinations identical")
+
+    rows = []
+    for chunk_size, chunk_overlap in args.sizes:
+        native = text_splitter.RecursiveTextSplitter(chunk_size, chunk_overlap, SEPARATORS)
+        reference = langchain_cls(chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                  length_function=len, separators=SEPARATORS)
+        rows.append({
+            "size": f"{chunk_size}:{chunk_overlap}",
+            "native_mb_s": round(throughput(native, texts, args.repeat), 2),
+            "langchain_mb_s": round(throughput(reference, texts, args.repeat), 2)
+        })
+
+    imports = {
+        "native_seconds": import_seconds(
+            f"import importlib.util as u; s = u.spec_from_file_location('m', {NATIVE_PATH!r}); "
+            f"s.loader.exec_module(u.module_from_spec(s))", args.repeat),
+        "langchain_seconds": import_seconds(dict(LANGCHAIN_IMPORTS)[module], args.repeat)
+    }
+
+    print("\n" + "=" * 60)
+    print("📊 SPLITTER BENCHMARK (throughput: best of runs)")
+    print("=" * 60)
+    print(f"{'Size':<10} {'Native':>12} {'LangChain':>12} {'Speedup':>9}")
+    for row in rows:
+        print(f"{row['size']:<10} {row['native_mb_s']:>7.2f} MB/s {row['langchain_mb_s']:>7.2f} MB/s "
+              f"{row['native_mb_s'] / row['langchain_mb_s']:>8.1f}x")
+    print(f"\nImport time: native {imports['native_seconds'] * 1000:.1f} ms, "
+          f"{module} {imports['langchain_seconds'] * 1000:.0f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"texts": list(texts), "megabytes": round(total_mb, 3), "reference": module,
+                       "mismatches": mismatches, "throughput": rows, "imports": imports}, f, indent=2)
+        print(f"\n✓ Results saved: {args.output}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
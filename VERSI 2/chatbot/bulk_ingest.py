@@ -0,0 +1,263 @@
+"""
+Bulk PDF Ingestion
+Index whole directories of PDFs without going through the HTTP API.
+Files are deduplicated by content hash, extracted/chunked/embedded in
+parallel worker processes, and written to PostgreSQL several documents per
+transaction. Every file's outcome is checkpointed, so an interrupted run
+continues where it stopped.
+
+Usage:
+    python bulk_ingest.py /data/penyuluhan
+    python bulk_ingest.py /data/a /data/b/leaflet.pdf --workers 8 --batch-docs 50
+    python bulk_ingest.py /data/penyuluhan --retry-failed     # retry files that failed last time
+    python bulk_ingest.py /data/penyuluhan --dry-run          # only list what would be ingested
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from dotenv import load_dotenv
+
+from utils.extraction_cache import file_sha256
+from utils.ingestion import BulkPreparer, store_documents, prune_checkpoints, IngestionError
+from models.vector_db import VectorDatabase
+
+# Load environment variables
+load_dotenv()
+
+
+class Checkpoint:
+    """Per-file outcome of bulk runs, keyed by absolute path (JSON, written atomically)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.files = json.load(f)
+            print(f"📌 Checkpoint: {len(self.files)} files from previous runs ({path})")
+
+    def lookup(self, filepath: str, stat: os.stat_result):
+        """Entry of an unchanged file (same size and mtime), or None"""
+        entry = self.files.get(filepath)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry
+        return None
+
+    def record(self, filepath: str, stat: os.stat_result, **fields):
+        self.files[filepath] = {"size": stat.st_size, "mtime": stat.st_mtime, **fields}
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.files, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def find_pdfs(paths: list, recursive: bool = True):
+    """Absolute paths of the PDFs under the given files/directories, sorted"""
+    found = set()
+    for path in paths:
+        if os.path.isfile(path):
+            if path.lower().endswith(".pdf"):
+                found.add(os.path.abspath(path))
+            continue
+        for root, dirs, files in os.walk(path):
+            found.update(os.path.abspath(os.path.join(root, name)) for name in files if name.lower().endswith(".pdf"))
+            if not recursive:
+                break
+    return sorted(found)
+
+
+class BulkIngestion:
+    """One bulk run: dedupe, parallel preparation, batched database writes"""
+
+    def __init__(self, args, vector_db: VectorDatabase, checkpoint: Checkpoint):
+        self.args = args
+        self.vector_db = vector_db
+        self.checkpoint = checkpoint
+        self.counts = Counter()
+        self.seen = {}      # content hash -> first path with it in this run
+        self.pending = []   # (path, stat, prepared document) waiting for a database batch
+
+    def plan(self, files: list):
+        """Files that still need ingesting, as (path, stat, content_hash); records the rest"""
+        for path in files:
+            stat = os.stat(path)
+            entry = self.checkpoint.lookup(path, stat)
+            if entry and (entry["status"] in ("done", "duplicate") or
+                          (entry["status"] == "failed" and not self.args.retry_failed)):
+                self.seen.setdefault(entry["hash"], path)
+                self.counts[f"skipped ({entry['status']})"] += 1
+                continue
+
+            content_hash = entry["hash"] if entry else file_sha256(path)
+            if content_hash in self.seen:
+                self.checkpoint.record(path, stat, hash=content_hash, status="duplicate",
+                                       duplicate_of=self.seen[content_hash])
+                self.counts["duplicate"] += 1
+                continue
+            self.seen[content_hash] = path
+
+            existing = self.vector_db.find_document_by_hash(content_hash) if self.vector_db else None
+            if existing:
+                self.checkpoint.record(path, stat, hash=content_hash, status="duplicate",
+                                       document_id=existing["id"])
+                self.counts["duplicate"] += 1
+                continue
+
+            yield path, stat, content_hash
+
+    def collect(self, future, item):
+        path, stat, content_hash = item
+        try:
+            outcome = future.result()
+        except Exception as e:  # worker process died (e.g. out of memory)
+            outcome = {"error": f"Worker crashed: {e}", "stage": "extract"}
+
+        if "error" in outcome:
+            print(f"❌ {os.path.basename(path)}: {outcome['stage']} failed: {outcome['error']}")
+            self.checkpoint.record(path, stat, hash=content_hash, status="failed",
+                                   stage=outcome["stage"], error=outcome["error"])
+            self.counts["failed"] += 1
+            return
+
+        document = outcome["document"]
+        if not document["chunks"]:
+            print(f"❌ {os.path.basename(path)}: no text extracted")
+            self.checkpoint.record(path, stat, hash=content_hash, status="failed",
+                                   stage="extract", error="No text extracted")
+            self.counts["failed"] += 1
+            return
+        print(f"  ✓ {os.path.basename(path)}: {len(document['chunks'])} chunks ({outcome['seconds']:.1f}s)")
+        self.pending.append((path, stat, document))
+        if (len(self.pending) >= self.args.batch_docs or
+                sum(len(d["chunks"]) for _, _, d in self.pending) >= self.args.batch_chunks):
+            self.flush()
+
+    def flush(self):
+        """Store the prepared documents in one transaction and checkpoint them"""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            doc_ids = store_documents(self.vector_db, [d for _, _, d in batch])
+        except IngestionError as e:
+            # Store one by one, so one bad document does not fail the others
+            print(f"⚠️ Batch insert failed ({e}), retrying documents one by one")
+            doc_ids = []
+            for _, _, document in batch:
+                try:
+                    doc_ids.extend(store_documents(self.vector_db, [document]))
+                except IngestionError as single_error:
+                    doc_ids.append(single_error)
+
+        for (path, stat, document), doc_id in zip(batch, doc_ids):
+            if isinstance(doc_id, IngestionError):
+                self.checkpoint.record(path, stat, hash=document["content_hash"], status="failed",
+                                       stage="store", error=str(doc_id))
+                self.counts["failed"] += 1
+            else:
+                self.checkpoint.record(path, stat, hash=document["content_hash"], status="done",
+                                       document_id=doc_id, chunks=len(document["chunks"]))
+                self.counts["done"] += 1
+                self.counts["chunks"] += len(document["chunks"])
+        self.checkpoint.save()
+        stored = sum(not isinstance(doc_id, IngestionError) for doc_id in doc_ids)
+        print(f"💾 Stored {stored}/{len(batch)} documents ({self.counts['done']} done so far)")
+
+    def run(self, files: list):
+        if self.args.dry_run:
+            for path, _, _ in self.plan(files):
+                print(f"  would ingest: {path}")
+                self.counts["to ingest"] += 1
+            return
+
+        preparer = BulkPreparer(self.args.workers, self.args.ocr_workers)
+        print(f"⚙️  {preparer.workers} document workers, {preparer.ocr_workers} OCR worker(s) each")
+        max_in_flight = preparer.workers * 2
+        in_flight = {}
+        cancel = False
+        try:
+            for item in self.plan(files):
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.collect(future, in_flight.pop(future))
+                path = item[0]
+                in_flight[preparer.submit(path, os.path.basename(path), item[2],
+                                          skip_ocr=self.args.skip_ocr or None)] = item
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.collect(future, in_flight.pop(future))
+        except KeyboardInterrupt:
+            print("\n⏹️ Interrupted: storing the documents already prepared, run again to continue")
+            cancel = True
+        finally:
+            preparer.shutdown(cancel=cancel)
+            self.flush()
+            self.checkpoint.save()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest directories of PDFs into the chatbot database")
+    parser.add_argument("paths", nargs="+", help="PDF files or directories")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not descend into subdirectories")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Documents processed in parallel (default: CPU cores; each loads its own embedding model)")
+    parser.add_argument("--ocr-workers", type=int, default=1, help="OCR processes per document (default: 1)")
+    parser.add_argument("--batch-docs", type=int, default=20, help="Documents per database transaction (default: 20)")
+    parser.add_argument("--batch-chunks", type=int, default=2000,
+                        help="Chunks per database transaction, whichever limit comes first (default: 2000)")
+    parser.add_argument("--checkpoint", default=os.path.join("storage", "jobs", "bulk_ingest_checkpoint.json"),
+                        help="Checkpoint file for resuming")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry files that failed in a previous run")
+    parser.add_argument("--skip-ocr", action="store_true", help="Native text only (default: SKIP_OCR env)")
+    parser.add_argument("--dry-run", action="store_true", help="List the files that would be ingested")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.time()
+
+    files = find_pdfs(args.paths, recursive=not args.no_recursive)
+    print(f"📂 Found {len(files)} PDF files")
+    checkpoint = Checkpoint(args.checkpoint)
+    prune_checkpoints()
+
+    vector_db = None
+    if not args.dry_run:
+        vector_db = VectorDatabase(vector_dimension=int(os.getenv("VECTOR_DIMENSION", 384)))
+        if not vector_db.connect():
+            sys.exit(1)
+
+    ingestion = BulkIngestion(args, vector_db, checkpoint)
+    try:
+        ingestion.run(files)
+    finally:
+        if vector_db:
+            vector_db.close()
+
+    elapsed = time.time() - start
+    counts = ingestion.counts
+    print("\n" + "=" * 60)
+    print("📊 BULK INGESTION SUMMARY")
+    print("=" * 60)
+    for key in sorted(counts):
+        print(f"   {key:<22} {counts[key]}")
+    print(f"   {'time':<22} {elapsed:.1f}s"
+          + (f" ({counts['done'] / elapsed * 60:.1f} documents/min)" if counts["done"] else ""))
+    if counts["failed"]:
+        print(f"\n💡 Failed files are listed in {args.checkpoint}; rerun with --retry-failed")
+
+
+if __name__ == "__main__":
+    main()
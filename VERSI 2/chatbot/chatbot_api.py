@@ -5,6 +5,7 @@ REST API for PDF upload and RAG chatbot
 
 import os
 import sys
+import uuid
 from pathlib import Path
 from flask import Flask, request, jsonify
 from flask_cors import CORS
@@ -15,11 +16,11 @@ import traceback
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.pdf_processor import PDFProcessor
-from utils.text_processor import TextChunker, EmbeddingGenerator
-from utils.azure_embeddings import AzureOpenAIEmbedding
-from models.vector_db import VectorDatabase
+from utils.extraction_cache import file_sha256
+from utils.query_cache import QueryEmbeddingCache
+from utils.ingestion import build_components, ingest_document, IngestionError, JobStore, IngestionQueue
 from models.rag_system import RAGSystem
+from models.vector_db import VectorDatabase
 
 # Load environment variables
 load_dotenv()
@@ -38,6 +39,10 @@ UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "./storage/uploads")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 50)) * 1024 * 1024  # MB to bytes
 ALLOWED_EXTENSIONS = {'pdf'}
 
+# Background ingestion: documents processed at the same time
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", 2))
+JOBS_DIR = os.getenv("JOBS_DIR", "./storage/jobs")
+
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # Initialize components (lazy loading)
@@ -46,51 +51,53 @@ text_chunker = None
 embedder = None
 vector_db = None
 rag_system = None
+job_store = None
+ingestion_queue = None
 
 
 def init_components():
     """Initialize all components (call on first request)"""
-    global pdf_processor, text_chunker, embedder, vector_db, rag_system
+    global pdf_processor, text_chunker, embedder, vector_db, rag_system, job_store, ingestion_queue
     
     if pdf_processor is None:
         print("🚀 Initializing chatbot components...")
         
-        # PDF Processor with OCR
-        tesseract_cmd = os.getenv("TESSERACT_CMD", None)
-        ocr_lang = os.getenv("OCR_LANG", "eng+ind")  # English + Indonesian
-        pdf_processor = PDFProcessor(tesseract_cmd=tesseract_cmd, lang=ocr_lang)
-        
-        # Text Chunker
-        chunk_size = int(os.getenv("CHUNK_SIZE", 500))
-        chunk_overlap = int(os.getenv("CHUNK_OVERLAP", 50))
-        text_chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-        
-        # Embedder - Check if using Azure OpenAI
+        # PDF processor, chunker, embedder and database (shared with ingestion workers)
+        components = build_components()
+        pdf_processor = components["pdf_processor"]
+        text_chunker = components["text_chunker"]
+        embedder = components["embedder"]
+        vector_db = components["vector_db"]
         use_azure = os.getenv("USE_AZURE_OPENAI", "False").lower() == "true"
         
-        if use_azure:
-            print("🔵 Using Azure OpenAI embeddings...")
-            embedder = AzureOpenAIEmbedding()
-        else:
-            print("🟢 Using Sentence Transformers embeddings...")
-            embedder = EmbeddingGenerator(model_name="all-MiniLM-L6-v2")
-        
-        # Vector Database
-        vector_dimension = int(os.getenv("VECTOR_DIMENSION", embedder.dimension))
-        vector_db = VectorDatabase(vector_dimension=vector_dimension)
-        if not vector_db.connect():
-            raise Exception("Failed to connect to database")
+        # Background ingestion jobs (worker processes start on the first upload)
+        job_store = JobStore(JOBS_DIR)
+        ingestion_queue = IngestionQueue(job_store, concurrency=INGEST_CONCURRENCY,
+                                         ocr_workers=int(os.getenv("OCR_WORKERS", 0)) or None)
         
         # RAG System - will auto-detect Azure chatbot settings
         temperature = float(os.getenv("TEMPERATURE", 0.7))
         max_tokens = int(os.getenv("MAX_TOKENS", 1000))
         
+        # Query embedding cache: repeated questions skip the embedding call
+        query_cache = None
+        query_cache_size = int(os.getenv("QUERY_CACHE_SIZE", 1024))
+        if query_cache_size > 0:
+            shared = os.getenv("QUERY_CACHE_SHARED", "false").lower() == "true" and embedder.cache is not None
+            query_cache = QueryEmbeddingCache(
+                max_size=query_cache_size,
+                ttl_seconds=float(os.getenv("QUERY_CACHE_TTL", 3600)),
+                shared_cache=embedder.cache if shared else None,  # worker processes share entries
+                namespace=f"{embedder.cache_namespace}:query"
+            )
+        
         rag_system = RAGSystem(
             vector_db=vector_db,
             embedder=embedder,
             temperature=temperature,
             max_tokens=max_tokens,
-            use_azure=use_azure  # Will use Azure chatbot if True
+            use_azure=use_azure,  # Will use Azure chatbot if True
+            query_cache=query_cache
         )
         
         print("✅ All components initialized!")
@@ -101,6 +108,37 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def save_upload(file):
+    """
+    Save an uploaded PDF in UPLOAD_FOLDER unless the same content is already indexed
+    
+    Returns:
+        (filename, filepath, file_size, content_hash, existing): existing is the
+        duplicate document (the file is then not kept and filepath is None)
+    """
+    filename = secure_filename(file.filename)
+    filepath = os.path.join(UPLOAD_FOLDER, filename)
+    
+    # Saved under a temporary name until the duplicate check is done
+    tmp_path = f"{filepath}.{uuid.uuid4().hex[:8]}.upload"
+    file.save(tmp_path)
+    file_size = os.path.getsize(tmp_path)
+    
+    # Same content uploaded before (possibly under another name)?
+    content_hash = file_sha256(tmp_path)
+    existing = vector_db.find_document_by_hash(content_hash)
+    if existing:
+        os.remove(tmp_path)
+        return filename, None, file_size, content_hash, existing
+    
+    # A different file with this name may still be read by a queued job
+    if os.path.exists(filepath):
+        stem, ext = os.path.splitext(filename)
+        filepath = os.path.join(UPLOAD_FOLDER, f"{stem}_{content_hash[:8]}{ext}")
+    os.replace(tmp_path, filepath)
+    return filename, filepath, file_size, content_hash, None
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -114,10 +152,15 @@ def health_check():
 @app.route('/api/upload', methods=['POST'])
 def upload_pdf():
     """
-    Upload and process PDF file
+    Upload a PDF and queue it for ingestion
+    
+    Query params:
+        sync=true: Process inside the request (waits for OCR/embedding)
     
     Returns:
-        document_id and processing stats
+        202 with job_id (poll /api/jobs/<job_id>), 200 with the existing
+        document_id for a duplicate, or 201 with document_id and
+        processing stats when sync=true
     """
     import time
     start_time = time.time()
@@ -138,113 +181,192 @@ def upload_pdf():
             return jsonify({"error": "Invalid file type. Only PDF allowed"}), 400
         
         # Save file
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        
-        print(f"📄 Processing uploaded file: {filename}")
+        print(f"📄 Processing uploaded file: {secure_filename(file.filename)}")
         print(f"   Saving file...")
         
         try:
-            file.save(filepath)
+            filename, filepath, file_size, content_hash, existing = save_upload(file)
         except Exception as e:
             print(f"❌ Error saving file: {e}")
             return jsonify({"error": f"Failed to save file: {str(e)}"}), 500
         
-        file_size = os.path.getsize(filepath)
         print(f"   File size: {file_size / 1024:.2f} KB")
         
-        # Check if should skip OCR (for faster processing)
-        skip_ocr = os.getenv("SKIP_OCR", "false").lower() == "true"
+        if existing:
+            processing_time = time.time() - start_time
+            print(f"⚡ Duplicate of document {existing['id']} ({existing['filename']}), not re-indexed")
+            return jsonify({
+                "success": True,
+                "duplicate": True,
+                "document_id": existing["id"],
+                "filename": filename,
+                "existing_filename": existing["filename"],
+                "file_size": file_size,
+                "total_chunks": existing["total_chunks"],
+                "processing_time": f"{processing_time:.2f}s"
+            }), 200
+        
+        # Default: queue a background job and return its ID right away
+        if request.args.get("sync", "false").lower() != "true":
+            job = ingestion_queue.submit(filepath, filename, content_hash=content_hash)
+            print(f"   Queued as job {job['job_id']}")
+            return jsonify({
+                "success": True,
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "status_url": f"/api/jobs/{job['job_id']}",
+                "filename": filename,
+                "file_size": file_size
+            }), 202
+        
+        # ?sync=true: process inside the request, on its own connection because
+        # the document stays in an open transaction until its last chunk is stored
+        writer_db = VectorDatabase(vector_dimension=vector_db.vector_dimension)
+        if not writer_db.connect():
+            return jsonify({"error": "Failed to connect to database"}), 500
+        try:
+            result = ingest_document(filepath, filename, {
+                "pdf_processor": pdf_processor,
+                "text_chunker": text_chunker,
+                "embedder": embedder,
+                "vector_db": writer_db
+            }, content_hash=content_hash)
+        except IngestionError as e:
+            messages = {
+                "extract": "Failed to process PDF",
+                "chunk": "Failed to chunk text",
+                "embed": "Failed to generate embeddings",
+                "store": "Failed to store in database"
+            }
+            hint = ("\nCheck Azure OpenAI connection; embeddings received so far are kept, "
+                    "uploading the same file again only embeds the rest") if e.stage == "embed" else ""
+            return jsonify({"error": f"{messages[e.stage]}: {str(e)}{hint}"}), 500
+        finally:
+            writer_db.close()
         
-        # Process PDF with OCR
-        if skip_ocr:
-            print(f"   ⚡ Fast mode: Extracting text only (no OCR)...")
-        else:
-            print(f"   Extracting text with OCR (this may take a while)...")
+        processing_time = time.time() - start_time
+        print(f"✅ Document processed successfully! ID: {result['document_id']}")
+        print(f"   Processing time: {processing_time:.2f}s")
         
-        try:
-            pdf_result = pdf_processor.process_pdf_full(filepath, skip_ocr=skip_ocr)
-        except Exception as e:
-            print(f"❌ Error processing PDF: {e}")
-            # Clean up file
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            return jsonify({"error": f"Failed to process PDF: {str(e)}"}), 500
+        return jsonify({
+            "success": True,
+            **result,
+            "processing_time": f"{processing_time:.2f}s"
+        }), 200 if result.get("duplicate") else 201
+    
+    except Exception as e:
+        print(f"❌ Error processing upload: {e}")
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/upload/batch', methods=['POST'])
+def upload_batch():
+    """
+    Upload several PDFs (form field 'files', repeated) and queue one ingestion job each
+    
+    Returns:
+        202 with one entry per file: job_id and status_url, duplicate with the
+        existing document_id, or error for a file that was not accepted
+    """
+    try:
+        init_components()
         
-        # Chunk text
-        print(f"   Chunking text ({len(pdf_result['combined_text'])} chars)...")
-        try:
-            chunks = text_chunker.chunk_text(
-                text=pdf_result["combined_text"],
-                metadata={
-                    "filename": filename,
-                    "num_images": pdf_result["num_images"]
-                }
-            )
-            print(f"   Created {len(chunks)} chunks")
-        except Exception as e:
-            print(f"❌ Error chunking text: {e}")
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            return jsonify({"error": f"Failed to chunk text: {str(e)}"}), 500
+        files = request.files.getlist('files')
+        if not files or all(f.filename == '' for f in files):
+            return jsonify({"error": "No files provided"}), 400
         
-        # Generate embeddings
-        print(f"   Generating embeddings for {len(chunks)} chunks...")
-        try:
-            chunks_with_embeddings = embedder.embed_chunks(chunks)
-        except Exception as e:
-            print(f"❌ Error generating embeddings: {e}")
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            return jsonify({"error": f"Failed to generate embeddings: {str(e)}\nCheck Azure OpenAI connection"}), 500
+        print(f"📚 Batch upload: {len(files)} files")
+        results = []
+        batch_hashes = {}  # content hash -> job of the first copy in this request
         
-        # Store in database
-        print(f"   Storing in database...")
-        try:
-            doc_id = vector_db.insert_document(
-                filename=filename,
-                filepath=filepath,
-                file_size=file_size,
-                total_chunks=len(chunks_with_embeddings),
-                metadata={
-                    "num_images": pdf_result["num_images"],
-                    "text_length": len(pdf_result["full_text"]),
-                    "ocr_text_length": len(pdf_result.get("ocr_text", ""))
-                },
-                full_text=pdf_result["combined_text"]
-            )
+        for file in files:
+            if file.filename == '':
+                continue
+            if not allowed_file(file.filename):
+                results.append({"filename": file.filename, "error": "Invalid file type. Only PDF allowed"})
+                continue
             
-            vector_db.insert_chunks(doc_id, chunks_with_embeddings)
-        except Exception as e:
-            print(f"❌ Error storing in database: {e}")
-            if os.path.exists(filepath):
+            try:
+                filename, filepath, file_size, content_hash, existing = save_upload(file)
+            except Exception as e:
+                print(f"❌ Error saving {file.filename}: {e}")
+                results.append({"filename": file.filename, "error": f"Failed to save file: {str(e)}"})
+                continue
+            
+            if existing:
+                results.append({"filename": filename, "duplicate": True, "document_id": existing["id"],
+                                "existing_filename": existing["filename"]})
+                continue
+            if content_hash in batch_hashes:
                 os.remove(filepath)
-            return jsonify({"error": f"Failed to store in database: {str(e)}"}), 500
-        
-        processing_time = time.time() - start_time
-        print(f"✅ Document processed successfully! ID: {doc_id}")
-        print(f"   Processing time: {processing_time:.2f}s")
+                results.append({"filename": filename, "duplicate": True,
+                                "job_id": batch_hashes[content_hash]["job_id"],
+                                "status_url": f"/api/jobs/{batch_hashes[content_hash]['job_id']}"})
+                continue
+            
+            job = ingestion_queue.submit(filepath, filename, content_hash=content_hash)
+            batch_hashes[content_hash] = job
+            results.append({"filename": filename, "file_size": file_size, "job_id": job["job_id"],
+                            "status": job["status"], "status_url": f"/api/jobs/{job['job_id']}"})
         
+        queued = sum(1 for r in results if "status" in r)
+        print(f"   Queued {queued}/{len(results)} files")
         return jsonify({
             "success": True,
-            "document_id": doc_id,
-            "filename": filename,
-            "file_size": file_size,
-            "total_chunks": len(chunks_with_embeddings),
-            "processing_time": f"{processing_time:.2f}s",
-            "metadata": {
-                "num_images": pdf_result["num_images"],
-                "text_length": len(pdf_result["full_text"]),
-                "ocr_text_length": len(pdf_result.get("ocr_text", ""))
-            }
-        }), 201
+            "queued": queued,
+            "files": results
+        }), 202
     
     except Exception as e:
-        print(f"❌ Error processing upload: {e}")
+        print(f"❌ Error processing batch upload: {e}")
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Ingestion job status
+    
+    Returns:
+        status (queued, running, done, failed), current stage, per-stage
+        progress, overall progress (0-1), eta_seconds and, when done, the
+        document_id and processing stats
+    """
+    try:
+        init_components()
+        
+        job = job_store.get(secure_filename(job_id))
+        if job:
+            return jsonify(job), 200
+        else:
+            return jsonify({"error": "Job not found"}), 404
+    
+    except Exception as e:
+        print(f"❌ Error getting job: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List recent ingestion jobs"""
+    try:
+        init_components()
+        
+        limit = request.args.get('limit', 50, type=int)
+        jobs = job_store.list(limit=limit)
+        
+        return jsonify({
+            "jobs": jobs,
+            "count": len(jobs)
+        }), 200
+    
+    except Exception as e:
+        print(f"❌ Error listing jobs: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/api/query', methods=['POST'])
 def query_chatbot():
     """
@@ -396,6 +518,8 @@ def get_stats():
         init_components()
         
         stats = vector_db.get_stats()
+        if rag_system.query_cache is not None:
+            stats["query_cache"] = rag_system.query_cache.stats()
         
         return jsonify(stats), 200
     
@@ -94,7 +94,7 @@ COMMENT ON COLUMN chunks.chunk_index IS 'Index/urutan chunk dalam dokumen (0, 1,
 COMMENT ON COLUMN chunks.text IS 'Text content dari chunk';
 COMMENT ON COLUMN chunks.char_count IS 'Jumlah karakter dalam chunk';
 COMMENT ON COLUMN chunks.embedding IS 'Vector embedding dari text (3072 dimensions)';
-COMMENT ON COLUMN chunks.metadata IS 'Metadata tambahan (page_number, section, etc)';
+COMMENT ON COLUMN chunks.metadata IS 'Metadata tambahan (filename, page_number, page_end, char_start, char_end)';
 COMMENT ON COLUMN chunks.created_at IS 'Timestamp saat chunk dibuat';
 
 -- ============================================
@@ -107,6 +107,12 @@ ON chunks(document_id);
 
 COMMENT ON INDEX chunks_document_id_idx IS 'Index untuk query chunks berdasarkan document_id';
 
+-- Index untuk deteksi upload duplikat (SHA-256 isi file di metadata)
+CREATE INDEX IF NOT EXISTS documents_content_hash_idx 
+ON documents ((metadata->>'content_hash'));
+
+COMMENT ON INDEX documents_content_hash_idx IS 'Index untuk mencari dokumen berdasarkan hash isi file';
+
 -- Index untuk vector similarity search
 -- HNSW index hanya efisien untuk dimension <= 2000
 -- Untuk dimension > 2000 (seperti 3072), skip index ini
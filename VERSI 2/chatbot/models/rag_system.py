@@ -8,6 +8,8 @@ import os
 from typing import List, Dict
 from openai import OpenAI, AzureOpenAI
 
+from utils.query_cache import QueryEmbeddingCache
+
 
 class RAGSystem:
     """Retrieval Augmented Generation system"""
@@ -19,7 +21,8 @@ class RAGSystem:
         model: str = "gpt-4-turbo-preview",
         temperature: float = 0.7,
         max_tokens: int = 1000,
-        use_azure: bool = None
+        use_azure: bool = None,
+        query_cache: QueryEmbeddingCache = None
     ):
         """
         Initialize RAG system
@@ -31,9 +34,11 @@ class RAGSystem:
             temperature: Generation temperature
             max_tokens: Maximum tokens in response
             use_azure: Use Azure OpenAI (reads from env if None)
+            query_cache: Cache of query embeddings (None = embed every query)
         """
         self.vector_db = vector_db
         self.embedder = embedder
+        self.query_cache = query_cache
         
         # Check if using Azure OpenAI
         if use_azure is None:
@@ -77,12 +82,15 @@ class RAGSystem:
         Returns:
             List of relevant chunks
         """
-        # Generate query embedding
-        query_embedding = self.embedder.generate_embedding(query)
+        # Generate query embedding (repeated questions come from the cache)
+        if self.query_cache is not None:
+            query_embedding = self.query_cache.get(query, self.embedder.generate_embedding)
+        else:
+            query_embedding = self.embedder.generate_embedding(query)
         
         # Search vector database
         results = self.vector_db.similarity_search(
-            query_embedding=query_embedding.tolist(),
+            query_embedding=query_embedding,
             top_k=top_k,
             document_id=document_id
         )
@@ -95,6 +103,15 @@ class RAGSystem:
         
         return filtered_results
     
+    @staticmethod
+    def page_label(chunk: Dict) -> str:
+        """'page 3' / 'pages 3-4' from chunk metadata ('' for chunks indexed without pages)"""
+        metadata = chunk.get("metadata") or {}
+        first, last = metadata.get("page_number"), metadata.get("page_end")
+        if first is None:
+            return ""
+        return f"page {first}" if last in (None, first) else f"pages {first}-{last}"
+    
     def format_context(self, retrieved_chunks: List[Dict]) -> str:
         """
         Format retrieved chunks into context string
@@ -110,8 +127,10 @@ class RAGSystem:
         
         context_parts = []
         for i, chunk in enumerate(retrieved_chunks, 1):
+            pages = self.page_label(chunk)
             context_parts.append(
-                f"[Context {i}] (from {chunk['filename']}, similarity: {chunk['similarity']:.2f})\n"
+                f"[Context {i}] (from {chunk['filename']}{', ' + pages if pages else ''}, "
+                f"similarity: {chunk['similarity']:.2f})\n"
                 f"{chunk['text']}\n"
             )
         
@@ -254,7 +273,9 @@ Please provide a detailed answer based on the context above."""
                     "text": chunk["text"],
                     "filename": chunk["filename"],
                     "similarity": chunk["similarity"],
-                    "chunk_index": chunk["chunk_index"]
+                    "chunk_index": chunk["chunk_index"],
+                    "page_number": (chunk.get("metadata") or {}).get("page_number"),
+                    "page_end": (chunk.get("metadata") or {}).get("page_end")
                 }
                 for chunk in retrieved_chunks
             ]
@@ -4,13 +4,62 @@ Handle vector storage and retrieval
 """
 
 import os
+import io
+import json
+import struct
 from typing import List, Dict, Optional, Tuple
 import psycopg2
-from psycopg2.extras import execute_values, RealDictCursor
+from psycopg2.extras import RealDictCursor
 from pgvector.psycopg2 import register_vector
 import numpy as np
 from datetime import datetime
 
+# COPY ... (FORMAT binary): signature, flags, header extension length
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+CHUNK_COLUMNS = "document_id, chunk_index, text, char_count, embedding, metadata"
+
+
+def chunk_copy_data(document_id: int, chunks: List[Dict], embeddings: np.ndarray,
+                    encoding: str = "utf-8") -> bytes:
+    """
+    Rows of the chunks table in PostgreSQL's binary COPY format
+
+    Embeddings are converted once, as a matrix, to pgvector's binary
+    representation (dimension, unused, big-endian float32 values); no
+    per-value Python objects or text formatting.
+
+    Args:
+        document_id: Parent document ID
+        chunks: Chunk dictionaries (text, chunk_id, char_count, metadata)
+        embeddings: Matrix with one row per chunk
+        encoding: Client encoding of the connection (text and jsonb fields)
+    """
+    vectors = np.ascontiguousarray(embeddings, dtype=">f4")
+    dimension = vectors.shape[1]
+    # 4-byte length + pgvector header, then the row's values
+    vector_prefix = struct.pack("!iHH", 4 + dimension * 4, dimension, 0)
+    data = vectors.tobytes()
+    row_bytes = dimension * 4
+
+    parts = [COPY_HEADER]
+    for i, chunk in enumerate(chunks):
+        text = chunk['text'].encode(encoding)
+        metadata = b"\x01" + json.dumps(chunk.get('metadata', {})).encode(encoding)  # jsonb version 1
+        parts.append(struct.pack(
+            f"!hiiiii{len(text)}sii", 6,
+            4, document_id,
+            4, chunk.get('chunk_id', i),
+            len(text), text,
+            4, chunk.get('char_count', len(chunk['text']))
+        ))
+        parts.append(vector_prefix)
+        parts.append(data[i * row_bytes:(i + 1) * row_bytes])
+        parts.append(struct.pack("!i", len(metadata)))
+        parts.append(metadata)
+    parts.append(COPY_TRAILER)
+    return b"".join(parts)
+
 
 class VectorDatabase:
     """Manage PostgreSQL database with pgvector extension"""
@@ -140,6 +189,12 @@ class VectorDatabase:
                 ON chunks(document_id);
             """)
             
+            # Index for duplicate upload lookup by file hash
+            self.cursor.execute("""
+                CREATE INDEX IF NOT EXISTS documents_content_hash_idx 
+                ON documents ((metadata->>'content_hash'));
+            """)
+            
             self.conn.commit()
             print("✅ Tables created successfully")
             return True
@@ -150,10 +205,15 @@ class VectorDatabase:
             return False
     
     def insert_document(self, filename: str, filepath: str, file_size: int, 
-                       total_chunks: int, metadata: Dict = None, full_text: str = "") -> int:
+                       total_chunks: int, metadata: Dict = None, full_text: str = "",
+                       commit: bool = True) -> int:
         """
         Insert a new document record
         
+        Args:
+            commit: False leaves the transaction open, so the document and its
+                chunks become visible together (see finalize_document)
+        
         Returns:
             Document ID
         """
@@ -165,7 +225,8 @@ class VectorDatabase:
             """, (filename, filepath, file_size, total_chunks, psycopg2.extras.Json(metadata or {}), full_text))
             
             doc_id = self.cursor.fetchone()['id']
-            self.conn.commit()
+            if commit:
+                self.conn.commit()
             
             print(f"✅ Document inserted with ID: {doc_id}")
             return doc_id
@@ -175,37 +236,28 @@ class VectorDatabase:
             self.conn.rollback()
             return None
     
-    def insert_chunks(self, document_id: int, chunks: List[Dict]):
+    def insert_chunks(self, document_id: int, chunks: List[Dict], commit: bool = True):
         """
         Insert multiple chunks with embeddings
         
+        Written with binary COPY: the embeddings go to the server as float32
+        without being formatted as text.
+        
         Args:
             document_id: Parent document ID
             chunks: List of chunk dictionaries with 'text', 'embedding', etc.
+            commit: False leaves the transaction open (batched inserts of one document)
         """
         try:
-            values = [
-                (
-                    document_id,
-                    chunk.get('chunk_id', i),
-                    chunk['text'],
-                    chunk.get('char_count', len(chunk['text'])),
-                    chunk['embedding'],  # pgvector will handle the list
-                    psycopg2.extras.Json(chunk.get('metadata', {}))
-                )
-                for i, chunk in enumerate(chunks)
-            ]
-            
-            execute_values(
-                self.cursor,
-                """
-                INSERT INTO chunks (document_id, chunk_index, text, char_count, embedding, metadata)
-                VALUES %s
-                """,
-                values
+            embeddings = np.stack([chunk['embedding'] for chunk in chunks])
+            encoding = psycopg2.extensions.encodings[self.conn.encoding]
+            self.cursor.copy_expert(
+                f"COPY chunks ({CHUNK_COLUMNS}) FROM STDIN WITH (FORMAT binary)",
+                io.BytesIO(chunk_copy_data(document_id, chunks, embeddings, encoding))
             )
             
-            self.conn.commit()
+            if commit:
+                self.conn.commit()
             print(f"✅ Inserted {len(chunks)} chunks for document {document_id}")
             return True
         
@@ -214,13 +266,62 @@ class VectorDatabase:
             self.conn.rollback()
             return False
     
-    def similarity_search(self, query_embedding: List[float], top_k: int = 5, 
+    def finalize_document(self, document_id: int, total_chunks: int, metadata: Dict = None,
+                          full_text: str = "", chunk_metadata: Dict = None) -> bool:
+        """
+        Set the fields known only after the last chunk and commit the document
+        
+        Args:
+            document_id: Document inserted with commit=False
+            total_chunks: Number of chunks inserted
+            metadata: Document metadata (replaces the initial one)
+            full_text: Document text
+            chunk_metadata: Keys merged into the metadata of every chunk
+        """
+        try:
+            self.cursor.execute("""
+                UPDATE documents SET total_chunks = %s, metadata = %s, full_text = %s
+                WHERE id = %s
+            """, (total_chunks, psycopg2.extras.Json(metadata or {}), full_text, document_id))
+            
+            if chunk_metadata:
+                self.cursor.execute("""
+                    UPDATE chunks SET metadata = COALESCE(metadata, '{}'::jsonb) || %s WHERE document_id = %s
+                """, (psycopg2.extras.Json(chunk_metadata), document_id))
+            
+            self.conn.commit()
+            print(f"✅ Document {document_id} committed ({total_chunks} chunks)")
+            return True
+        
+        except Exception as e:
+            print(f"❌ Error finalizing document: {e}")
+            self.conn.rollback()
+            return False
+    
+    def commit(self) -> bool:
+        """Commit the open transaction (inserts made with commit=False)"""
+        try:
+            self.conn.commit()
+            return True
+        except Exception as e:
+            print(f"❌ Error committing: {e}")
+            self.conn.rollback()
+            return False
+    
+    def rollback(self):
+        """Discard the open transaction (e.g. a document being ingested)"""
+        try:
+            self.conn.rollback()
+        except Exception as e:
+            print(f"❌ Error rolling back: {e}")
+    
+    def similarity_search(self, query_embedding: np.ndarray, top_k: int = 5, 
                          document_id: int = None) -> List[Dict]:
         """
         Search for similar chunks using cosine similarity
         
         Args:
-            query_embedding: Query vector
+            query_embedding: Query vector (NumPy array or list)
             top_k: Number of results to return
             document_id: Optional filter by document ID
             
@@ -273,6 +374,25 @@ class VectorDatabase:
             print(f"❌ Error getting document: {e}")
             return None
     
+    def find_document_by_hash(self, content_hash: str) -> Optional[Dict]:
+        """Get the document uploaded earlier with the same file content (SHA-256), if any"""
+        try:
+            self.cursor.execute("""
+                SELECT id, filename, filepath, file_size, total_chunks, upload_date, metadata
+                FROM documents
+                WHERE metadata->>'content_hash' = %s
+                ORDER BY id
+                LIMIT 1
+            """, (content_hash,))
+            
+            result = self.cursor.fetchone()
+            return dict(result) if result else None
+        
+        except Exception as e:
+            print(f"❌ Error finding document by hash: {e}")
+            self.conn.rollback()
+            return None
+    
     def list_documents(self, limit: int = 100) -> List[Dict]:
         """List all documents"""
         try:
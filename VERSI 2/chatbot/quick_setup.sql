@@ -44,6 +44,7 @@ CREATE TABLE chunks (
 
 -- STEP 7: Create indexes
 CREATE INDEX chunks_document_id_idx ON chunks(document_id);
+CREATE INDEX documents_content_hash_idx ON documents ((metadata->>'content_hash'));
 
 -- STEP 8: Verify setup
 SELECT 
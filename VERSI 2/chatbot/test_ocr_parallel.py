@@ -0,0 +1,67 @@
+"""
+Parallel OCR Test
+Run PDFProcessor.ocr_pages with several worker processes and the extraction
+cache attached (the default configuration), and check that every page is
+OCR'd without errors. Needs Tesseract installed.
+"""
+
+import os
+import sys
+import tempfile
+
+from PIL import Image, ImageDraw, ImageFont
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+PAGE_TEXTS = [
+    "Budidaya maggot BSF",
+    "Larva dipanen hari ke 14",
+    "Pakan dari sampah organik",
+    "Telur menetas dalam 4 hari",
+]
+
+
+def page_image(text: str) -> Image.Image:
+    """White page with one line of large black text, like a scanned page"""
+    image = Image.new("L", (1200, 300), 255)
+    ImageDraw.Draw(image).text((40, 100), text, fill=0, font=ImageFont.load_default(size=64))
+    return image
+
+
+def test_ocr_parallel():
+    """OCR pages in a process pool with the extraction cache attached"""
+    print("=" * 80)
+    print("🔍 TESTING PARALLEL OCR (extraction cache attached)")
+    print("=" * 80)
+
+    from utils.pdf_processor import PDFProcessor
+    from utils.extraction_cache import ExtractionCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        processor = PDFProcessor(
+            tesseract_cmd=os.getenv("TESSERACT_CMD"),
+            ocr_workers=2,
+            cache=ExtractionCache(cache_dir=cache_dir)
+        )
+        pages = [(i + 1, page_image(text)) for i, text in enumerate(PAGE_TEXTS)]
+        results = processor.ocr_pages(pages, total=len(pages))
+
+    failed = [r for r in results if r["error"] or not r["text"]]
+    for r in results:
+        print(f"   Page {r['page']}: {r['text']!r}" + (f" (error: {r['error']})" if r["error"] else ""))
+
+    print("\n" + "=" * 80)
+    if len(results) != len(PAGE_TEXTS) or failed:
+        print(f"❌ PARALLEL OCR TEST FAILED: {len(failed)}/{len(PAGE_TEXTS)} pages without text")
+        print("=" * 80)
+        return False
+    print("✅ PARALLEL OCR TEST PASSED!")
+    print("=" * 80)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_ocr_parallel()
+    sys.exit(0 if success else 1)
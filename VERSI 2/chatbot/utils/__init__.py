@@ -3,13 +3,28 @@ Chatbot RAG System - Utilities Module
 """
 
 from .pdf_processor import PDFProcessor
+from .extraction_cache import ExtractionCache
+from .embedding_cache import EmbeddingCache
+from .query_cache import QueryEmbeddingCache
 from .text_processor import TextChunker, EmbeddingGenerator, OpenAIEmbedding
+from .text_splitter import RecursiveTextSplitter
+from .onnx_embeddings import ONNXSentenceEncoder
 from .azure_embeddings import AzureOpenAIEmbedding
+from .ingestion import ingest_document, IngestionError, JobStore, IngestionQueue
 
 __all__ = [
     'PDFProcessor',
+    'ExtractionCache',
+    'EmbeddingCache',
+    'QueryEmbeddingCache',
     'TextChunker',
+    'RecursiveTextSplitter',
     'EmbeddingGenerator',
     'OpenAIEmbedding',
-    'AzureOpenAIEmbedding'
+    'ONNXSentenceEncoder',
+    'AzureOpenAIEmbedding',
+    'ingest_document',
+    'IngestionError',
+    'JobStore',
+    'IngestionQueue'
 ]
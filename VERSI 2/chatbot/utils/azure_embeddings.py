@@ -1,13 +1,147 @@
 """
 Azure OpenAI Embedding Generator
 Support for Azure OpenAI embeddings API
+
+Requests go through one keep-alive session; batches of a call are sent
+several at a time (results keep the input order), within the deployment's
+requests-per-minute and tokens-per-minute quota. Throttled (429) and
+server errors are retried with backoff, and with a checkpoint every batch
+already paid for is kept on disk, so retrying a failed document only
+embeds what is missing.
 """
 
 import os
+import time
+import random
+import shutil
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
 import requests
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
+from .embedding_cache import EmbeddingCache, embed_with_cache
+
+# Responses worth retrying: timeout, throttled, server errors
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+BACKOFF_BASE = 1.0   # seconds before the first retry (doubled per attempt, with jitter)
+MAX_BACKOFF = 60.0
+
+
+def estimate_tokens(texts: List[str]) -> int:
+    """Token estimate for the rate limit (about 4 characters per token, like Azure's own estimate)"""
+    return sum(len(text) for text in texts) // 4 + 1
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budget shared by threads (token buckets)"""
+    
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        """
+        Initialize limiter
+        
+        Args:
+            requests_per_minute: Request budget, 0 = unlimited
+            tokens_per_minute: Token budget, 0 = unlimited
+        """
+        self.limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        # Azure enforces the per-minute quota over 10 second windows, so bursts
+        # are capped at 10 seconds' worth
+        self.capacity = {key: limit / 6 for key, limit in self.limits.items()}
+        self.available = dict(self.capacity)
+        self.updated = time.monotonic()
+        self.resume_at = 0.0  # set by pause()
+        self._lock = threading.Lock()
+    
+    def pause(self, seconds: float):
+        """Hold every request for `seconds` (the server said it is throttling)"""
+        with self._lock:
+            self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+    
+    def acquire(self, tokens: int):
+        """Block until one request of `tokens` tokens fits the budget, then take it"""
+        cost = {"requests": 1, "tokens": tokens}
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed, self.updated = now - self.updated, now
+                wait = self.resume_at - now
+                for key, limit in self.limits.items():
+                    if not limit:
+                        continue
+                    self.available[key] = min(self.capacity[key], self.available[key] + elapsed * limit / 60)
+                    # A request larger than a whole burst waits for a full bucket
+                    missing = min(cost[key], self.capacity[key]) - self.available[key]
+                    wait = max(wait, missing * 60 / limit)
+                if wait <= 0:
+                    for key, limit in self.limits.items():
+                        if limit:
+                            self.available[key] -= cost[key]
+                    return
+            time.sleep(wait)
+
+
+def retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds the server asks to wait (retry-after-ms or Retry-After), or None"""
+    try:
+        if response.headers.get("retry-after-ms"):
+            return float(response.headers["retry-after-ms"]) / 1000
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:  # HTTP date
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter, so throttled threads do not retry in lockstep"""
+    delay = min(MAX_BACKOFF, BACKOFF_BASE * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+class EmbeddingCheckpoint:
+    """Embeddings of one document's batches already received, kept on disk until the document is stored"""
+    
+    def __init__(self, directory: str):
+        """
+        Initialize checkpoint
+        
+        Args:
+            directory: Directory of this document (e.g. named by its content hash)
+        """
+        self.directory = directory
+    
+    def _path(self, model: str, texts: List[str]) -> str:
+        key = hashlib.sha256("\x1f".join([model] + texts).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.npy")
+    
+    def get(self, model: str, texts: List[str]) -> Optional[np.ndarray]:
+        """Saved embeddings of this batch, or None"""
+        try:
+            return np.load(self._path(model, texts))
+        except (OSError, ValueError):
+            return None
+    
+    def put(self, model: str, texts: List[str], embeddings: np.ndarray):
+        """Save the embeddings of a batch (atomic, safe from several threads)"""
+        path = self._path(model, texts)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(embeddings, dtype=np.float32))
+        os.replace(tmp_path, path)
+    
+    def clear(self):
+        """Delete the checkpoint (the document is stored)"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
 
 class AzureOpenAIEmbedding:
     """Generate embeddings using Azure OpenAI API"""
@@ -18,7 +152,12 @@ class AzureOpenAIEmbedding:
         endpoint: str = None,
         deployment: str = None,
         api_version: str = None,
-        dimension: int = 3072
+        dimension: int = 3072,
+        max_concurrency: int = None,
+        requests_per_minute: int = None,
+        tokens_per_minute: int = None,
+        max_retries: int = None,
+        cache: EmbeddingCache = None
     ):
         """
         Initialize Azure OpenAI embedding
@@ -29,12 +168,25 @@ class AzureOpenAIEmbedding:
             deployment: Deployment name (e.g., text-embedding-3-large)
             api_version: API version (e.g., 2023-05-15)
             dimension: Embedding dimension (3072 for text-embedding-3-large)
+            max_concurrency: Batch requests in flight at once (default: AZURE_EMBEDDING_CONCURRENCY or 4)
+            requests_per_minute: Deployment RPM quota, 0 = unlimited (default: AZURE_EMBEDDING_RPM)
+            tokens_per_minute: Deployment TPM quota, 0 = unlimited (default: AZURE_EMBEDDING_TPM)
+            max_retries: Retries of a throttled/failed request (default: AZURE_EMBEDDING_MAX_RETRIES or 5)
+            cache: Persistent embedding cache; only texts not in it are sent
         """
         self.api_key = api_key or os.getenv("AZURE_EMBEDDING_API_KEY")
         self.endpoint = endpoint or os.getenv("AZURE_EMBEDDING_ENDPOINT")
         self.deployment = deployment or os.getenv("AZURE_EMBEDDING_DEPLOYMENT", "text-embedding-3-large")
         self.api_version = api_version or os.getenv("AZURE_EMBEDDING_API_VERSION", "2023-05-15")
         self.dimension = dimension
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv("AZURE_EMBEDDING_CONCURRENCY", 4)))
+        self.rate_limiter = RateLimiter(
+            requests_per_minute if requests_per_minute is not None else int(os.getenv("AZURE_EMBEDDING_RPM", 0)),
+            tokens_per_minute if tokens_per_minute is not None else int(os.getenv("AZURE_EMBEDDING_TPM", 0))
+        )
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("AZURE_EMBEDDING_MAX_RETRIES", 5))
+        self.cache = cache
+        self.cache_namespace = f"azure:{self.deployment}:{self.dimension}"
         
         # Validate configuration
         if not self.api_key:
@@ -45,9 +197,53 @@ class AzureOpenAIEmbedding:
             base_url = os.getenv("AZURE_OPENAI_BASE_URL", "https://splace.openai.azure.com")
             self.endpoint = f"{base_url}/openai/deployments/{self.deployment}/embeddings?api-version={self.api_version}"
         
+        # Keep-alive connections, one per batch in flight
+        self.session = requests.Session()
+        self.session.headers.update({
+            "api-key": self.api_key,
+            "Content-Type": "application/json"
+        })
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency))
+        
         print(f"✅ Azure OpenAI Embedding initialized")
         print(f"   Deployment: {self.deployment}")
         print(f"   Dimension: {self.dimension}")
+        print(f"   Concurrency: {self.max_concurrency} batches in flight")
+    
+    def _post(self, texts, timeout: int) -> Dict:
+        """
+        One embeddings request within the rate limit; returns the response JSON
+        
+        429/5xx responses, timeouts and dropped connections are retried up to
+        max_retries times, waiting as long as Retry-After says (a 429 holds back
+        every thread) or else with exponential backoff.
+        """
+        tokens = estimate_tokens(texts if isinstance(texts, list) else [texts])
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(tokens)
+            try:
+                response = self.session.post(self.endpoint, json={"input": texts}, timeout=timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                reason, delay = type(e).__name__, backoff_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                reason = f"HTTP {response.status_code}"
+                delay = retry_after(response)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                if response.status_code == 429:
+                    self.rate_limiter.pause(delay)
+            print(f"⚠️ Azure OpenAI {reason}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+    
+    def close(self):
+        """Close the pooled connections"""
+        self.session.close()
     
     def generate_embedding(self, text: str) -> np.ndarray:
         """
@@ -60,28 +256,10 @@ class AzureOpenAIEmbedding:
             Numpy array of embedding
         """
         try:
-            headers = {
-                "api-key": self.api_key,
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "input": text
-            }
-            
-            response = requests.post(
-                self.endpoint,
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            
-            result = response.json()
+            result = self._post(text, timeout=30)
             embedding = result["data"][0]["embedding"]
             
-            return np.array(embedding)
+            return np.array(embedding, dtype=np.float32)
         
         except requests.exceptions.RequestException as e:
             print(f"❌ Azure OpenAI API error: {e}")
@@ -93,72 +271,87 @@ class AzureOpenAIEmbedding:
             print(f"❌ Error generating embedding: {e}")
             raise
     
-    def generate_embeddings_batch(self, texts: List[str], batch_size: int = 16) -> np.ndarray:
+    def generate_embeddings_batch(self, texts: List[str], batch_size: int = 16,
+                                  checkpoint: EmbeddingCheckpoint = None) -> np.ndarray:
         """
-        Generate embeddings for multiple texts (batched)
+        Generate embeddings for multiple texts (batched, max_concurrency batches in flight)
         
         Args:
             texts: List of texts
             batch_size: Number of texts to process at once (Azure limit: 16)
+            checkpoint: Batches found here are not requested again; each batch
+                received is saved to it as soon as it arrives
             
         Returns:
-            Numpy array of embeddings
+            Numpy array of embeddings, in the order of texts
         """
-        all_embeddings = []
+        return embed_with_cache(self.cache, self.cache_namespace, texts,
+                                lambda novel: self._request_embeddings(novel, batch_size, checkpoint))
+    
+    def _request_embeddings(self, texts: List[str], batch_size: int,
+                            checkpoint: Optional[EmbeddingCheckpoint]) -> np.ndarray:
+        """Embeddings from the API, see generate_embeddings_batch()"""
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        results = [None] * len(batches)
+        if checkpoint is not None:
+            for index, batch in enumerate(batches):
+                results[index] = checkpoint.get(self.deployment, batch)
+            resumed = sum(result is not None for result in results)
+            if resumed:
+                print(f"♻️ Resumed {resumed}/{len(batches)} batches from checkpoint")
+        pending = [index for index, result in enumerate(results) if result is None]
         
-        # Process in batches
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
+        def embed_batch(index: int):
             try:
-                headers = {
-                    "api-key": self.api_key,
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "input": batch
-                }
-                
-                response = requests.post(
-                    self.endpoint,
-                    headers=headers,
-                    json=payload,
-                    timeout=60
-                )
-                
-                response.raise_for_status()
-                
-                result = response.json()
-                
-                # Extract embeddings in order
-                batch_embeddings = [item["embedding"] for item in result["data"]]
-                all_embeddings.extend(batch_embeddings)
-                
-                print(f"   Processed batch {i//batch_size + 1}/{(len(texts)-1)//batch_size + 1}")
-            
+                result = self._post(batches[index], timeout=60)
             except requests.exceptions.RequestException as e:
-                print(f"❌ Azure OpenAI API error in batch {i//batch_size + 1}: {e}")
+                print(f"❌ Azure OpenAI API error in batch {index + 1}: {e}")
                 if hasattr(e, 'response') and e.response is not None:
                     print(f"   Response: {e.response.text}")
                 raise
+            
+            # Extract embeddings in input order
+            results[index] = np.array([item["embedding"] for item in sorted(result["data"], key=lambda item: item["index"])],
+                                      dtype=np.float32)
+            if checkpoint is not None:
+                checkpoint.put(self.deployment, batches[index], results[index])
+            print(f"   Processed batch {index + 1}/{len(batches)}")
+        
+        if self.max_concurrency == 1 or len(pending) <= 1:
+            for index in pending:
+                embed_batch(index)
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(pending))) as pool:
+                futures = [pool.submit(embed_batch, index) for index in pending]
+                try:
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    # Do not send the remaining batches of a failed call
+                    for future in futures:
+                        future.cancel()
+                    raise
         
-        return np.array(all_embeddings)
+        if not results:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.concatenate(results).astype(np.float32, copy=False)
     
-    def embed_chunks(self, chunks: List[Dict]) -> List[Dict]:
+    def embed_chunks(self, chunks: List[Dict], checkpoint: EmbeddingCheckpoint = None) -> List[Dict]:
         """
         Add Azure OpenAI embeddings to chunks
         
         Args:
             chunks: List of chunk dictionaries from TextChunker
+            checkpoint: Resume from / save to this checkpoint, see generate_embeddings_batch()
             
         Returns:
             List of chunks with embeddings added
         """
         texts = [chunk["text"] for chunk in chunks]
-        embeddings = self.generate_embeddings_batch(texts)
+        embeddings = np.ascontiguousarray(self.generate_embeddings_batch(texts, checkpoint=checkpoint),
+                                          dtype=np.float32)
         
         for i, chunk in enumerate(chunks):
-            chunk["embedding"] = embeddings[i].tolist()  # Convert to list for JSON
+            chunk["embedding"] = embeddings[i]  # row view of one float32 matrix
         
         return chunks
@@ -0,0 +1,267 @@
+"""
+Embedding Cache
+Persistent, content-addressed cache of embeddings, keyed by model/deployment
+and dimension (the namespace) and the hash of the normalized text, so
+boilerplate, repeated disclaimers and re-uploaded documents are embedded
+only once.
+
+Layout:
+    <cache_dir>/index.sqlite           namespace + text hash -> row
+    <cache_dir>/<namespace hash>.f32   float32 vectors, one row each (memory-mapped)
+
+Rows are allocated in SQLite transactions and written before they are
+indexed, so several processes can share the cache. The vector files only
+grow: above the size limit new embeddings are no longer cached (clear()
+starts over).
+"""
+
+import os
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Keys per SQLite IN (...) query
+LOOKUP_BATCH = 500
+
+
+def text_key(text: str) -> bytes:
+    """SHA-256 of the text with Unicode normalized (NFC) and whitespace collapsed"""
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.sha256(normalized.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Embeddings by (namespace, normalized text hash): SQLite index + memory-mapped float32 files"""
+
+    def __init__(self, cache_dir: str = None, max_mb: float = 2000):
+        """
+        Initialize cache
+
+        Args:
+            cache_dir: Cache directory (default: ./storage/cache/embeddings)
+            max_mb: Size limit of the vector files; above it nothing new is cached
+        """
+        self.cache_dir = os.path.abspath(cache_dir or os.path.join("storage", "cache", "embeddings"))
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._maps = {}  # namespace -> (file inode, read-only memmap)
+        self._full_warned = False
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(self.cache_dir, "index.sqlite"), timeout=30,
+                                  isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS namespaces (
+                name TEXT PRIMARY KEY,
+                dimension INTEGER NOT NULL,
+                rows INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key BLOB NOT NULL,
+                row INTEGER NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        """)
+
+        print(f"✅ Embedding cache: {self.cache_dir} ({self._size() / 1024 / 1024:.1f}/{max_mb:.0f} MB)")
+
+    # ==================== STORAGE ====================
+
+    def _vectors_path(self, namespace: str) -> str:
+        name = hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{name}.f32")
+
+    def _size(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.cache_dir, name))
+                   for name in os.listdir(self.cache_dir) if name.endswith(".f32"))
+
+    def _dimension(self, namespace: str) -> Optional[int]:
+        row = self.db.execute("SELECT dimension FROM namespaces WHERE name = ?", (namespace,)).fetchone()
+        return row[0] if row else None
+
+    def _read_rows(self, namespace: str, dimension: int, rows: List[int]) -> np.ndarray:
+        """Vectors at the given rows (lock held); remaps when the file has grown or was replaced"""
+        path = self._vectors_path(namespace)
+        inode = os.stat(path).st_ino
+        cached = self._maps.get(namespace)
+        if cached is None or cached[0] != inode or cached[1].shape[0] <= max(rows):
+            mapping = np.memmap(path, dtype=np.float32, mode="r")
+            cached = (inode, mapping[:mapping.shape[0] // dimension * dimension].reshape(-1, dimension))
+            self._maps[namespace] = cached
+        return np.array(cached[1][rows])
+
+    def _allocate(self, namespace: str, dimension: int, count: int) -> Optional[int]:
+        """First of `count` new rows, or None if the namespace has another dimension or the cache is full"""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute("SELECT dimension, rows FROM namespaces WHERE name = ?", (namespace,)).fetchone()
+            if row is None:
+                self.db.execute("INSERT INTO namespaces (name, dimension, rows) VALUES (?, ?, 0)", (namespace, dimension))
+                row = (dimension, 0)
+            if row[0] != dimension or self._size() + count * dimension * 4 > self.max_bytes:
+                self.db.execute("ROLLBACK")
+                return None
+            self.db.execute("UPDATE namespaces SET rows = rows + ? WHERE name = ?", (count, namespace))
+            self.db.execute("COMMIT")
+            return row[1]
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+
+    # ==================== LOOKUP ====================
+
+    def get_many(self, namespace: str, texts: List[str]) -> Tuple[Optional[np.ndarray], List[int]]:
+        """
+        Cached embeddings of texts
+
+        Returns:
+            (float32 matrix with one row per text, filled where cached, or None if
+            the namespace has no entries yet; indices of the texts not cached)
+        """
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            dimension = self._dimension(namespace)
+            if dimension is None:
+                self.misses += len(texts)
+                return None, list(range(len(texts)))
+
+            found = {}
+            unique = list(set(keys))
+            for start in range(0, len(unique), LOOKUP_BATCH):
+                part = unique[start:start + LOOKUP_BATCH]
+                found.update(self.db.execute(
+                    f"SELECT key, row FROM entries WHERE namespace = ? AND key IN ({','.join('?' * len(part))})",
+                    [namespace, *part]
+                ).fetchall())
+
+            vectors = np.zeros((len(texts), dimension), dtype=np.float32)
+            hit_indices = [i for i, key in enumerate(keys) if key in found]
+            if hit_indices:
+                vectors[hit_indices] = self._read_rows(namespace, dimension, [found[keys[i]] for i in hit_indices])
+            self.hits += len(hit_indices)
+            self.misses += len(texts) - len(hit_indices)
+        return vectors, [i for i, key in enumerate(keys) if key not in found]
+
+    def put_many(self, namespace: str, texts: List[str], embeddings: np.ndarray):
+        """Store embeddings of texts (a text repeated in the call is stored once)"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if not len(texts):
+            return
+        first = {}  # key -> index of its first text
+        for i, text in enumerate(texts):
+            first.setdefault(text_key(text), i)
+        keys = list(first)
+        embeddings = embeddings[list(first.values())]
+        dimension = embeddings.shape[1]
+
+        with self._lock:
+            first_row = self._allocate(namespace, dimension, len(keys))
+            if first_row is None:
+                if not self._full_warned:
+                    print(f"⚠️ Embedding cache full or dimension changed for {namespace}, not caching new embeddings")
+                    self._full_warned = True
+                return
+            # Vectors first, index second: a row is never visible before its vector.
+            # Own handle and seek + write (os.pwrite does not exist on Windows)
+            fd = os.open(self._vectors_path(namespace), os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+            with os.fdopen(fd, "r+b") as f:
+                f.seek(first_row * dimension * 4)
+                f.write(embeddings.tobytes())
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.executemany(
+                "INSERT OR IGNORE INTO entries (namespace, key, row) VALUES (?, ?, ?)",
+                [(namespace, key, first_row + i) for i, key in enumerate(keys)]
+            )
+            self.db.execute("COMMIT")
+
+    def clear(self):
+        """Delete every cached embedding"""
+        with self._lock:
+            # Drop the last references to the memmaps first: Windows cannot
+            # delete a file that is still mapped
+            maps, self._maps = self._maps, {}
+            del maps
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute("DELETE FROM entries")
+            self.db.execute("DELETE FROM namespaces")
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".f32"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except PermissionError:
+                        # Still mapped by another process (Windows): the file is
+                        # rewritten from row 0 as the namespace restarts empty
+                        pass
+            self.db.execute("COMMIT")
+            self._full_warned = False
+
+    def stats(self) -> Dict:
+        """Entry counts per namespace, size and hit rate of this process"""
+        with self._lock:
+            namespaces = dict(self.db.execute(
+                "SELECT namespace, COUNT(*) FROM entries GROUP BY namespace"
+            ).fetchall())
+            lookups = self.hits + self.misses
+            return {
+                "namespaces": namespaces,
+                "size_mb": round(self._size() / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+def embed_with_cache(cache: Optional[EmbeddingCache], namespace: str, texts: List[str],
+                     compute: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+    """
+    Embeddings of texts, calling compute() only for texts not cached yet
+
+    Texts repeated within the call (same normalized text) are computed once.
+
+    Args:
+        cache: EmbeddingCache, or None to always compute
+        namespace: Model/deployment and dimension, e.g. "azure:text-embedding-3-large:3072"
+        texts: Texts to embed
+        compute: Embeds a list of texts, returning one row per text
+
+    Returns:
+        float32 matrix, one row per text in order (compute()'s result as is without a cache)
+    """
+    if cache is None or not texts:
+        return compute(texts)
+    vectors, missing = cache.get_many(namespace, texts)
+    if not missing:
+        return vectors
+
+    # One computation per distinct text
+    groups = {}
+    for i in missing:
+        groups.setdefault(text_key(texts[i]), []).append(i)
+    novel = [texts[indices[0]] for indices in groups.values()]
+    fresh = np.asarray(compute(novel), dtype=np.float32)
+    cache.put_many(namespace, novel, fresh)
+
+    if vectors is not None and vectors.shape[1] != fresh.shape[1] and len(missing) < len(texts):
+        # The cached rows have another dimension than the model/deployment now
+        # returns (e.g. a different model behind the same deployment name):
+        # never mix them, embed every text
+        print(f"⚠️ Cached embeddings of {namespace} are {vectors.shape[1]}-dim, model returns "
+              f"{fresh.shape[1]}-dim: not using the cache")
+        return np.asarray(compute(texts), dtype=np.float32)
+    if vectors is None or vectors.shape[1] != fresh.shape[1]:
+        vectors = np.zeros((len(texts), fresh.shape[1]), dtype=np.float32)
+    for row, indices in enumerate(groups.values()):
+        vectors[indices] = fresh[row]
+    return vectors
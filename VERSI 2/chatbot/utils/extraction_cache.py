@@ -0,0 +1,138 @@
+"""
+Extraction Cache
+Content-addressed disk cache for PDF extraction results: whole documents
+keyed by file hash, OCR text keyed by per-page content hash, so duplicate
+uploads and re-indexing skip rendering and Tesseract.
+
+Layout:
+    <cache_dir>/documents/<key[:2]>/<key>.json
+    <cache_dir>/pages/<key[:2]>/<key>.json
+"""
+
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Optional
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(*parts) -> str:
+    """Key for a content hash combined with the settings that produced the result"""
+    return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Disk cache of extracted/OCR text with least-recently-used eviction by size"""
+
+    def __init__(self, cache_dir: str = None, max_mb: float = 500):
+        """
+        Initialize cache
+
+        Args:
+            cache_dir: Cache directory (default: ./storage/cache/extraction)
+            max_mb: Size limit; least recently used entries are deleted above it
+        """
+        self.cache_dir = os.path.abspath(cache_dir or os.path.join("storage", "cache", "extraction"))
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path, _ in self._entries())
+
+        print(f"✅ Extraction cache: {self.cache_dir} ({self._size / 1024 / 1024:.1f}/{max_mb:.0f} MB)")
+
+    # ==================== STORAGE ====================
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.cache_dir, kind, key[:2], f"{key}.json")
+
+    def _entries(self):
+        """(path, last access time) of every cache file"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    yield path, os.path.getmtime(path)
+
+    def _get(self, kind: str, key: str) -> Optional[Dict]:
+        path = self._path(kind, key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mtime doubles as last-access time for eviction
+        except OSError:
+            pass
+        return value
+
+    def _put(self, kind: str, key: str, value: Dict):
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._size += os.path.getsize(path) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries down to 90% of the limit (lock held)"""
+        target = self.max_bytes * 0.9
+        for path, _ in sorted(self._entries(), key=lambda entry: entry[1]):
+            if self._size <= target:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                pass
+
+    # ==================== DOCUMENTS ====================
+
+    def get_document(self, key: str) -> Optional[Dict]:
+        """Cached process_pdf_full() result, or None"""
+        return self._get("documents", key)
+
+    def put_document(self, key: str, result: Dict):
+        """Store a process_pdf_full() result"""
+        self._put("documents", key, result)
+
+    # ==================== PAGES ====================
+
+    def get_page(self, key: str) -> Optional[str]:
+        """Cached OCR text of a page, or None"""
+        entry = self._get("pages", key)
+        return entry["text"] if entry is not None else None
+
+    def put_page(self, key: str, text: str):
+        """Store the OCR text of a page"""
+        self._put("pages", key, {"text": text})
+
+    def stats(self) -> Dict:
+        """Entry counts and size"""
+        counts = {"documents": 0, "pages": 0}
+        for path, _ in self._entries():
+            kind = os.path.basename(os.path.dirname(os.path.dirname(path)))
+            if kind in counts:
+                counts[kind] += 1
+        return {
+            **counts,
+            "size_mb": round(self._size / 1024 / 1024, 2),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 2)
+        }
@@ -0,0 +1,896 @@
+"""
+Document Ingestion
+Extract -> chunk -> embed -> store for one PDF, shared by the synchronous
+upload path and background jobs, plus a job queue that runs ingestion in
+local worker processes and records stage progress in JSON job files.
+
+The four stages run as a pipeline: pages are chunked as soon as they are
+extracted, chunks are embedded in batches while OCR continues, and embedded
+batches are inserted while later ones are embedded. Bounded queues between
+the stages keep memory flat and let a slow stage hold back the faster ones.
+
+API embedding batches are checkpointed per document (content hash) until
+the document is stored, so retrying a document that failed only embeds
+the chunks still missing.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, Callable, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import msvcrt
+except ImportError:  # not Windows
+    msvcrt = None
+    import fcntl
+
+from .pdf_processor import PDFProcessor
+from .extraction_cache import ExtractionCache, file_sha256
+from .azure_embeddings import AzureOpenAIEmbedding, EmbeddingCheckpoint
+
+STAGES = ["extract", "chunk", "embed", "store"]
+# Share of the total work per stage, for overall progress and ETA
+STAGE_WEIGHTS = {"extract": 0.55, "chunk": 0.05, "embed": 0.3, "store": 0.1}
+# Chunks per embed_chunks() call (each batch is also one insert_chunks() call)
+EMBED_BATCH = 64
+# Queue sizes between stages: pages, chunks, embedded batches
+PAGE_QUEUE = 8
+CHUNK_QUEUE = EMBED_BATCH * 2
+STORE_QUEUE = 4
+# Embedding checkpoints of documents never retried are deleted after this many days
+CHECKPOINT_MAX_AGE_DAYS = 7
+
+_END = object()  # end-of-stream marker passed down the queues
+
+
+class IngestionError(Exception):
+    """Ingestion failed in one stage"""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(message)
+        self.stage = stage
+
+
+# ==================== COMPONENTS ====================
+
+def build_pdf_processor(ocr_workers: int = None) -> PDFProcessor:
+    """PDFProcessor configured from .env"""
+    extraction_cache = None
+    if os.getenv("EXTRACTION_CACHE", "true").lower() == "true":
+        extraction_cache = ExtractionCache(
+            cache_dir=os.getenv("EXTRACTION_CACHE_DIR", "./storage/cache/extraction"),
+            max_mb=float(os.getenv("EXTRACTION_CACHE_MB", 500))
+        )
+
+    return PDFProcessor(
+        tesseract_cmd=os.getenv("TESSERACT_CMD", None),
+        lang=os.getenv("OCR_LANG", "eng+ind"),  # English + Indonesian
+        ocr_workers=ocr_workers or int(os.getenv("OCR_WORKERS", 0)) or None,  # 0 = all CPU cores
+        render_batch=int(os.getenv("OCR_RENDER_BATCH", 2)),  # Pages rendered per pdftoppm call
+        ocr_mode=os.getenv("OCR_MODE", "auto"),  # auto = only pages without a usable text layer
+        min_text_chars=int(os.getenv("OCR_MIN_TEXT_CHARS", 50)),
+        cache=extraction_cache,
+        ocr_profile=os.getenv("OCR_PROFILE", "balanced")  # fast, balanced or quality
+    )
+
+
+def build_components(ocr_workers: int = None, connect_db: bool = True) -> Dict:
+    """
+    PDF processor, chunker, embedder and database connection configured from .env
+
+    Args:
+        ocr_workers: OCR processes per document (default: OCR_WORKERS)
+        connect_db: False for workers that only prepare documents (vector_db is None)
+
+    Returns:
+        Dict with pdf_processor, text_chunker, embedder, vector_db
+    """
+    from .text_processor import TextChunker, EmbeddingGenerator
+    from .embedding_cache import EmbeddingCache
+    from models.vector_db import VectorDatabase
+
+    pdf_processor = build_pdf_processor(ocr_workers)
+
+    # Text Chunker
+    chunk_size = int(os.getenv("CHUNK_SIZE", 500))
+    chunk_overlap = int(os.getenv("CHUNK_OVERLAP", 50))
+    text_chunker = TextChunker(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        boundary=os.getenv("CHUNK_BOUNDARY", "page"),  # page = chunks never mix pages
+        unit=os.getenv("CHUNK_UNIT", "chars"),  # tokens = CHUNK_SIZE/CHUNK_OVERLAP in tokens
+        token_model=os.getenv("EMBEDDING_MODEL", "text-embedding-3-large"),
+        max_tokens=int(os.getenv("EMBEDDING_MAX_TOKENS", 0)) or None  # 0 = the model's input limit
+    )
+
+    # Embedding cache: identical texts (boilerplate, re-uploads) are embedded once
+    embedding_cache = None
+    if os.getenv("EMBEDDING_CACHE", "true").lower() == "true":
+        embedding_cache = EmbeddingCache(
+            cache_dir=os.getenv("EMBEDDING_CACHE_DIR"),
+            max_mb=float(os.getenv("EMBEDDING_CACHE_MB", 2000))
+        )
+
+    # Embedder - Check if using Azure OpenAI
+    if os.getenv("USE_AZURE_OPENAI", "False").lower() == "true":
+        print("🔵 Using Azure OpenAI embeddings...")
+        embedder = AzureOpenAIEmbedding(cache=embedding_cache)
+    else:
+        print("🟢 Using Sentence Transformers embeddings...")
+        embedder = EmbeddingGenerator(
+            model_name="all-MiniLM-L6-v2",
+            cache=embedding_cache,
+            backend=os.getenv("EMBEDDING_BACKEND", "torch"),  # onnx-int8 = quantized CPU inference
+            model_dir=os.getenv("EMBEDDING_MODEL_DIR"),
+            threads=int(os.getenv("EMBEDDING_THREADS", 0))
+        )
+
+    # Vector Database
+    vector_db = None
+    if connect_db:
+        vector_dimension = int(os.getenv("VECTOR_DIMENSION", embedder.dimension))
+        vector_db = VectorDatabase(vector_dimension=vector_dimension)
+        if not vector_db.connect():
+            raise Exception("Failed to connect to database")
+
+    return {
+        "pdf_processor": pdf_processor,
+        "text_chunker": text_chunker,
+        "embedder": embedder,
+        "vector_db": vector_db
+    }
+
+
+# ==================== EMBEDDING CHECKPOINTS ====================
+
+def _checkpoint_root() -> str:
+    return os.path.abspath(os.path.join(os.getenv("JOBS_DIR", os.path.join("storage", "jobs")), "embeddings"))
+
+
+def embedding_checkpoint(content_hash: str) -> EmbeddingCheckpoint:
+    """Checkpoint of one document's embedding batches (JOBS_DIR/embeddings/<content hash>)"""
+    return EmbeddingCheckpoint(os.path.join(_checkpoint_root(), content_hash))
+
+
+def prune_checkpoints(max_age_days: float = CHECKPOINT_MAX_AGE_DAYS):
+    """Delete the checkpoints of documents not retried within max_age_days"""
+    root = _checkpoint_root()
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - max_age_days * 86400
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                EmbeddingCheckpoint(path).clear()
+        except OSError:
+            pass
+
+
+def _embed(embedder, chunks: List[Dict], checkpoint: EmbeddingCheckpoint) -> List[Dict]:
+    """embed_chunks(), resuming from the checkpoint with embedders billed per request"""
+    if isinstance(embedder, AzureOpenAIEmbedding):
+        return embedder.embed_chunks(chunks, checkpoint=checkpoint)
+    return embedder.embed_chunks(chunks)
+
+
+# ==================== PIPELINE ====================
+
+class _Cancelled(BaseException):
+    """Unwinds a stage after another stage failed (not an error of its own, so
+    it passes through the except Exception handlers of the code it runs)"""
+
+
+class _Pipeline:
+    """Stage threads joined by bounded queues; the first failure stops every stage"""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.error = None  # (stage, exception) of the first failure
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def put(self, q: queue.Queue, item):
+        """Blocking put that gives up when the pipeline is cancelled"""
+        while not self.cancelled.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+        raise _Cancelled()
+
+    def items(self, q: queue.Queue):
+        """Items of a queue up to the end marker"""
+        while True:
+            try:
+                item = q.get(timeout=0.2)
+            except queue.Empty:
+                if self.cancelled.is_set():
+                    raise _Cancelled()
+                continue
+            if item is _END:
+                return
+            yield item
+
+    def start(self, stage: str, target: Callable):
+        def run():
+            try:
+                target()
+            except _Cancelled:
+                pass
+            except Exception as e:
+                print(f"❌ Error in {stage} stage: {e}")
+                with self._lock:
+                    if self.error is None:
+                        self.error = (stage, e)
+                self.cancelled.set()
+
+        thread = threading.Thread(target=run, name=f"ingest-{stage}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+
+# ==================== INGESTION ====================
+
+def ingest_document(filepath: str, filename: str, components: Dict, content_hash: str = None,
+                    skip_ocr: bool = None, progress: Callable = None) -> Dict:
+    """
+    Extract, chunk, embed and store one PDF (stages run concurrently)
+
+    The document and its chunks are written in one transaction, so a failure
+    in any stage leaves nothing in the database; the uploaded file is removed.
+    Embedding batches already received are kept, see embedding_checkpoint().
+
+    Args:
+        filepath: Saved PDF path
+        filename: Original (secured) filename
+        components: Dict from build_components()
+        content_hash: SHA-256 of the file, if already computed
+        skip_ocr: Native text only (default: SKIP_OCR env)
+        progress: Called as progress(stage, done, total) from the stage threads;
+            total is None or an estimate until the upstream stage finishes,
+            and done == total marks the stage finished (optional)
+
+    Returns:
+        Dict with document_id, filename, file_size, total_chunks, metadata
+        (or duplicate=True and the existing document_id)
+
+    Raises:
+        IngestionError: With the failing stage
+    """
+    progress = progress or (lambda stage, done=0, total=None: None)
+    pdf_processor = components["pdf_processor"]
+    vector_db = components["vector_db"]
+    if skip_ocr is None:
+        skip_ocr = os.getenv("SKIP_OCR", "false").lower() == "true"
+
+    file_size = os.path.getsize(filepath)
+    content_hash = content_hash or file_sha256(filepath)
+
+    # Same content indexed meanwhile (e.g. two uploads of one file in the queue)
+    existing = vector_db.find_document_by_hash(content_hash)
+    if existing:
+        if os.path.abspath(existing["filepath"] or "") != os.path.abspath(filepath):
+            os.remove(filepath)
+        return {
+            "duplicate": True,
+            "document_id": existing["id"],
+            "filename": filename,
+            "existing_filename": existing["filename"],
+            "file_size": file_size,
+            "total_chunks": existing["total_chunks"]
+        }
+
+    start_time = time.time()
+    checkpoint = embedding_checkpoint(content_hash)
+    pipeline = _Pipeline()
+    page_queue = queue.Queue(PAGE_QUEUE)
+    chunk_queue = queue.Queue(CHUNK_QUEUE)
+    store_queue = queue.Queue(STORE_QUEUE)
+    state = {"num_pages": None, "pages_chunked": 0, "chunks": 0, "chunking_done": False,
+             "pdf_result": None, "doc_id": None, "committed": False, "stored": 0}
+
+    def expected_chunks(done: int) -> Optional[int]:
+        """Chunks so far, extrapolated over the pages not chunked yet"""
+        if state["chunking_done"]:
+            return state["chunks"]
+        if not state["pages_chunked"] or not state["num_pages"]:
+            return None
+        return max(round(state["chunks"] * state["num_pages"] / state["pages_chunked"]), done + 1)
+
+    def extract():
+        released = 0
+
+        def on_page(page: Dict, num_pages: int):
+            nonlocal released
+            state["num_pages"] = num_pages
+            pipeline.put(page_queue, page)
+            released += 1
+            progress("extract", released, num_pages)
+
+        progress("extract", 0, None)
+        state["pdf_result"] = pdf_processor.process_pdf_full(
+            filepath, skip_ocr=skip_ocr, content_hash=content_hash, on_page=on_page
+        )
+        state["num_pages"] = len(state["pdf_result"]["pages"])
+        if not state["num_pages"]:
+            progress("extract", 0, 0)
+        pipeline.put(page_queue, _END)
+
+    def chunk():
+        def page_stream():
+            for page in pipeline.items(page_queue):
+                yield page
+                state["pages_chunked"] += 1
+                progress("chunk", state["pages_chunked"], state["num_pages"])
+
+        for chunk_dict in components["text_chunker"].chunk_pages(page_stream(), metadata={"filename": filename}):
+            state["chunks"] += 1
+            pipeline.put(chunk_queue, chunk_dict)
+        state["chunking_done"] = True
+        progress("chunk", state["pages_chunked"], state["pages_chunked"])
+        pipeline.put(chunk_queue, _END)
+
+    def embed():
+        batch = []
+        done = 0
+        for chunk_dict in pipeline.items(chunk_queue):
+            batch.append(chunk_dict)
+            if len(batch) >= EMBED_BATCH:
+                pipeline.put(store_queue, _embed(components["embedder"], batch, checkpoint))
+                done += len(batch)
+                batch = []
+                progress("embed", done, expected_chunks(done))
+        if batch:
+            pipeline.put(store_queue, _embed(components["embedder"], batch, checkpoint))
+            done += len(batch)
+        progress("embed", done, done)
+        pipeline.put(store_queue, _END)
+
+    def store():
+        # One transaction: the document and its chunks appear together on commit
+        doc_id = vector_db.insert_document(
+            filename=filename,
+            filepath=filepath,
+            file_size=file_size,
+            total_chunks=0,
+            metadata={"content_hash": content_hash},
+            commit=False
+        )
+        if doc_id is None:
+            raise Exception("Failed to insert document")
+        state["doc_id"] = doc_id
+
+        for batch in pipeline.items(store_queue):
+            if not vector_db.insert_chunks(doc_id, batch, commit=False):
+                raise Exception("Failed to insert chunks")
+            state["stored"] += len(batch)
+            progress("store", state["stored"], expected_chunks(state["stored"]))
+
+        pdf_result = state["pdf_result"]
+        if not vector_db.finalize_document(doc_id, state["stored"],
+                                           metadata=_document_metadata(pdf_result, content_hash),
+                                           full_text=pdf_result["combined_text"],
+                                           chunk_metadata={"num_images": pdf_result["num_images"]}):
+            raise Exception("Failed to commit document")
+        state["committed"] = True
+        progress("store", state["stored"], state["stored"])
+
+    for stage, target in (("extract", extract), ("chunk", chunk), ("embed", embed), ("store", store)):
+        pipeline.start(stage, target)
+    pipeline.join()
+
+    if pipeline.error:
+        stage, error = pipeline.error
+        if state["doc_id"] is not None and not state["committed"]:
+            vector_db.rollback()
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        raise IngestionError(stage, str(error)) from error
+    checkpoint.clear()
+
+    doc_id = state["doc_id"]
+    pdf_result = state["pdf_result"]
+    print(f"   Pipeline: {state['num_pages']} pages -> {state['stored']} chunks "
+          f"in {time.time() - start_time:.1f}s")
+
+    return {
+        "document_id": doc_id,
+        "filename": filename,
+        "file_size": file_size,
+        "total_chunks": state["stored"],
+        "metadata": _result_metadata(pdf_result)
+    }
+
+
+def _document_metadata(pdf_result: Dict, content_hash: str) -> Dict:
+    """metadata column of the documents row"""
+    return {
+        "num_images": pdf_result["num_images"],
+        "text_length": len(pdf_result["full_text"]),
+        "ocr_text_length": len(pdf_result.get("ocr_text", "")),
+        "ocr_pages": pdf_result.get("ocr_pages", []),
+        "content_hash": content_hash
+    }
+
+
+def _result_metadata(pdf_result: Dict) -> Dict:
+    """Extraction stats returned to the client"""
+    return {
+        "num_images": pdf_result["num_images"],
+        "text_length": len(pdf_result["full_text"]),
+        "ocr_text_length": len(pdf_result.get("ocr_text", "")),
+        "num_pages": len(pdf_result.get("pages", [])),
+        "ocr_pages": pdf_result.get("ocr_pages", []),
+        "cached_pages": pdf_result.get("cached_pages", []),
+        "extraction_cache_hit": pdf_result.get("cache_hit", False),
+        "ocr_seconds": pdf_result.get("ocr_seconds", 0.0),
+        "page_timings": pdf_result.get("page_timings", [])
+    }
+
+
+# ==================== BULK ====================
+
+def prepare_document(filepath: str, filename: str, components: Dict, content_hash: str = None,
+                     skip_ocr: bool = None) -> Dict:
+    """
+    Extract, chunk and embed one PDF without touching the database
+
+    Used by bulk ingestion, which stores many prepared documents per
+    transaction with store_documents(). The file is never removed; embedding
+    batches are checkpointed until store_documents() commits the document.
+
+    Returns:
+        Dict with filename, filepath, file_size, content_hash, full_text,
+        metadata, chunks (with embeddings) and result_metadata
+
+    Raises:
+        IngestionError: With the failing stage
+    """
+    if skip_ocr is None:
+        skip_ocr = os.getenv("SKIP_OCR", "false").lower() == "true"
+    content_hash = content_hash or file_sha256(filepath)
+
+    stage = "extract"
+    try:
+        pdf_result = components["pdf_processor"].process_pdf_full(
+            filepath, skip_ocr=skip_ocr, content_hash=content_hash
+        )
+
+        stage = "chunk"
+        chunks = list(components["text_chunker"].chunk_pages(
+            pdf_result["pages"],
+            metadata={"filename": filename, "num_images": pdf_result["num_images"]}
+        ))
+
+        stage = "embed"
+        # One call: the embedder keeps its own batches in flight
+        embedded = _embed(components["embedder"], chunks, embedding_checkpoint(content_hash)) if chunks else []
+    except Exception as e:
+        print(f"❌ Error in {stage} stage: {e}")
+        raise IngestionError(stage, str(e)) from e
+
+    return {
+        "filename": filename,
+        "filepath": filepath,
+        "file_size": os.path.getsize(filepath),
+        "content_hash": content_hash,
+        "full_text": pdf_result["combined_text"],
+        "metadata": _document_metadata(pdf_result, content_hash),
+        "chunks": embedded,
+        "result_metadata": _result_metadata(pdf_result)
+    }
+
+
+def store_documents(vector_db, prepared: List[Dict]) -> List[int]:
+    """
+    Insert prepared documents and their chunks in one transaction
+
+    Args:
+        vector_db: Connected VectorDatabase
+        prepared: Results of prepare_document()
+
+    Returns:
+        Document IDs, in the order of prepared
+
+    Raises:
+        IngestionError: Nothing of the batch was stored
+    """
+    doc_ids = []
+    for doc in prepared:
+        doc_id = vector_db.insert_document(
+            filename=doc["filename"],
+            filepath=doc["filepath"],
+            file_size=doc["file_size"],
+            total_chunks=len(doc["chunks"]),
+            metadata=doc["metadata"],
+            full_text=doc["full_text"],
+            commit=False
+        )
+        # insert_document/insert_chunks roll the whole transaction back on error
+        if doc_id is None:
+            raise IngestionError("store", f"Failed to insert document {doc['filename']}")
+        if doc["chunks"] and not vector_db.insert_chunks(doc_id, doc["chunks"], commit=False):
+            raise IngestionError("store", f"Failed to insert chunks of {doc['filename']}")
+        doc_ids.append(doc_id)
+
+    if not vector_db.commit():
+        raise IngestionError("store", "Failed to commit batch")
+    for doc in prepared:
+        embedding_checkpoint(doc["content_hash"]).clear()
+    return doc_ids
+
+
+# ==================== JOBS ====================
+
+def _try_lock(f) -> bool:
+    """Non-blocking exclusive lock on an open file (released by the OS when the process exits)"""
+    try:
+        if msvcrt:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f):
+    if msvcrt:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class JobStore:
+    """
+    Ingestion job records as JSON files, readable from any process
+
+    Each job records its owner, the server process that queued it. An
+    owner holds a lock on owners/<owner>.lock while it lives, so another
+    API worker starting up can tell its jobs from those of a dead process.
+    """
+
+    def __init__(self, jobs_dir: str = None):
+        """
+        Initialize job store
+
+        Args:
+            jobs_dir: Directory for job files (default: ./storage/jobs)
+        """
+        self.jobs_dir = os.path.abspath(jobs_dir or os.path.join("storage", "jobs"))
+        self.owners_dir = os.path.join(self.jobs_dir, "owners")
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._owner = None  # (owner id, held lock file, pid) of this process
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _write(self, job: Dict):
+        tmp_path = f"{self._path(job['job_id'])}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2, default=str)
+        os.replace(tmp_path, self._path(job["job_id"]))
+
+    def owner_id(self) -> str:
+        """Owner id of this process (pid + random suffix, so a reused pid is a new owner)"""
+        if self._owner is None or self._owner[2] != os.getpid():
+            os.makedirs(self.owners_dir, exist_ok=True)
+            owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            lock_file = open(os.path.join(self.owners_dir, f"{owner}.lock"), "a+b")
+            _try_lock(lock_file)
+            self._owner = (owner, lock_file, os.getpid())
+        return self._owner[0]
+
+    def owner_alive(self, owner: Optional[str]) -> bool:
+        """Whether the process that queued a job is still running (False for jobs without owner)"""
+        if not owner:
+            return False
+        if self._owner is not None and owner == self._owner[0]:
+            return True
+        path = os.path.join(self.owners_dir, f"{owner}.lock")
+        try:
+            lock_file = open(path, "r+b")
+        except OSError:
+            return False
+        with lock_file:
+            if not _try_lock(lock_file):
+                return True
+            _unlock(lock_file)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return False
+
+    def create(self, filename: str, filepath: str) -> Dict:
+        """New queued job, owned by this process"""
+        job = {
+            "job_id": uuid.uuid4().hex[:12],
+            "owner": self.owner_id(),
+            "filename": filename,
+            "filepath": filepath,
+            "status": "queued",
+            "stage": None,
+            "progress": 0.0,
+            "eta_seconds": None,
+            "stages": {},
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        self._write(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job record, or None"""
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def update(self, job_id: str, **fields) -> Dict:
+        """Merge fields into a job record"""
+        job = self.get(job_id) or {"job_id": job_id}
+        job.update(fields)
+        self._write(job)
+        return job
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first"""
+        names = [n for n in os.listdir(self.jobs_dir) if n.endswith(".json")]
+        names.sort(key=lambda n: os.path.getmtime(os.path.join(self.jobs_dir, n)), reverse=True)
+        jobs = [self.get(n[:-len(".json")]) for n in names[:limit]]
+        return [job for job in jobs if job]
+
+    def mark_interrupted(self):
+        """Fail jobs left queued/running by server processes that are gone (other workers' jobs are kept)"""
+        for name in os.listdir(self.jobs_dir):
+            if name.endswith(".json"):
+                job = self.get(name[:-len(".json")])
+                if not job or job.get("status") not in ("queued", "running"):
+                    continue
+                if not self.owner_alive(job.get("owner")):
+                    self.update(job["job_id"], status="failed", error="Interrupted by server restart",
+                                finished_at=datetime.now().isoformat(timespec="seconds"))
+
+
+class JobProgress:
+    """progress(stage, done, total) callback that records stage progress and ETA in a job file"""
+
+    def __init__(self, job_store: JobStore, job_id: str, min_interval: float = 0.5):
+        self.job_store = job_store
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self.started = time.time()
+        self.stages = {}
+        self._last_write = 0.0
+        self._lock = threading.Lock()  # stages report from their own threads
+
+    def overall(self) -> float:
+        """Weighted fraction of the whole job done"""
+        total = 0.0
+        for name, stage in self.stages.items():
+            if stage["status"] == "done":
+                total += STAGE_WEIGHTS[name]
+            elif stage["total"]:
+                total += STAGE_WEIGHTS[name] * min(stage["done"] / stage["total"], 1.0)
+        return min(total, 1.0)
+
+    def current_stage(self) -> Optional[str]:
+        """Earliest stage still running (the one holding the pipeline back)"""
+        for name in STAGES:
+            if self.stages.get(name, {}).get("status") == "running":
+                return name
+        return None
+
+    def __call__(self, stage: str, done: int = 0, total: int = None):
+        with self._lock:
+            now = time.time()
+            info = self.stages.get(stage)
+            changed = info is None
+            if changed:
+                info = self.stages[stage] = {"status": "running", "done": 0, "total": None,
+                                             "seconds": None, "_start": now}
+            info["done"] = done
+            info["total"] = total
+            if info["status"] == "running" and total is not None and done >= total:
+                info["status"] = "done"
+                info["seconds"] = round(now - info.pop("_start"), 2)
+                changed = True
+
+            if not changed and now - self._last_write < self.min_interval:
+                return
+            self._last_write = now
+
+            progress = self.overall()
+            elapsed = now - self.started
+            eta = round(elapsed * (1 - progress) / progress, 1) if progress >= 0.02 else None
+            self.job_store.update(
+                self.job_id,
+                stage=self.current_stage(),
+                progress=round(progress, 3),
+                eta_seconds=eta,
+                stages=self.public_stages()
+            )
+
+    def public_stages(self) -> Dict:
+        return {
+            name: {k: v for k, v in stage.items() if not k.startswith("_")}
+            for name, stage in self.stages.items()
+        }
+
+    def finish(self, status: str = "done"):
+        """Close the stages still running (status 'failed' after an error)"""
+        with self._lock:
+            now = time.time()
+            for stage in self.stages.values():
+                if stage["status"] == "running":
+                    stage["status"] = status
+                    stage["seconds"] = round(now - stage.pop("_start"), 2)
+
+
+# Components of this worker process (built once by _init_worker)
+_worker_components = None
+_worker_error = None
+
+
+def _init_worker(ocr_workers: int, connect_db: bool = True):
+    """Process pool initializer: one set of components (model, DB connection) per worker"""
+    global _worker_components, _worker_error
+    try:
+        _worker_components = build_components(ocr_workers, connect_db=connect_db)
+    except Exception as e:
+        _worker_error = str(e)
+        print(f"❌ Ingestion worker failed to initialize: {e}")
+
+
+def _run_job(jobs_dir: str, job_id: str, filepath: str, filename: str, content_hash: str = None):
+    """Run one ingestion job in a worker process"""
+    job_store = JobStore(jobs_dir)
+    if _worker_components is None:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        job_store.update(job_id, status="failed", error=f"Worker not initialized: {_worker_error}",
+                         finished_at=datetime.now().isoformat(timespec="seconds"))
+        return
+
+    job_store.update(job_id, status="running", started_at=datetime.now().isoformat(timespec="seconds"))
+    progress = JobProgress(job_store, job_id)
+    try:
+        result = ingest_document(filepath, filename, _worker_components,
+                                 content_hash=content_hash, progress=progress)
+    except IngestionError as e:
+        progress.finish("failed")
+        job_store.update(job_id, status="failed", stage=e.stage, error=str(e), eta_seconds=None,
+                         stages=progress.public_stages(),
+                         finished_at=datetime.now().isoformat(timespec="seconds"))
+        return
+
+    progress.finish()
+    job_store.update(job_id, status="done", stage=None, progress=1.0, eta_seconds=0,
+                     stages=progress.public_stages(), result=result,
+                     finished_at=datetime.now().isoformat(timespec="seconds"))
+    print(f"✅ Job {job_id} done: {filename} -> document {result['document_id']}")
+
+
+def _prepare_task(filepath: str, filename: str, content_hash: str, skip_ocr: bool = None) -> Dict:
+    """Run prepare_document() in a bulk worker process (errors are returned, not raised)"""
+    if _worker_components is None:
+        return {"error": f"Worker not initialized: {_worker_error}", "stage": "extract"}
+    start = time.time()
+    try:
+        document = prepare_document(filepath, filename, _worker_components,
+                                    content_hash=content_hash, skip_ocr=skip_ocr)
+    except IngestionError as e:
+        return {"error": str(e), "stage": e.stage}
+    return {"document": document, "seconds": round(time.time() - start, 2)}
+
+
+class IngestionQueue:
+    """Background ingestion in a pool of local worker processes"""
+
+    def __init__(self, job_store: JobStore, concurrency: int = 2, ocr_workers: int = None):
+        """
+        Initialize queue (worker processes start on the first submit)
+
+        Args:
+            job_store: Where job progress is recorded
+            concurrency: Documents ingested at the same time
+            ocr_workers: OCR processes per document (default: CPU cores / concurrency)
+        """
+        self.job_store = job_store
+        self.concurrency = max(1, concurrency)
+        self.ocr_workers = ocr_workers or max(1, (os.cpu_count() or 1) // self.concurrency)
+        self._pool = None
+        self._lock = threading.Lock()
+
+        self.job_store.mark_interrupted()
+        prune_checkpoints()
+        print(f"✅ Ingestion queue: {self.concurrency} concurrent documents, "
+              f"{self.ocr_workers} OCR workers each")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.concurrency,
+                    initializer=_init_worker,
+                    initargs=(self.ocr_workers,)
+                )
+            return self._pool
+
+    def submit(self, filepath: str, filename: str, content_hash: str = None) -> Dict:
+        """
+        Queue a saved PDF for ingestion
+
+        Returns:
+            The new job record (status 'queued')
+        """
+        job = self.job_store.create(filename=filename, filepath=filepath)
+        future = self._get_pool().submit(
+            _run_job, self.job_store.jobs_dir, job["job_id"], filepath, filename, content_hash
+        )
+        future.add_done_callback(lambda f, job_id=job["job_id"]: self._on_done(job_id, f))
+        return job
+
+    def _on_done(self, job_id: str, future):
+        # A crashed worker process (e.g. out of memory) never updates its job itself
+        error = future.exception()
+        if error is not None:
+            print(f"❌ Job {job_id} crashed: {error}")
+            self.job_store.update(job_id, status="failed", error=f"Worker crashed: {error}",
+                                  finished_at=datetime.now().isoformat(timespec="seconds"))
+            with self._lock:
+                self._pool = None  # a broken pool cannot take new jobs
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
+
+
+class BulkPreparer:
+    """Pool of worker processes running prepare_document() for bulk ingestion"""
+
+    def __init__(self, workers: int = None, ocr_workers: int = 1):
+        """
+        Initialize pool
+
+        Args:
+            workers: Documents prepared at the same time (default: CPU cores)
+            ocr_workers: OCR processes per document (1 = OCR inside the document worker)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.ocr_workers = ocr_workers
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(ocr_workers, False)
+        )
+
+    def submit(self, filepath: str, filename: str, content_hash: str, skip_ocr: bool = None):
+        """
+        Queue a PDF; the future's result is {"document", "seconds"} or {"error", "stage"}
+        """
+        return self._pool.submit(_prepare_task, filepath, filename, content_hash, skip_ocr)
+
+    def shutdown(self, cancel: bool = False):
+        self._pool.shutdown(wait=True, cancel_futures=cancel)
@@ -0,0 +1,210 @@
+"""
+ONNX Embeddings
+CPU inference of a sentence-transformers model with ONNX Runtime: the
+transformer is exported to ONNX once, optionally with its weights
+quantized to int8 (dynamic quantization), and pooling/normalization are
+done in NumPy. Check speed and cosine parity with the fp32 PyTorch model
+with benchmark_local_embeddings.py.
+
+Layout (<model_dir>/<model name>/):
+    model.onnx          fp32 export
+    model_int8.onnx     dynamically quantized copy
+    tokenizer.json      fast tokenizer
+    export.json         pooling, normalization, max_seq_length, padding
+"""
+
+import os
+import json
+import shutil
+import inspect
+from typing import List, Union
+
+import numpy as np
+
+# Pooling config flags of sentence_transformers.models.Pooling -> mode done in NumPy
+POOLING_MODES = {"pooling_mode_mean_tokens": "mean", "pooling_mode_cls_token": "cls", "pooling_mode_max_tokens": "max"}
+ONNX_OPSET = 14
+
+
+def model_path(model_dir: str, model_name: str) -> str:
+    """Export directory of a model (slashes of hub names replaced)"""
+    return os.path.join(model_dir, model_name.replace("/", "__"))
+
+
+def export_onnx(model_name: str, directory: str, quantize: bool = True) -> str:
+    """
+    Export a sentence-transformers model to ONNX (needs torch and onnx)
+
+    Args:
+        model_name: Sentence transformer model name or path
+        directory: Export directory (created)
+        quantize: Also write the int8 model_int8.onnx
+
+    Returns:
+        directory
+
+    Raises:
+        ValueError: The model has modules other than Transformer, Pooling and Normalize
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    pooling = next((module for module in model if isinstance(module, models.Pooling)), None)
+    unsupported = [type(module).__name__ for module in model
+                   if not isinstance(module, (models.Transformer, models.Pooling, models.Normalize))]
+    if not isinstance(transformer, models.Transformer) or pooling is None or unsupported:
+        raise ValueError(f"ONNX export supports Transformer + Pooling (+ Normalize) models, got {unsupported}")
+
+    active = [key for key, value in pooling.get_config_dict().items() if key.startswith("pooling_mode_") and value is True]
+    if len(active) != 1 or active[0] not in POOLING_MODES:
+        raise ValueError(f"Unsupported pooling for ONNX export: {active}")
+
+    os.makedirs(directory, exist_ok=True)
+    tokenizer = transformer.tokenizer
+    tokenizer.save_pretrained(directory)  # tokenizer.json (fast tokenizer)
+    if not os.path.exists(os.path.join(directory, "tokenizer.json")):
+        raise ValueError(f"{model_name} has no fast tokenizer (tokenizer.json)")
+
+    sample = tokenizer(["ONNX export"], return_tensors="pt")
+    input_names = list(sample.keys())
+
+    class Encoder(torch.nn.Module):
+        """auto_model with positional inputs, returning the token embeddings"""
+
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs)), return_dict=False)[0]
+
+    options = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        options["dynamo"] = False  # TorchScript exporter: dynamic axes, no onnxscript needed
+    fp32_path = os.path.join(directory, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            Encoder(transformer.auto_model.eval()),
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["token_embeddings"]},
+            opset_version=ONNX_OPSET,
+            **options
+        )
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, os.path.join(directory, "model_int8.onnx"),
+                         weight_type=QuantType.QInt8, per_channel=True)
+
+    with open(os.path.join(directory, "export.json"), "w") as f:
+        json.dump({
+            "model_name": model_name,
+            "dimension": model.get_sentence_embedding_dimension(),
+            "pooling": POOLING_MODES[active[0]],
+            "normalize": any(isinstance(module, models.Normalize) for module in model),
+            "max_seq_length": model.get_max_seq_length(),
+            "do_lower_case": bool(getattr(transformer, "do_lower_case", False)),
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id
+        }, f, indent=2)
+    return directory
+
+
+class ONNXSentenceEncoder:
+    """Sentence embeddings from an exported model with ONNX Runtime (encode() like SentenceTransformer)"""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", model_dir: str = None,
+                 quantized: bool = True, threads: int = 0):
+        """
+        Load the exported model, exporting it first if needed
+
+        Args:
+            model_name: Sentence transformer model name
+            model_dir: Directory of exports (default: ./storage/models)
+            quantized: Use the int8 model instead of the fp32 export
+            threads: ONNX Runtime intra-op threads (0 = one per physical core)
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.directory = model_path(os.path.abspath(model_dir or os.path.join("storage", "models")), model_name)
+        if not os.path.exists(os.path.join(self.directory, "export.json")):
+            print(f"🔧 Exporting {model_name} to ONNX (fp32 + int8): {self.directory}")
+            # Exported beside the final directory and renamed, so that workers
+            # starting together never load half an export
+            tmp_dir = f"{self.directory}.{os.getpid()}.tmp"
+            export_onnx(model_name, tmp_dir)
+            try:
+                os.rename(tmp_dir, self.directory)
+            except OSError:  # exported meanwhile by another process
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        with open(os.path.join(self.directory, "export.json")) as f:
+            self.config = json.load(f)
+        self.quantized = quantized
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.directory, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"] or 0,
+                                      pad_token=self.config["pad_token"] or "[PAD]")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        model_file = os.path.join(self.directory, "model_int8.onnx" if quantized else "model.onnx")
+        self.session = onnxruntime.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        if self.config["do_lower_case"]:
+            texts = [text.lower() for text in texts]
+        encodings = self.tokenizer.encode_batch(texts)
+        mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        }
+        tokens = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+
+        pooling = self.config["pooling"]
+        if pooling == "cls":
+            embeddings = tokens[:, 0]
+        elif pooling == "max":
+            embeddings = np.where(mask[:, :, None] > 0, tokens, -1e9).max(axis=1)
+        else:
+            summed = (tokens * mask[:, :, None]).sum(axis=1)
+            embeddings = summed / np.clip(mask.sum(axis=1, keepdims=True), 1e-9, None)
+        if self.config["normalize"]:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32, copy=False)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """
+        Embeddings of the sentences (texts of similar length are batched together)
+
+        Returns:
+            float32 matrix, one row per sentence (a vector for a single string)
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.config["dimension"]), dtype=np.float32)
+        order = np.argsort([-len(text) for text in texts], kind="stable")  # less padding per batch
+
+        starts = range(0, len(texts), batch_size)
+        if show_progress_bar:
+            from tqdm import tqdm
+            starts = tqdm(starts, desc="Batches")
+        for start in starts:
+            indices = order[start:start + batch_size]
+            embeddings[indices] = self._encode_batch([texts[i] for i in indices])
+        return embeddings[0] if single else embeddings
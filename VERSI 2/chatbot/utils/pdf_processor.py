@@ -5,8 +5,11 @@ Extract text and images/tables from PDF using OCR
 
 import os
 import io
-from typing import List, Dict, Tuple
+import time
+import hashlib
+from typing import List, Dict, Tuple, Iterable, Iterator, Union, Callable
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import base64
 
 from PIL import Image
@@ -16,18 +19,189 @@ import pytesseract
 import cv2
 import numpy as np
 
+from .extraction_cache import ExtractionCache, file_sha256, cache_key
+
+# Bump when rendering/preprocessing changes so cached OCR text is not reused
+OCR_CACHE_VERSION = 2
+
+# OCR preprocessing profiles:
+#   dpi: render resolution; max_pixels: larger renders (A3, posters) are downscaled
+#   denoise: filter for noisy pages (None = never), applied only when the
+#   estimated noise sigma exceeds noise_threshold; binarize: Otsu threshold
+#   (Tesseract binarizes internally, so 'fast' leaves it to Tesseract)
+PREPROCESS_PROFILES = {
+    "fast": {"dpi": 200, "max_pixels": 4_000_000, "denoise": None, "noise_threshold": None, "binarize": False},
+    "balanced": {"dpi": 300, "max_pixels": 9_000_000, "denoise": "median", "noise_threshold": 5.0, "binarize": True},
+    "quality": {"dpi": 300, "max_pixels": None, "denoise": "nlmeans", "noise_threshold": 2.0, "binarize": True}
+}
+
+# Second-derivative kernel for the noise estimate (its output std is 6x the pixel noise)
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+# Page text layers with fewer non-whitespace chars than this are OCR'd (ocr_mode 'auto')
+MIN_TEXT_CHARS = 50
+# Share of letters/digits/punctuation below which a text layer counts as garbled
+MIN_TEXT_QUALITY = 0.6
+OCR_MODES = ["auto", "all"]
+
+
+def join_pages(pages: Iterable[Dict], key: str = "text") -> str:
+    """Per-page texts as one string with '--- Page N ---' headers, built with a single join"""
+    return "".join(f"\n--- Page {p['page']} ---\n{p[key]}\n" for p in pages).strip()
+
+
+def _count_page_images(page) -> int:
+    """Number of image XObjects on a PDF page (read from the resources, nothing decoded)"""
+    try:
+        resources = page.get("/Resources")
+        resources = resources.get_object() if resources is not None else {}
+        xobjects = resources.get("/XObject")
+        if xobjects is None:
+            return 0
+        return sum(
+            1 for xobj in xobjects.get_object().values()
+            if xobj.get_object().get("/Subtype") == "/Image"
+        )
+    except Exception:
+        return 0
+
+
+def _page_content_hash(page) -> str:
+    """SHA-256 of what a page renders from: size, rotation, content stream and XObject data"""
+    try:
+        digest = hashlib.sha256()
+        digest.update(f"{list(page.mediabox)}|{page.get('/Rotate', 0)}".encode())
+        contents = page.get_contents()
+        if contents is not None:
+            digest.update(contents.get_data())
+        resources = page.get("/Resources")
+        xobjects = resources.get_object().get("/XObject") if resources is not None else None
+        if xobjects is not None:
+            for name, xobj in sorted(xobjects.get_object().items()):
+                digest.update(name.encode())
+                digest.update(xobj.get_object().get_data())
+        return digest.hexdigest()
+    except Exception:
+        return None
+
+
+def estimate_noise(gray: np.ndarray) -> float:
+    """
+    Estimate the pixel noise sigma of a grayscale page
+    
+    Median of the absolute second-derivative response: flat background
+    dominates the median, so text edges do not count as noise. Clean PDF
+    renders score ~0, scans typically 2-10.
+    """
+    response = cv2.filter2D(gray, cv2.CV_32F, _NOISE_KERNEL)[1:-1:3, 1:-1:3]
+    return float(1.4826 * np.median(np.abs(response)) / 6)
+
+
+def _text_quality(text: str) -> float:
+    """Share of readable characters in a text layer (broken font encodings score low)"""
+    chars = [ch for ch in text if not ch.isspace()]
+    if not chars:
+        return 0.0
+    readable = sum(1 for ch in chars if ch.isalnum() or ch in ".,;:!?-()[]%/'\"+=*&")
+    return readable / len(chars)
+
+
+def preprocess_image(image: Image.Image, profile: str = "balanced") -> Image.Image:
+    """
+    Preprocess image for better OCR results
+
+    Args:
+        image: PIL Image (grayscale renders skip the colour conversion)
+        profile: 'fast', 'balanced' or 'quality'
+
+    Returns:
+        Preprocessed PIL Image
+    """
+    settings = PREPROCESS_PROFILES[profile]
+
+    # Convert to grayscale (pages are rendered grayscale, so usually a no-op)
+    if image.mode == "L":
+        gray = np.asarray(image)
+    else:
+        rgb = image if image.mode == "RGB" else image.convert("RGB")
+        gray = cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2GRAY)
+
+    # Downscale oversized renders; text stays well above Tesseract's minimum height
+    max_pixels = settings["max_pixels"]
+    if max_pixels and gray.size > max_pixels:
+        scale = (max_pixels / gray.size) ** 0.5
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    # Denoise only pages that are actually noisy (scans); clean renders skip it
+    if settings["denoise"] and estimate_noise(gray) > settings["noise_threshold"]:
+        if settings["denoise"] == "nlmeans":
+            gray = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+        else:
+            gray = cv2.medianBlur(gray, 3)
+
+    # Apply thresholding to get better text detection
+    if settings["binarize"]:
+        _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # Convert back to PIL
+    return Image.fromarray(gray)
+
+
+def ocr_image_text(image: Image.Image, lang: str = "eng", profile: str = "balanced") -> str:
+    """Preprocess an image and OCR it with Tesseract"""
+    return pytesseract.image_to_string(preprocess_image(image, profile), lang=lang).strip()
+
+
+def _init_ocr_worker(tesseract_cmd: str = None):
+    """Process pool initializer: one Tesseract/OpenCV thread per worker process"""
+    # Tesseract's OpenMP threads would oversubscribe the cores the pool already uses
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    cv2.setNumThreads(1)
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def _ocr_page_task(page_num: int, image: Union[str, Image.Image], lang: str,
+                   profile: str) -> Tuple[int, str, float, str]:
+    """
+    OCR one page, given as an in-memory image or an image file path (runs in a worker process)
+
+    Takes plain settings rather than the PDFProcessor: the processor holds the
+    extraction cache (SQLite connection, lock), which cannot be pickled.
+    """
+    start = time.perf_counter()
+    try:
+        if isinstance(image, str):
+            image = Image.open(image).convert("RGB")
+        text = ocr_image_text(image, lang, profile)
+        error = None
+    except Exception as e:
+        text, error = "", str(e)
+    return page_num, text, time.perf_counter() - start, error
+
 
 class PDFProcessor:
     """Process PDF files: extract text using OCR (Tesseract)"""
     
-    def __init__(self, tesseract_cmd: str = None, lang: str = "eng"):
+    def __init__(self, tesseract_cmd: str = None, lang: str = "eng", ocr_workers: int = None,
+                 render_batch: int = 2, ocr_mode: str = "auto", min_text_chars: int = MIN_TEXT_CHARS,
+                 cache: ExtractionCache = None, ocr_profile: str = "balanced"):
         """
         Initialize PDF Processor with OCR
         
         Args:
             tesseract_cmd: Path to tesseract executable (optional)
             lang: OCR language (default: 'eng', use 'eng+ind' for English+Indonesian)
+            ocr_workers: Pages OCR'd in parallel (default: CPU count, 1 = serial)
+            render_batch: Pages rendered per pdftoppm call when streaming
+            ocr_mode: 'auto' (OCR only pages without a usable text layer) or 'all'
+            min_text_chars: Text layers shorter than this are OCR'd in 'auto' mode
+            cache: ExtractionCache for document and per-page OCR results (optional)
+            ocr_profile: Preprocessing profile: 'fast', 'balanced' or 'quality'
         """
+        if ocr_mode not in OCR_MODES:
+            raise ValueError(f"ocr_mode must be one of {OCR_MODES}, got '{ocr_mode}'")
+        if ocr_profile not in PREPROCESS_PROFILES:
+            raise ValueError(f"ocr_profile must be one of {list(PREPROCESS_PROFILES)}, got '{ocr_profile}'")
         # Set tesseract command if provided
         if tesseract_cmd:
             pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
@@ -43,56 +217,153 @@ class PDFProcessor:
                     break
         
         self.lang = lang
-        print(f"✅ PDF Processor initialized with Tesseract OCR (lang: {lang})")
+        self.tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        self.ocr_workers = max(1, ocr_workers or os.cpu_count() or 1)
+        self.render_batch = max(1, render_batch or 1)
+        self.ocr_mode = ocr_mode
+        self.min_text_chars = min_text_chars
+        self.cache = cache
+        self.ocr_profile = ocr_profile
+        self.render_dpi = PREPROCESS_PROFILES[ocr_profile]["dpi"]
+        print(f"✅ PDF Processor initialized with Tesseract OCR "
+              f"(lang: {lang}, workers: {self.ocr_workers}, mode: {ocr_mode}, profile: {ocr_profile})")
     
-    def preprocess_image_for_ocr(self, image: Image.Image) -> Image.Image:
+    def preprocess_image_for_ocr(self, image: Image.Image, profile: str = None) -> Image.Image:
         """
-        Preprocess image for better OCR results
+        Preprocess image for better OCR results (see preprocess_image)
         
         Args:
-            image: PIL Image
+            image: PIL Image (grayscale renders skip the colour conversion)
+            profile: 'fast', 'balanced' or 'quality' (default: self.ocr_profile)
             
         Returns:
             Preprocessed PIL Image
         """
-        # Convert to OpenCV format
-        img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+        return preprocess_image(image, profile or self.ocr_profile)
+    
+    @staticmethod
+    def _open_pages(pdf_path: str, first_page: int = None, last_page: int = None) -> Iterator[Tuple[int, object]]:
+        """
+        (page_num, pypdf page) for a 1-based inclusive page range
         
-        # Apply thresholding to get better text detection
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        The file is opened here (errors raise immediately); pypdf parses a page
+        only when the iterator reaches it.
+        """
+        reader = PdfReader(pdf_path)
+        total = len(reader.pages)
+        first = max(1, first_page or 1)
+        last = min(total, last_page or total)
+        return ((page_num, reader.pages[page_num - 1]) for page_num in range(first, last + 1))
+    
+    def iter_native_pages(self, pdf_path: str, first_page: int = None,
+                          last_page: int = None) -> Iterator[Dict]:
+        """
+        Native text of each page, extracted lazily one page at a time
         
-        # Denoise
-        denoised = cv2.fastNlMeansDenoising(thresh, None, 10, 7, 21)
+        Args:
+            pdf_path: Path to PDF file
+            first_page, last_page: 1-based inclusive page range (default: all pages)
+            
+        Yields:
+            {"page", "text"}; a page whose extraction fails yields empty text
+            
+        Raises:
+            Exception: The PDF cannot be opened (on the first next())
+        """
+        for page_num, page in self._open_pages(pdf_path, first_page, last_page):
+            try:
+                text = page.extract_text() or ""
+            except Exception as e:
+                print(f"⚠️ Page {page_num}: native text extraction failed ({e})")
+                text = ""
+            yield {"page": page_num, "text": text}
+    
+    def extract_pages(self, pdf_path: str, first_page: int = None, last_page: int = None) -> List[Dict]:
+        """
+        Native text per page
         
-        # Convert back to PIL
-        return Image.fromarray(denoised)
+        Args:
+            pdf_path: Path to PDF file
+            first_page, last_page: 1-based inclusive page range (default: all pages)
+            
+        Returns:
+            List of {"page", "text"} (empty if the PDF cannot be read)
+        """
+        try:
+            return list(self.iter_native_pages(pdf_path, first_page, last_page))
+        except Exception as e:
+            print(f"❌ Error extracting text: {e}")
+            return []
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    def extract_text_from_pdf(self, pdf_path: str, first_page: int = None, last_page: int = None) -> str:
         """
         Extract all text from PDF (native text extraction first)
         
         Args:
             pdf_path: Path to PDF file
+            first_page, last_page: 1-based inclusive page range (default: all pages)
             
         Returns:
-            Extracted text as string
+            Extracted text as string, with '--- Page N ---' headers
+            (use extract_pages() to keep page boundaries)
+        """
+        return join_pages(self.extract_pages(pdf_path, first_page, last_page))
+    
+    def analyze_pages(self, pdf_path: str, first_page: int = None, last_page: int = None) -> List[Dict]:
+        """
+        Read the native text layer of every page and decide which pages need OCR
+        
+        A page is OCR'd when its text layer is missing ('no_text', or
+        'image_only' when it only holds images), too short ('sparse_text')
+        or unreadable ('garbled_text').
+        
+        Args:
+            pdf_path: Path to PDF file
+            first_page, last_page: 1-based inclusive page range (default: all pages)
+            
+        Returns:
+            List of {"page", "native_text", "native_chars", "images", "content_hash",
+            "needs_ocr", "reason"} (content_hash is None without a cache)
         """
         try:
-            reader = PdfReader(pdf_path)
-            text = ""
+            page_iter = self._open_pages(pdf_path, first_page, last_page)
+        except Exception as e:
+            print(f"❌ Error reading PDF: {e}")
+            return []
+        
+        pages = []
+        for page_num, page in page_iter:
+            try:
+                text = page.extract_text() or ""
+            except Exception as e:
+                print(f"⚠️ Page {page_num}: native text extraction failed ({e})")
+                text = ""
             
-            for page_num, page in enumerate(reader.pages, 1):
-                page_text = page.extract_text()
-                text += f"\n--- Page {page_num} ---\n{page_text}\n"
+            native_chars = sum(1 for ch in text if not ch.isspace())
+            images = _count_page_images(page)
+            # Only needed to look up cached OCR text
+            content_hash = _page_content_hash(page) if self.cache is not None else None
             
-            return text.strip()
+            if native_chars == 0:
+                reason = "image_only" if images else "no_text"
+            elif native_chars < self.min_text_chars:
+                reason = "sparse_text"
+            elif _text_quality(text) < MIN_TEXT_QUALITY:
+                reason = "garbled_text"
+            else:
+                reason = None
+            
+            pages.append({
+                "page": page_num,
+                "native_text": text,
+                "native_chars": native_chars,
+                "images": images,
+                "content_hash": content_hash,
+                "needs_ocr": reason is not None,
+                "reason": reason
+            })
         
-        except Exception as e:
-            print(f"❌ Error extracting text: {e}")
-            return ""
+        return pages
     
     def extract_images_from_pdf(self, pdf_path: str, output_dir: str = None) -> List[str]:
         """
@@ -113,7 +384,7 @@ class PDFProcessor:
             
             # Convert PDF pages to images
             print(f"   Converting PDF to images (this may take a while)...")
-            images = convert_from_path(pdf_path, dpi=300)  # Higher DPI for better OCR
+            images = convert_from_path(pdf_path, dpi=self.render_dpi)  # Profile DPI (300 unless 'fast')
             
             image_paths = []
             pdf_name = Path(pdf_path).stem
@@ -130,13 +401,51 @@ class PDFProcessor:
             print(f"❌ Error extracting images: {e}")
             return []
     
-    def ocr_image(self, image_path: str = None, image: Image.Image = None) -> str:
+    def render_pages(self, pdf_path: str, dpi: int = None, batch_size: int = None,
+                     page_numbers: List[int] = None) -> Iterator[Tuple[int, Image.Image]]:
+        """
+        Render PDF pages to in-memory images, a few pages at a time
+        
+        Only batch_size pages are held at once and nothing is written to
+        disk (pdftoppm output is read straight from its pipe).
+        
+        Args:
+            pdf_path: Path to PDF file
+            dpi: Render resolution (default: the OCR profile's dpi)
+            batch_size: Pages per pdftoppm call (default: self.render_batch)
+            page_numbers: Pages to render, 1-based (default: all pages)
+            
+        Yields:
+            (page_num, PIL Image), page_num starting at 1
+        """
+        batch_size = batch_size or self.render_batch
+        dpi = dpi or self.render_dpi
+        if page_numbers is None:
+            page_numbers = range(1, len(PdfReader(pdf_path).pages) + 1)
+        
+        # Consecutive pages share one pdftoppm call, up to batch_size pages
+        ranges = []
+        for page_num in sorted(page_numbers):
+            if ranges and page_num == ranges[-1][1] + 1 and page_num - ranges[-1][0] < batch_size:
+                ranges[-1][1] = page_num
+            else:
+                ranges.append([page_num, page_num])
+        
+        for first_page, last_page in ranges:
+            # Grayscale straight from pdftoppm: a third of the bytes, no colour conversion later
+            images = convert_from_path(pdf_path, dpi=dpi, first_page=first_page, last_page=last_page,
+                                       grayscale=True)
+            for offset, image in enumerate(images):
+                yield first_page + offset, image
+    
+    def ocr_image(self, image_path: str = None, image: Image.Image = None, raise_errors: bool = False) -> str:
         """
         Perform OCR on an image using Tesseract
         
         Args:
             image_path: Path to image file (optional if image is provided)
             image: PIL Image object (optional if image_path is provided)
+            raise_errors: Raise instead of printing the error and returning ""
             
         Returns:
             Extracted text from image
@@ -147,77 +456,300 @@ class PDFProcessor:
                     raise ValueError("Either image_path or image must be provided")
                 image = Image.open(image_path).convert("RGB")
             
-            # Preprocess image for better OCR
-            preprocessed = self.preprocess_image_for_ocr(image)
-            
-            # Perform OCR
-            text = pytesseract.image_to_string(preprocessed, lang=self.lang)
-            
-            return text.strip()
+            # Preprocess and OCR
+            return ocr_image_text(image, self.lang, self.ocr_profile)
         
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"❌ Error performing OCR: {e}")
             return ""
     
-    def process_pdf_full(self, pdf_path: str, skip_ocr: bool = False) -> Dict[str, any]:
+    @staticmethod
+    def _merge_page(page: Dict, ocr: Dict = None) -> Dict:
+        """Final text of an analyze_pages() entry: OCR text replaces a missing or poor
+        text layer, and is appended to a good one ('all' mode)"""
+        text, source = page["native_text"], "native"
+        if ocr and ocr["text"]:
+            if page["needs_ocr"]:
+                text, source = ocr["text"], "ocr"
+            else:
+                text, source = f"{page['native_text']}\n\n{ocr['text']}", "native+ocr"
+        return {
+            "page": page["page"],
+            "text": text,
+            "source": source,
+            "reason": page["reason"],
+            "native_chars": page["native_chars"],
+            "images": page["images"]
+        }
+    
+    def ocr_fingerprint(self) -> str:
+        """Settings that change OCR output, part of every page cache key"""
+        return f"v{OCR_CACHE_VERSION}|{self.lang}|{self.ocr_profile}"
+    
+    def ocr_pages(self, pages: Iterable[Tuple[int, Union[str, Image.Image]]], total: int = None,
+                  progress: Callable[[int, int], None] = None,
+                  on_result: Callable[[Dict], None] = None) -> List[Dict]:
         """
-        Complete PDF processing: extract text + OCR images
+        OCR pages with a pool of worker processes
+        
+        Pages are pulled from the iterable only as workers free up (at most
+        workers + render_batch in flight), so a render_pages() generator keeps
+        memory bounded by the pages in flight, not the document size.
+        
+        Args:
+            pages: Iterable of (page_num, image), image being a PIL Image or an image file path
+            total: Number of pages, for progress output and pool sizing (optional)
+            progress: Called as progress(pages_done, total) after each page (optional)
+            on_result: Called with each page result as it completes, in completion order (optional)
+            
+        Returns:
+            List of {"page", "text", "seconds", "error"} in page order
+        """
+        results = {}
+        of_total = f"/{total}" if total else ""
+        workers = min(self.ocr_workers, total) if total else self.ocr_workers
+        
+        if workers <= 1:
+            for page_num, image in pages:
+                print(f"  OCR processing page {page_num}{of_total}...")
+                _, text, seconds, error = _ocr_page_task(page_num, image, self.lang, self.ocr_profile)
+                results[page_num] = {"page": page_num, "text": text, "seconds": seconds, "error": error}
+                if error:
+                    print(f"❌ Error performing OCR on page {page_num}: {error}")
+                if on_result:
+                    on_result(results[page_num])
+                if progress:
+                    progress(len(results), total)
+            return [results[p] for p in sorted(results)]
+        
+        def collect(futures):
+            for future in futures:
+                page_num, text, seconds, error = future.result()
+                results[page_num] = {"page": page_num, "text": text, "seconds": seconds, "error": error}
+                if error:
+                    print(f"❌ Error performing OCR on page {page_num}: {error}")
+                else:
+                    print(f"  OCR page {page_num} done ({len(results)}{of_total}, {seconds:.1f}s)")
+                if on_result:
+                    on_result(results[page_num])
+                if progress:
+                    progress(len(results), total)
+        
+        max_in_flight = workers + self.render_batch
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker,
+                                 initargs=(self.tesseract_cmd,)) as pool:
+            in_flight = set()
+            for page_num, image in pages:
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight.add(pool.submit(_ocr_page_task, page_num, image, self.lang, self.ocr_profile))
+            collect(as_completed(in_flight))
+        
+        return [results[p] for p in sorted(results)]
+    
+    def process_pdf_full(self, pdf_path: str, skip_ocr: bool = False, stream: bool = True,
+                         ocr_mode: str = None, content_hash: str = None,
+                         progress: Callable[[int, int], None] = None,
+                         on_page: Callable[[Dict, int], None] = None) -> Dict[str, any]:
+        """
+        Complete PDF processing: extract text + OCR the pages that need it
+        
+        With a cache, a file seen before with the same settings is returned
+        from the cache, and pages whose content was OCR'd before (in any
+        document) are not rendered or OCR'd again.
         
         Args:
             pdf_path: Path to PDF file
             skip_ocr: Skip OCR processing (faster, only native text extraction)
+            stream: Render pages in memory and OCR them as they come (default);
+                False saves every page as PNG in extracted_images/ first
+            ocr_mode: 'auto' or 'all' (default: self.ocr_mode), see analyze_pages()
+            content_hash: SHA-256 of the file, if already computed
+            progress: Called as progress(pages_done, pages_total) while OCR runs (optional)
+            on_page: Called as on_page(page, num_pages) for each entry of "pages",
+                in page order, as soon as its text is final, so chunking can start
+                while later pages are still being OCR'd (optional)
             
         Returns:
             Dictionary with:
                 - full_text: All text from PDF (native extraction)
-                - ocr_text: Text extracted via OCR from images
-                - combined_text: Text + OCR text combined
+                - ocr_text: Text extracted via OCR, per OCR'd page
+                - combined_text: Per-page merge; OCR text replaces a missing or
+                  poor text layer ('all' mode appends it to good ones)
+                - pages: Per page {"page", "text", "source", "reason", "native_chars", "images"}
+                - ocr_pages: Page numbers whose OCR text was used
+                - cached_pages: Of those, pages taken from the cache
                 - num_images: Number of page images processed
+                - page_timings: Per-page OCR time [{"page", "seconds", "chars"}]
+                - ocr_seconds: Wall time of the OCR stage
+                - content_hash, cache_hit: File hash and whether the whole result was cached
         """
+        ocr_mode = ocr_mode or self.ocr_mode
         print(f"📄 Processing PDF: {pdf_path}")
         
-        # Extract text using native PDF extraction
+        doc_key = None
+        if self.cache is not None:
+            content_hash = content_hash or file_sha256(pdf_path)
+            doc_key = cache_key(content_hash, self.ocr_fingerprint(), ocr_mode, self.min_text_chars, skip_ocr)
+            cached = self.cache.get_document(doc_key)
+            if cached is not None:
+                print(f"⚡ Extraction cache hit ({content_hash[:12]}), skipping extraction and OCR")
+                if on_page:
+                    for page in cached["pages"]:
+                        on_page(page, len(cached["pages"]))
+                return {**cached, "pdf_path": pdf_path, "cache_hit": True, "ocr_seconds": 0.0,
+                        "page_timings": [], "cached_pages": cached["ocr_pages"]}
+        
+        # Extract text using native PDF extraction, page by page
         print("📝 Extracting text (native)...")
-        native_text = self.extract_text_from_pdf(pdf_path)
-        
-        ocr_text = ""
-        num_images = 0
-        
-        if not skip_ocr:
-            # Convert PDF to images and perform OCR
-            print("🖼️ Converting PDF to images for OCR...")
-            image_paths = self.extract_images_from_pdf(pdf_path)
-            num_images = len(image_paths)
-            
-            # Perform OCR on each page image
-            print("🔍 Performing OCR on page images...")
-            ocr_results = []
-            for i, img_path in enumerate(image_paths, 1):
-                print(f"  OCR processing page {i}/{len(image_paths)}...")
-                ocr_text_page = self.ocr_image(image_path=img_path)
-                
-                if ocr_text_page:
-                    ocr_results.append(f"\n--- OCR Page {i} ---\n{ocr_text_page}")
-            
-            ocr_text = "\n".join(ocr_results)
-        
-        # Combine native text and OCR text
-        combined_text = native_text
-        if ocr_text:
-            combined_text += f"\n\n--- OCR EXTRACTED TEXT ---\n{ocr_text}"
+        pages = self.analyze_pages(pdf_path)
+        native_text = join_pages(pages, key="native_text")
+        
+        if skip_ocr:
+            ocr_page_numbers = []
+        elif ocr_mode == "all":
+            ocr_page_numbers = [p["page"] for p in pages]
+        else:
+            ocr_page_numbers = [p["page"] for p in pages if p["needs_ocr"]]
+            reasons = {}
+            for p in pages:
+                if p["needs_ocr"]:
+                    reasons[p["reason"]] = reasons.get(p["reason"], 0) + 1
+            detail = ", ".join(f"{n} {reason}" for reason, n in reasons.items())
+            print(f"🔎 {len(ocr_page_numbers)}/{len(pages)} pages need OCR" + (f" ({detail})" if detail else ""))
+        
+        # Pages whose content was OCR'd before
+        page_keys = {}
+        cached_results = []
+        if self.cache is not None and ocr_page_numbers:
+            hashes = {p["page"]: p["content_hash"] for p in pages}
+            to_ocr = []
+            for page_num in ocr_page_numbers:
+                if hashes[page_num] is None:
+                    to_ocr.append(page_num)
+                    continue
+                page_keys[page_num] = cache_key(hashes[page_num], self.ocr_fingerprint())
+                text = self.cache.get_page(page_keys[page_num])
+                if text is None:
+                    to_ocr.append(page_num)
+                else:
+                    cached_results.append({"page": page_num, "text": text, "seconds": 0.0, "error": None})
+            if cached_results:
+                print(f"⚡ OCR text of {len(cached_results)}/{len(ocr_page_numbers)} pages found in cache")
+            ocr_page_numbers = to_ocr
+        
+        # Hand pages on in page order as their final text becomes known
+        analyzed = {p["page"]: p for p in pages}
+        ready = {}
+        completed = set()
+        page_results = []
+        
+        def finish_page(page_result: Dict):
+            completed.add(page_result["page"])
+            ready[page_result["page"]] = page_result
+            while len(page_results) < len(pages) and pages[len(page_results)]["page"] in ready:
+                page_results.append(ready.pop(pages[len(page_results)]["page"]))
+                if on_page:
+                    on_page(page_results[-1], len(pages))
+        
+        def on_ocr_result(r: Dict):
+            finish_page(self._merge_page(analyzed[r["page"]], r))
+        
+        pending = set(ocr_page_numbers)
+        cached_by_page = {r["page"]: r for r in cached_results}
+        for p in pages:
+            if p["page"] not in pending:
+                finish_page(self._merge_page(p, cached_by_page.get(p["page"])))
+        
+        ocr_results = []
+        ocr_seconds = 0.0
+        ocr_failed = False
+        
+        if ocr_page_numbers:
+            ocr_start = time.perf_counter()
+            workers = min(self.ocr_workers, len(ocr_page_numbers))
+            if stream:
+                # Render and OCR page by page (in parallel, page order preserved)
+                print(f"🔍 Rendering and OCR-ing {len(ocr_page_numbers)} pages in memory ({workers} workers)...")
+                try:
+                    ocr_results = self.ocr_pages(
+                        self.render_pages(pdf_path, page_numbers=ocr_page_numbers),
+                        total=len(ocr_page_numbers),
+                        progress=progress,
+                        on_result=on_ocr_result
+                    )
+                except Exception as e:
+                    print(f"❌ Error during OCR: {e}")
+                    ocr_failed = True
+            else:
+                # Convert PDF to images and perform OCR
+                print("🖼️ Converting PDF to images for OCR...")
+                image_paths = self.extract_images_from_pdf(pdf_path)
+                wanted = set(ocr_page_numbers)
+                print(f"🔍 Performing OCR on page images ({workers} workers)...")
+                ocr_results = self.ocr_pages(
+                    [(n, path) for n, path in enumerate(image_paths, 1) if n in wanted],
+                    total=len(wanted),
+                    progress=progress,
+                    on_result=on_ocr_result
+                )
+                ocr_failed = len(ocr_results) < len(wanted)
+            ocr_seconds = time.perf_counter() - ocr_start
+            
+            for r in ocr_results:
+                if r["error"]:
+                    ocr_failed = True
+                elif r["page"] in page_keys:
+                    self.cache.put_page(page_keys[r["page"]], r["text"])
+        
+        page_timings = [
+            {"page": r["page"], "seconds": round(r["seconds"], 3), "chars": len(r["text"])}
+            for r in ocr_results
+        ]
+        ocr_results = sorted(ocr_results + cached_results, key=lambda r: r["page"])
+        
+        # Pages whose OCR did not come back (aborted run) keep their native text
+        for p in pages:
+            if p["page"] not in completed:
+                finish_page(self._merge_page(p, None))
+        
+        combined_text = join_pages(page_results)
+        ocr_text = "\n".join(
+            f"\n--- OCR Page {r['page']} ---\n{r['text']}" for r in ocr_results if r["text"]
+        )
         
         result = {
             "pdf_path": pdf_path,
             "full_text": native_text,
             "ocr_text": ocr_text,
             "combined_text": combined_text,
-            "num_images": num_images
+            "pages": page_results,
+            "ocr_pages": [r["page"] for r in ocr_results],
+            "cached_pages": [r["page"] for r in cached_results],
+            "num_images": len(ocr_results),
+            "page_timings": page_timings,
+            "ocr_seconds": round(ocr_seconds, 3),
+            "content_hash": content_hash,
+            "cache_hit": False
         }
         
+        # Incomplete OCR is not cached, so the next upload retries it
+        if doc_key is not None and pages and not ocr_failed:
+            self.cache.put_document(doc_key, {k: v for k, v in result.items() if k != "pdf_path"})
+        
         print(f"✅ PDF processing complete!")
         print(f"   - Native text length: {len(native_text)} chars")
         print(f"   - OCR text length: {len(ocr_text)} chars")
         print(f"   - Combined length: {len(combined_text)} chars")
-        print(f"   - Pages processed: {num_images}")
+        print(f"   - Pages OCR'd: {len(ocr_results)}/{len(pages)}"
+              + (f" ({len(cached_results)} from cache)" if cached_results else ""))
+        if page_timings:
+            page_total = sum(p["seconds"] for p in page_timings)
+            slowest = max(page_timings, key=lambda p: p["seconds"])
+            print(f"   - OCR time: {ocr_seconds:.1f}s wall, {page_total:.1f}s summed over pages "
+                  f"(slowest: page {slowest['page']}, {slowest['seconds']:.1f}s)")
         
         return result
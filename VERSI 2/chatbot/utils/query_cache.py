@@ -0,0 +1,126 @@
+"""
+Query Embedding Cache
+In-process LRU with a time-to-live for the embeddings of user questions:
+FAQ-style questions ("berapa lama telur menetas") repeat a lot, and each
+miss costs an Azure round-trip or a model forward pass. Questions that
+differ only in case, spacing or trailing punctuation share an entry.
+
+Optionally backed by the persistent EmbeddingCache, so API worker
+processes share what any of them has embedded.
+"""
+
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict
+
+import numpy as np
+
+from .embedding_cache import EmbeddingCache
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a question: NFC, lower case, single spaces, no trailing ?!. """
+    return " ".join(unicodedata.normalize("NFC", query).lower().split()).rstrip("?!. ")
+
+
+class QueryEmbeddingCache:
+    """LRU + TTL cache of query embeddings with hit-rate and saved-latency counters"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600,
+                 shared_cache: EmbeddingCache = None, namespace: str = None):
+        """
+        Initialize cache
+
+        Args:
+            max_size: Queries kept in memory (least recently used dropped first)
+            ttl_seconds: Age after which an entry is embedded again
+            shared_cache: Persistent cache consulted on a local miss (shared by processes)
+            namespace: Namespace in shared_cache, e.g. the embedder's plus ":query"
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.shared_cache = shared_cache
+        self.namespace = namespace
+        self._entries = OrderedDict()  # key -> (expires at, embedding)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.miss_seconds = 0.0  # time spent embedding on misses
+
+    def get(self, query: str, compute: Callable[[str], np.ndarray]) -> np.ndarray:
+        """
+        Embedding of query, from the cache or compute(query)
+
+        Args:
+            query: User question
+            compute: Embeds one text (e.g. embedder.generate_embedding)
+
+        Returns:
+            Embedding (shared with the cache: do not modify it)
+        """
+        key = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expired += 1
+
+        embedding = None
+        if self.shared_cache is not None:
+            vectors, missing = self.shared_cache.get_many(self.namespace, [key])
+            if not missing:
+                embedding = vectors[0]
+        if embedding is not None:
+            with self._lock:
+                self.shared_hits += 1
+        else:
+            start = time.perf_counter()
+            embedding = np.asarray(compute(query))
+            elapsed = time.perf_counter() - start
+            if self.shared_cache is not None:
+                self.shared_cache.put_many(self.namespace, [key], embedding[np.newaxis])
+            with self._lock:
+                self.misses += 1
+                self.miss_seconds += elapsed
+
+        embedding.flags.writeable = False
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return embedding
+
+    def clear(self):
+        """Drop the in-memory entries (the shared cache is kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit rate and the embedding time saved, estimated from the mean miss latency"""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            mean_miss = self.miss_seconds / self.misses if self.misses else None
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "shared": self.shared_cache is not None,
+                "lookups": lookups,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else None,
+                "mean_miss_ms": round(mean_miss * 1000, 2) if mean_miss is not None else None,
+                "saved_seconds": round((self.hits + self.shared_hits) * mean_miss, 3) if mean_miss is not None else None
+            }
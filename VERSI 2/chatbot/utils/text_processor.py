@@ -4,34 +4,104 @@ Split text into chunks and generate vector embeddings
 """
 
 import os
-from typing import List, Dict
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Dict, Iterable, Iterator, Tuple
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 import tiktoken
 
+from .text_splitter import RecursiveTextSplitter
+from .embedding_cache import EmbeddingCache, embed_with_cache
+
+# 'page': chunks stay inside one page; 'document': chunks may span pages
+CHUNK_BOUNDARIES = ["page", "document"]
+# Unit of chunk_size/chunk_overlap
+CHUNK_UNITS = ["chars", "tokens"]
+# Inference backends of EmbeddingGenerator
+EMBEDDING_BACKENDS = ["torch", "onnx", "onnx-int8"]
+
+# Input limit (tokens) of the OpenAI/Azure embedding models
+EMBEDDING_TOKEN_LIMITS = {
+    "text-embedding-3-large": 8191,
+    "text-embedding-3-small": 8191,
+    "text-embedding-ada-002": 8191
+}
+DEFAULT_TOKEN_LIMIT = 8191
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> "tiktoken.Encoding":
+    """
+    tiktoken encoding of a model, loaded once per process
+    
+    Unknown model names (e.g. Azure deployment names) use cl100k_base, the
+    encoding of the GPT-4 and text-embedding-3 families.
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = "text-embedding-3-large") -> int:
+    """Exact token count of text for a model (special-token text is counted as plain text)"""
+    return len(get_encoding(model).encode(text, disallowed_special=()))
+
 
 class TextChunker:
     """Split text into manageable chunks"""
     
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50, boundary: str = "page",
+                 min_chunk_chars: int = None, unit: str = "chars",
+                 token_model: str = "text-embedding-3-large", max_tokens: int = None):
         """
         Initialize text chunker
         
         Args:
-            chunk_size: Maximum characters per chunk
-            chunk_overlap: Overlap between chunks
+            chunk_size: Maximum chunk length in `unit`
+            chunk_overlap: Overlap between chunks in `unit`
+            boundary: 'page' or 'document', see chunk_pages()
+            min_chunk_chars: Page remainders shorter than this (characters) are merged
+                into the next page's first chunk (default: about a quarter chunk)
+            unit: 'chars' or 'tokens' (counted with token_model's tiktoken encoding)
+            token_model: Embedding model whose tokenizer and input limit apply
+            max_tokens: Hard limit per chunk in tokens (default: the model's input
+                limit); longer chunks are cut at token boundaries in either unit
         """
+        if boundary not in CHUNK_BOUNDARIES:
+            raise ValueError(f"Unknown chunk boundary '{boundary}', choose from {CHUNK_BOUNDARIES}")
+        if unit not in CHUNK_UNITS:
+            raise ValueError(f"Unknown chunk unit '{unit}', choose from {CHUNK_UNITS}")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.boundary = boundary
+        self.unit = unit
+        self.token_model = token_model
+        self.max_tokens = max_tokens or EMBEDDING_TOKEN_LIMITS.get(token_model, DEFAULT_TOKEN_LIMIT)
+        if unit == "tokens" and chunk_size > self.max_tokens:
+            raise ValueError(f"chunk_size ({chunk_size} tokens) is above the {token_model} limit ({self.max_tokens})")
+        if min_chunk_chars is None:
+            # A token is about 4 characters
+            min_chunk_chars = chunk_size // 4 if unit == "chars" else chunk_size
+        self.min_chunk_chars = min_chunk_chars
         
-        self.splitter = RecursiveCharacterTextSplitter(
+        # Same output as LangChain's RecursiveCharacterTextSplitter (see benchmark_splitter.py)
+        self.splitter = RecursiveTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
+            separators=["\n\n", "\n", ". ", " ", ""],
+            length_function=self.count_tokens if unit == "tokens" else len
         )
     
+    @property
+    def encoding(self) -> "tiktoken.Encoding":
+        return get_encoding(self.token_model)
+    
+    def count_tokens(self, text: str) -> int:
+        """Exact token count of text with the embedding model's encoding"""
+        return len(self.encoding.encode(text, disallowed_special=()))
+    
     def chunk_text(self, text: str, metadata: Dict = None) -> List[Dict]:
         """
         Split text into chunks with metadata
@@ -43,7 +113,7 @@ class TextChunker:
         Returns:
             List of chunk dictionaries
         """
-        chunks = self.splitter.split_text(text)
+        chunks = [chunk for _, chunk in self.split_with_offsets(text)]
         
         chunk_data = []
         for i, chunk in enumerate(chunks):
@@ -53,33 +123,157 @@ class TextChunker:
                 "char_count": len(chunk),
                 "metadata": metadata or {}
             }
+            if self.unit == "tokens":
+                chunk_dict["metadata"] = {**chunk_dict["metadata"], "token_count": self.count_tokens(chunk)}
             chunk_data.append(chunk_dict)
         
         return chunk_data
     
-    def get_token_count(self, text: str, model: str = "gpt-4") -> int:
+    def split_with_offsets(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Split text and locate every chunk in it
+        
+        Returns:
+            List of (start offset, chunk text), every chunk within max_tokens
+        """
+        return self._fit(self.splitter.split_with_offsets(text))
+    
+    def _fit(self, located: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        """Cut chunks longer than max_tokens at token boundaries, keeping offsets"""
+        fitted = []
+        for start, chunk in located:
+            # A token is at least one byte, so short chunks need no encoding
+            if len(chunk.encode("utf-8")) <= self.max_tokens:
+                fitted.append((start, chunk))
+                continue
+            tokens = self.encoding.encode(chunk, disallowed_special=())
+            if len(tokens) <= self.max_tokens:
+                fitted.append((start, chunk))
+                continue
+            
+            _, offsets = self.encoding.decode_with_offsets(tokens)
+            cuts = [0] + offsets[self.max_tokens::self.max_tokens] + [len(chunk)]
+            pieces = []
+            for piece_start, piece_end in zip(cuts, cuts[1:]):
+                piece = chunk[piece_start:piece_end]
+                if piece.strip():
+                    pieces.append((start + piece_start + len(piece) - len(piece.lstrip()), piece.strip()))
+            # A piece re-encodes slightly differently at its edges, so check again
+            fitted.extend(self._fit(pieces))
+        return fitted
+    
+    def chunk_pages(self, pages: Iterable[Dict], metadata: Dict = None, boundary: str = None,
+                    flush_chars: int = None) -> Iterator[Dict]:
+        """
+        Chunk a document page by page, recording where every chunk comes from
+        
+        With boundary 'page', each page is split on its own, so a chunk never
+        mixes pages; only a page remainder shorter than min_chunk_chars (a
+        footer, a caption) is carried over and merged with the next page.
+        With 'document', text flows across pages like chunk_text() on the
+        whole document, split every flush_chars so pages can stream in.
+        
+        Args:
+            pages: Iterable of {"page", "text"} in page order (e.g. process_pdf_full()["pages"])
+            metadata: Additional metadata to attach to each chunk
+            boundary: 'page' or 'document' (default: self.boundary)
+            flush_chars: Buffer size that triggers a split in 'document' mode (default: 4 x chunk_size)
+            
+        Yields:
+            Chunk dictionaries (chunk_id numbered across the document) whose
+            metadata adds page_number/page_end (first/last page) and
+            char_start/char_end (offset in the first page's text / end offset
+            in the last page's text)
+        """
+        boundary = boundary or self.boundary
+        if boundary not in CHUNK_BOUNDARIES:
+            raise ValueError(f"Unknown chunk boundary '{boundary}', choose from {CHUNK_BOUNDARIES}")
+        flush_chars = flush_chars or self.chunk_size * 4
+        
+        buffer = ""
+        spans = []  # (offset in buffer, page number, offset of that position in the page text)
+        chunk_id = 0
+        
+        def locate(position: int) -> Tuple[int, int]:
+            buffer_start, page_num, page_start = spans[bisect_right([s[0] for s in spans], position) - 1]
+            return page_num, page_start + position - buffer_start
+        
+        def make_chunk(start: int, text: str) -> Dict:
+            page_start, char_start = locate(start)
+            page_end, char_end = locate(start + len(text) - 1)
+            chunk = {
+                "chunk_id": chunk_id,
+                "text": text,
+                "char_count": len(text),
+                "metadata": {
+                    **(metadata or {}),
+                    "page_number": page_start,
+                    "page_end": page_end,
+                    "char_start": char_start,
+                    "char_end": char_end + 1
+                }
+            }
+            if self.unit == "tokens":
+                chunk["metadata"]["token_count"] = self.count_tokens(text)
+            return chunk
+        
+        def keep_from(position: int):
+            """Drop the buffer before position, keeping the span mapping"""
+            nonlocal buffer, spans
+            page_num, page_offset = locate(position)
+            rest = [(s - position, p, o) for s, p, o in spans if s > position]
+            buffer, spans = buffer[position:], [(0, page_num, page_offset)] + rest
+        
+        for page in pages:
+            if not page["text"].strip():
+                continue
+            if buffer:
+                buffer += "\n\n"
+            spans.append((len(buffer), page["page"], 0))
+            buffer += page["text"]
+            
+            if boundary == "page":
+                located = self.split_with_offsets(buffer)
+                carry = located and len(located[-1][1]) < self.min_chunk_chars
+            elif len(buffer) >= flush_chars:
+                located = self.split_with_offsets(buffer)
+                carry = len(located) > 1
+                if not carry:
+                    continue
+            else:
+                continue
+            
+            for start, text in located[:-1] if carry else located:
+                yield make_chunk(start, text)
+                chunk_id += 1
+            if carry:
+                keep_from(located[-1][0])
+            else:
+                buffer, spans = "", []
+        
+        for start, text in self.split_with_offsets(buffer) if buffer.strip() else []:
+            yield make_chunk(start, text)
+            chunk_id += 1
+    
+    def get_token_count(self, text: str, model: str = None) -> int:
         """
         Count tokens in text for a specific model
         
         Args:
             text: Input text
-            model: Model name (gpt-4, gpt-3.5-turbo, etc.)
+            model: Model name (gpt-4, gpt-3.5-turbo, etc.; default: token_model)
             
         Returns:
             Token count
         """
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-            return len(encoding.encode(text))
-        except:
-            # Fallback: rough estimate (4 chars = 1 token)
-            return len(text) // 4
+        return count_tokens(text, model or self.token_model)
 
 
 class EmbeddingGenerator:
     """Generate vector embeddings for text chunks"""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", cache: EmbeddingCache = None,
+                 backend: str = "torch", model_dir: str = None, threads: int = 0):
         """
         Initialize embedding generator
         
@@ -89,10 +283,27 @@ class EmbeddingGenerator:
                        - "all-MiniLM-L6-v2" (384 dim, fast)
                        - "all-mpnet-base-v2" (768 dim, better quality)
                        - "paraphrase-multilingual-MiniLM-L12-v2" (384 dim, multilingual)
+            cache: Persistent embedding cache; only texts not in it are encoded
+            backend: "torch" (fp32 PyTorch), "onnx" (fp32 ONNX Runtime) or
+                     "onnx-int8" (int8-quantized ONNX Runtime, fastest on CPU)
+            model_dir: ONNX exports (default: ./storage/models), written on first use
+            threads: ONNX Runtime threads (0 = one per physical core)
         """
-        print(f"🔧 Loading embedding model: {model_name}...")
-        self.model = SentenceTransformer(model_name)
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"backend must be one of {EMBEDDING_BACKENDS}, got {backend!r}")
+        print(f"🔧 Loading embedding model: {model_name} ({backend})...")
+        if backend == "torch":
+            self.model = SentenceTransformer(model_name)
+        else:
+            from .onnx_embeddings import ONNXSentenceEncoder
+            self.model = ONNXSentenceEncoder(model_name, model_dir=model_dir,
+                                             quantized=backend == "onnx-int8", threads=threads)
+        self.backend = backend
         self.dimension = self.model.get_sentence_embedding_dimension()
+        self.cache = cache
+        # int8 embeddings differ slightly from fp32 ones: cached apart
+        self.cache_namespace = f"sentence-transformers:{model_name}:{self.dimension}" + (
+            ":int8" if backend == "onnx-int8" else "")
         print(f"✅ Model loaded! Embedding dimension: {self.dimension}")
     
     def generate_embedding(self, text: str) -> np.ndarray:
@@ -119,13 +330,12 @@ class EmbeddingGenerator:
         Returns:
             Numpy array of embeddings
         """
-        embeddings = self.model.encode(
-            texts,
+        return embed_with_cache(self.cache, self.cache_namespace, texts, lambda novel: self.model.encode(
+            novel,
             batch_size=batch_size,
             convert_to_numpy=True,
             show_progress_bar=True
-        )
-        return embeddings
+        ))
     
     def embed_chunks(self, chunks: List[Dict]) -> List[Dict]:
         """
@@ -138,10 +348,10 @@ class EmbeddingGenerator:
             List of chunks with embeddings added
         """
         texts = [chunk["text"] for chunk in chunks]
-        embeddings = self.generate_embeddings_batch(texts)
+        embeddings = np.ascontiguousarray(self.generate_embeddings_batch(texts), dtype=np.float32)
         
         for i, chunk in enumerate(chunks):
-            chunk["embedding"] = embeddings[i].tolist()  # Convert to list for JSON serialization
+            chunk["embedding"] = embeddings[i]  # row view of one float32 matrix
         
         return chunks
 
@@ -184,7 +394,7 @@ class OpenAIEmbedding:
     def embed_chunks(self, chunks: List[Dict]) -> List[Dict]:
         """Add OpenAI embeddings to chunks"""
         texts = [chunk["text"] for chunk in chunks]
-        embeddings = self.generate_embeddings_batch(texts)
+        embeddings = np.array(self.generate_embeddings_batch(texts), dtype=np.float32)
         
         for i, chunk in enumerate(chunks):
             chunk["embedding"] = embeddings[i]
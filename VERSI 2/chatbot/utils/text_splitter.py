@@ -0,0 +1,128 @@
+"""
+Recursive Text Splitter
+Built-in replacement for LangChain's RecursiveCharacterTextSplitter with the
+same output (keep_separator=True, strip_whitespace=True, any length_function).
+
+Splits are kept as (start, end) offsets into the original string: merging
+consecutive splits is then just widening a span, and the only strings
+built are the final chunks. LangChain copies every piece (re.split, joins,
+list(text) for the last-resort character split).
+"""
+
+from typing import Callable, List, Tuple
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+class RecursiveTextSplitter:
+    """Split text on the first separator that occurs, recursing into pieces that are too long"""
+
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50, separators: List[str] = None,
+                 length_function: Callable[[str], int] = len):
+        """
+        Initialize splitter
+
+        Args:
+            chunk_size: Maximum chunk length, measured by length_function
+            chunk_overlap: Overlap between chunks
+            separators: Literal separators, most preferred first (default: paragraph,
+                line, sentence, word, character)
+            length_function: Length of a piece of text (default: characters). Each split
+                is measured once and chunk lengths are summed from their splits
+        """
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) is larger than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators) if separators is not None else list(DEFAULT_SEPARATORS)
+        self.length_function = length_function
+
+    def split_text(self, text: str) -> List[str]:
+        """Chunks of text, stripped of surrounding whitespace"""
+        return [chunk for _, chunk in self.split_with_offsets(text)]
+
+    def split_with_offsets(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Chunks of text with their start offsets
+
+        Returns:
+            List of (start offset of the stripped chunk in text, chunk)
+        """
+        chunks = []
+        self._split(text, 0, len(text), self.separators, chunks)
+        return chunks
+
+    def _split(self, text: str, start: int, end: int, separators: List[str], chunks: list):
+        # First separator present in text[start:end]; "" always matches
+        separator = separators[-1]
+        remaining = []
+        for i, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator = candidate
+                remaining = separators[i + 1:]
+                break
+
+        good = []  # run of short splits waiting to be merged, as (start, end, length)
+        for split in self._split_spans(text, start, end, separator):
+            length = self._length(text, split[0], split[1])
+            if length < self.chunk_size:
+                good.append((split[0], split[1], length))
+                continue
+            if good:
+                self._merge(text, good, chunks)
+                good = []
+            if remaining:
+                self._split(text, split[0], split[1], remaining, chunks)
+            else:
+                # Nothing left to split on: kept as is, not stripped (as LangChain does)
+                chunks.append((split[0], text[split[0]:split[1]]))
+        if good:
+            self._merge(text, good, chunks)
+
+    def _length(self, text: str, start: int, end: int) -> int:
+        if self.length_function is len:
+            return end - start
+        return self.length_function(text[start:end])
+
+    @staticmethod
+    def _split_spans(text: str, start: int, end: int, separator: str):
+        """Pieces of text[start:end], each but the first starting with the separator"""
+        if not separator:
+            return [(i, i + 1) for i in range(start, end)]
+        spans = []
+        piece_start = start
+        position = text.find(separator, start, end)
+        while position != -1:
+            if position > piece_start:
+                spans.append((piece_start, position))
+            piece_start = position
+            position = text.find(separator, position + len(separator), end)
+        if end > piece_start:
+            spans.append((piece_start, end))
+        return spans
+
+    def _merge(self, text: str, splits: List[Tuple[int, int, int]], chunks: list):
+        """Pack consecutive short splits into chunks of at most chunk_size, with overlap"""
+        window_start = 0  # index of the first split in the current chunk
+        total = 0         # length of the current chunk
+        for i, (_, _, length) in enumerate(splits):
+            if total + length > self.chunk_size:
+                if i > window_start:
+                    self._emit(text, splits[window_start][0], splits[i - 1][1], chunks)
+                    # Drop splits from the front until what is left fits as overlap
+                    while total > self.chunk_overlap or (total + length > self.chunk_size and total > 0):
+                        total -= splits[window_start][2]
+                        window_start += 1
+            total += length
+        if window_start < len(splits):
+            self._emit(text, splits[window_start][0], splits[-1][1], chunks)
+
+    @staticmethod
+    def _emit(text: str, start: int, end: int, chunks: list):
+        piece = text[start:end]
+        chunk = piece.strip()
+        if chunk:
+            chunks.append((start + len(piece) - len(piece.lstrip()), chunk))
@@ -0,0 +1,334 @@
+"""
+Model Compression & Serving Export - Penetasan
+==============================================
+The penetasan model (300 trees, depth 7) is loaded into every API worker. This script builds smaller variants, measures them and exports the
+smallest one that fits the memory budget without losing accuracy:
+
+  - prune:   drop boosting stages whose contribution to the raw scores is
+             negligible (relative to the strongest stage)
+  - first-N: keep only the first N boosting stages
+  - distill: train a small student ensemble on the teacher's predictions
+             (original + jittered training rows), optional
+
+Accuracy is measured on the rows the source version was never trained on
+(its metadata train_ids: dummy_data.csv and the incremental training store).
+
+Output:
+  - ../models/compression_report.csv   (size / latency / accuracy trade-off)
+  - a new penetasan version in the model registry (tagged with the variant,
+    parent = compressed version); --promote makes it the production model
+
+Usage:
+    python compress_model.py
+    python compress_model.py --max-size-kb 2048 --max-accuracy-drop 0.01 --distill
+    python compress_model.py --from best:test_accuracy --promote
+"""
+
+import argparse
+import copy
+import io
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from ml_utils import (
+    create_features, encode_categoricals, load_dataset, PENETASAN_FEATURES, PENETASAN_COLUMNS, ModelRegistry
+)
+from incremental_training import STORE_PATH, LEGACY_STORE_PATH
+
+# Get the directory where this script is located
+script_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(script_dir, '..', 'models')
+data_dir = os.path.join(script_dir, '..', 'data')
+
+PRUNE_THRESHOLDS = [0.001, 0.005, 0.01, 0.05]
+TRUNCATE_STAGES = [25, 50, 100, 150, 200]
+
+
+# ==================== DATA ====================
+
+def known_rows():
+    """dummy_data.csv plus the rows added to the incremental training store"""
+    frames = [load_dataset(os.path.join(data_dir, 'dummy_data.csv'), columns=PENETASAN_COLUMNS + ['id'])]
+    for path in (STORE_PATH, LEGACY_STORE_PATH):
+        if os.path.exists(path):
+            frames.append(load_dataset(path, columns=PENETASAN_COLUMNS + ['id']))
+            break
+    df = pd.concat(frames, ignore_index=True).drop_duplicates('id')
+    # A pandas concat of categoricals with different categories gives objects
+    return df.astype({c: str for c in ['Media_Telur', 'weather_main', 'season']}).reset_index(drop=True)
+
+
+def load_split(encoders, metadata):
+    """
+    Train/test rows of the version being compressed
+
+    With the version's train_ids, every known row it was not trained on is
+    a test row (categories its encoders don't know are left out). Without
+    them, model_penetasan.py's random split of dummy_data.csv is rebuilt.
+    """
+    if 'train_ids' in metadata:
+        df = known_rows()
+        known = np.ones(len(df), dtype=bool)
+        for encoder, column in zip(encoders, ['Media_Telur', 'weather_main', 'season']):
+            known &= df[column].isin(encoder.classes_).values
+        df = df[known]
+        is_train = df['id'].isin(metadata['train_ids']).values
+    else:
+        df = load_dataset(os.path.join(data_dir, 'dummy_data.csv'), columns=PENETASAN_COLUMNS)
+        idx_train, idx_test = train_test_split(
+            np.arange(len(df)), test_size=0.2, random_state=42, stratify=df['Lama_menetas_hari']
+        )
+        is_train = np.isin(np.arange(len(df)), idx_train)
+
+    df_enc = encode_categoricals(create_features(df), *encoders)
+    X = df_enc[PENETASAN_FEATURES]
+    y = df_enc['Lama_menetas_hari']
+    return df[is_train], X[is_train], X[~is_train], y[~is_train]
+
+
+def jitter_rows(df_raw, copies, seed=42):
+    """Perturbed copies of raw training rows (teacher labels them for distillation)"""
+    rng = np.random.default_rng(seed)
+    jittered = []
+    for _ in range(copies):
+        d = df_raw.copy()
+        d['Jumlah_telur_gram'] = d['Jumlah_telur_gram'] * rng.uniform(0.95, 1.05, len(d))
+        d['temp'] = d['temp'] + rng.uniform(-1, 1, len(d))
+        d['humidity'] = d['humidity'] + rng.uniform(-3, 3, len(d))
+        d['temp_max'] = np.maximum(d['temp_max'] + rng.uniform(-1, 1, len(d)), d['temp'] + 0.5)
+        jittered.append(d)
+    return pd.concat(jittered, ignore_index=True)
+
+
+# ==================== VARIANTS ====================
+
+def with_stages(model, keep):
+    """
+    Copy of a fitted GradientBoosting model restricted to some stages
+
+    Args:
+        model: Fitted GradientBoostingClassifier
+        keep: Stage indices to keep (in order)
+    """
+    pruned = copy.copy(model)
+    pruned.estimators_ = model.estimators_[keep]
+    pruned.train_score_ = model.train_score_[keep]
+    pruned.n_estimators = len(keep)
+    pruned.n_estimators_ = len(keep)
+    return pruned
+
+
+def stage_contributions(model, X):
+    """Mean absolute change each stage makes to the raw class scores"""
+    X = np.asarray(X, dtype=np.float32)
+    return np.array([
+        sum(np.abs(tree.predict(X)).mean() for tree in stage) * model.learning_rate
+        for stage in model.estimators_
+    ])
+
+
+def build_variants(model, X_train, df_train_raw, encoders, args):
+    """All candidate serving models, keyed by variant name"""
+    variants = {'baseline': model}
+    n_stages = model.estimators_.shape[0]
+
+    contributions = stage_contributions(model, X_train)
+    for threshold in PRUNE_THRESHOLDS:
+        keep = np.flatnonzero(contributions >= threshold * contributions.max())
+        if 0 < len(keep) < n_stages:
+            variants[f'prune@{threshold:g}'] = with_stages(model, keep)
+
+    for n in TRUNCATE_STAGES:
+        if n < n_stages:
+            variants[f'first-{n}'] = with_stages(model, np.arange(n))
+
+    if args.distill:
+        df_aug = pd.concat([df_train_raw, jitter_rows(df_train_raw, args.distill_copies)], ignore_index=True)
+        X_aug = encode_categoricals(create_features(df_aug), *encoders)[PENETASAN_FEATURES]
+        y_teacher = model.predict(X_aug)
+        for n_trees, depth in [(100, 3), (100, 4), (50, 5)]:
+            student = GradientBoostingClassifier(
+                n_estimators=n_trees, max_depth=depth, learning_rate=0.1, random_state=42
+            ).fit(X_aug, y_teacher)
+            variants[f'distill-{n_trees}x{depth}'] = student
+
+    return variants
+
+
+# ==================== MEASUREMENT ====================
+
+def measure(name, model, baseline, X_test, y_test, repeats):
+    """Size, latency and accuracy of one variant"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    size_kb = buffer.tell() / 1024
+
+    start = time.perf_counter()
+    buffer.seek(0)
+    joblib.load(buffer)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    # Single-row latency as served by the API (predict + predict_proba)
+    row = X_test.iloc[[0]]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    n_trees = model.estimators_.size
+    return {
+        'variant': name,
+        'n_stages': model.estimators_.shape[0],
+        'n_trees': n_trees,
+        'n_nodes': sum(tree.tree_.node_count for tree in model.estimators_.ravel()),
+        'size_kb': size_kb,
+        'load_ms': load_ms,
+        'latency_p50_ms': np.median(timings) * 1000,
+        'latency_p95_ms': np.percentile(timings, 95) * 1000,
+        'batch_ms': batch_ms,
+        'test_accuracy': accuracy_score(y_test, y_pred),
+        'agreement': np.mean(y_pred == baseline.predict(X_test))
+    }
+
+
+def select_variant(report, max_size_kb, max_accuracy_drop):
+    """Smallest variant within the memory budget and allowed accuracy drop"""
+    baseline_acc = report.loc[report['variant'] == 'baseline', 'test_accuracy'].iloc[0]
+    ok = report[
+        (report['test_accuracy'] >= baseline_acc - max_accuracy_drop) &
+        ((report['size_kb'] <= max_size_kb) if max_size_kb else True)
+    ]
+    if ok.empty:
+        return None
+    return ok.sort_values(['size_kb', 'latency_p50_ms']).iloc[0]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compress the penetasan model for serving")
+    parser.add_argument('--max-size-kb', type=float, default=None,
+                        help="Memory budget per worker for the model (pickle size, KB)")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.0,
+                        help="Allowed test accuracy drop vs. baseline (default: 0.0)")
+    parser.add_argument('--distill', action='store_true', help="Also train distilled student models")
+    parser.add_argument('--distill-copies', type=int, default=5,
+                        help="Jittered copies of the training rows used for distillation")
+    parser.add_argument('--repeats', type=int, default=200, help="Single-row latency repetitions")
+    parser.add_argument('--from', dest='source', default='production',
+                        help="Registry version to compress: production (default), latest, best:<metric> or a version")
+    parser.add_argument('--promote', action='store_true', help="Make the exported variant the production model")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 80)
+    print("MODEL COMPRESSION - PENETASAN")
+    print("=" * 80)
+
+    registry = ModelRegistry(models_dir)
+    current = registry.load('penetasan', args.source)
+    model, metadata = current['model'], current['metadata']
+    encoders = [current[f'label_encoder_{name}'] for name in ['media', 'weather', 'season']]
+    label = 'v' + current['version'] if current['version'] else '(legacy files)'
+    if not isinstance(model, GradientBoostingClassifier):
+        # improve_model.py can register a RandomForest or a VotingClassifier
+        print(f"❌ penetasan {label} is a {type(model).__name__}: only GradientBoostingClassifier "
+              "models can be pruned or truncated by stage.")
+        print("   Pick a GradientBoosting version with --from <version>.")
+        raise SystemExit(1)
+    source = current['entry']['source'] if current['entry'] else 'model_penetasan.py'  # legacy flat files
+    if 'train_ids' not in metadata and source != 'model_penetasan.py':
+        # Its training rows differ from model_penetasan.py's split, so that
+        # split's test rows would inflate the accuracy of every variant
+        print(f"❌ penetasan {label} ({source}) did not record its training rows (train_ids), "
+              "so it can't be evaluated on held-out rows.")
+        print("   Retrain it, or pick a version that records them with --from <version>.")
+        raise SystemExit(1)
+    print(f"✓ Baseline: penetasan {label}, "
+          f"{model.estimators_.shape[0]} stages, max_depth={model.max_depth}")
+
+    df_train_raw, X_train, X_test, y_test = load_split(encoders, metadata)
+    if X_test.empty:
+        print("❌ No rows the model was not trained on: nothing to measure accuracy with.")
+        raise SystemExit(1)
+    print(f"✓ Test rows never trained on: {len(X_test)}")
+
+    print("\n⏳ Building variants...")
+    variants = build_variants(model, X_train, df_train_raw, encoders, args)
+
+    print(f"⏳ Measuring {len(variants)} variants...")
+    report = pd.DataFrame([
+        measure(name, variant, model, X_test, y_test, args.repeats)
+        for name, variant in variants.items()
+    ])
+    report['accuracy_delta'] = report['test_accuracy'] - report.loc[0, 'test_accuracy']
+
+    report_path = os.path.join(models_dir, 'compression_report.csv')
+    report.to_csv(report_path, index=False)
+
+    print("\n" + "=" * 80)
+    print("SIZE / LATENCY / ACCURACY TRADE-OFF")
+    print("=" * 80)
+    print(report[[
+        'variant', 'n_trees', 'size_kb', 'latency_p50_ms', 'batch_ms',
+        'test_accuracy', 'accuracy_delta', 'agreement'
+    ]].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print(f"\n✓ Report saved: {os.path.basename(report_path)}")
+
+    choice = select_variant(report, args.max_size_kb, args.max_accuracy_drop)
+    if choice is None:
+        print("\n⚠️  No variant satisfies the size budget and accuracy constraint. Nothing exported.")
+        return
+    if choice['variant'] == 'baseline':
+        print("\n✓ The baseline is already the best variant. Nothing exported.")
+        return
+
+    compact = variants[choice['variant']]
+    compact_metadata = dict(metadata)
+    compact_metadata.update({
+        'test_accuracy': choice['test_accuracy'],
+        'compression': {
+            'variant': choice['variant'],
+            'baseline_test_accuracy': report.loc[0, 'test_accuracy'],
+            'size_kb': choice['size_kb'],
+            'latency_p50_ms': choice['latency_p50_ms'],
+            'n_trees': int(choice['n_trees'])
+        }
+    })
+    version = registry.register(
+        'penetasan',
+        {
+            'model': compact,
+            **{f'label_encoder_{name}': enc for name, enc in zip(['media', 'weather', 'season'], encoders)}
+        },
+        compact_metadata,
+        source='compress_model.py',
+        parent_version=current['version'],
+        tags={'variant': choice['variant'], 'compressed': True},
+        aliases=['production'] if args.promote else []
+    )
+
+    print("\n" + "=" * 80)
+    print(f"🏆 EXPORTED: {choice['variant']}")
+    print(f"   Size: {choice['size_kb']:.0f} KB (baseline {report.loc[0, 'size_kb']:.0f} KB)")
+    print(f"   Accuracy: {choice['test_accuracy']:.2%} (delta {choice['accuracy_delta']:+.2%})")
+    print(f"   Registered: penetasan v{version}" + (" (production)" if args.promote else ""))
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-import joblib
 import numpy as np
 import pandas as pd
 import os
+from ml_utils import ModelRegistry
 
 def load_models():
     """Load semua model dan encoders"""
@@ -9,14 +9,14 @@ def load_models():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     models_dir = os.path.join(script_dir, '..', 'models')
     
-    model_penetasan = joblib.load(os.path.join(models_dir, 'model_penetasan_maggot.pkl'))
-    model_panen = joblib.load(os.path.join(models_dir, 'model_panen_maggot.pkl'))
-    metadata = joblib.load(os.path.join(models_dir, 'model_penetasan_metadata.pkl'))
+    registry = ModelRegistry(models_dir)
+    penetasan = registry.load('penetasan', 'production', artifacts=['model', 'metadata'])
+    panen = registry.load('panen', 'production', artifacts=['model'])
     
     return {
-        'penetasan': model_penetasan,
-        'panen': model_panen,
-        'metadata': metadata
+        'penetasan': penetasan['model'],
+        'panen': panen['model'],
+        'metadata': penetasan['metadata']
     }
 
 def prediksi(jumlah_telur, media, temp, humidity, temp_max, weather, season, makanan, models):
@@ -5,16 +5,23 @@ Script ini mengimplementasikan semua strategi untuk meningkatkan akurasi
 dari 40% ke target 60-70%
 """
 
+import argparse
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-import matplotlib.pyplot as plt
-import seaborn as sns
-import joblib
+from sklearn.base import clone
+from sklearn.utils import Bunch
+from ml_utils import (
+    create_features, load_dataset, PENETASAN_FEATURES,
+    RunProfiler, add_profiling_args, evaluation_path, save_evaluation, run_plotting, add_plot_args,
+    ModelRegistry
+)
+from joblib import Parallel, delayed
 import warnings
+import time
 import os
 warnings.filterwarnings('ignore')
 
@@ -22,7 +29,18 @@ warnings.filterwarnings('ignore')
 script_dir = os.path.dirname(os.path.abspath(__file__))
 models_dir = os.path.join(script_dir, '..', 'models')
 data_dir = os.path.join(script_dir, '..', 'data')
-docs_dir = os.path.join(script_dir, '..', 'docs')
+
+# Worker processes for the model comparison stage (-1 = all cores)
+N_JOBS = int(os.getenv('MAGGOT_N_JOBS', -1))
+CV_FOLDS = 5
+
+parser = add_plot_args(add_profiling_args(
+    argparse.ArgumentParser(description="Compare models and save the improved penetasan model")
+))
+parser.add_argument('--promote', action='store_true',
+                    help="Make the best model the production penetasan model")
+args = parser.parse_args()
+profiler = RunProfiler('model_penetasan_improved', profile_stages=args.profile_stage, output_dir=models_dir)
 
 print("=" * 80)
 print("PENINGKATAN AKURASI MODEL PENETASAN MAGGOT")
@@ -32,13 +50,17 @@ print("=" * 80)
 # 1. LOAD DATA ASLI
 # =====================================================
 print("\n[STEP 1] Loading original data...")
-df_original = pd.read_csv(os.path.join(data_dir, 'dummy_data.csv'), delimiter=';')
+profiler.begin('load_data')
+# All raw columns: the augmented rows are exported as a full dataset (the
+# derived columns are recomputed by create_features)
+df_original = load_dataset(os.path.join(data_dir, 'dummy_data.csv'))
 print(f"✓ Data loaded: {len(df_original)} samples, {len(df_original.columns)} columns")
 
 # =====================================================
 # 2. DATA AUGMENTATION
 # =====================================================
 print("\n[STEP 2] Data Augmentation...")
+profiler.begin('augmentation')
 
 def augment_data(df, target_samples=500):
     """Generate more training data"""
@@ -85,38 +107,7 @@ df_augmented = augment_data(df_original, target_samples=500)
 # 3. FEATURE ENGINEERING
 # =====================================================
 print("\n[STEP 3] Feature Engineering...")
-
-def create_features(df):
-    """Create advanced features"""
-    df = df.copy()
-    
-    # Interaction features
-    df['temp_humidity_idx'] = (df['temp'] * df['humidity']) / 1000
-    df['temp_range'] = df['temp_max'] - df['temp']
-    df['telur_per_temp'] = df['Jumlah_telur_gram'] / df['temp']
-    
-    # Polynomial features
-    df['temp_squared'] = df['temp'] ** 2
-    df['humidity_squared'] = df['humidity'] ** 2
-    
-    # Categorical binning
-    df['temp_level'] = pd.cut(df['temp'], bins=[0, 26, 29, 100], labels=[0, 1, 2])
-    df['humidity_level'] = pd.cut(df['humidity'], bins=[0, 75, 85, 100], labels=[0, 1, 2])
-    
-    # Condition indicators
-    df['optimal_temp'] = ((df['temp'] >= 27) & (df['temp'] <= 30)).astype(int)
-    df['optimal_humidity'] = ((df['humidity'] >= 70) & (df['humidity'] <= 80)).astype(int)
-    df['optimal_condition'] = df['optimal_temp'] * df['optimal_humidity']
-    
-    # Weather-based features
-    df['is_rainy'] = df['weather_main'].isin(['Rain', 'Thunderstorm']).astype(int)
-    df['is_clear'] = (df['weather_main'] == 'Clear').astype(int)
-    
-    # Season features
-    df['is_kemarau'] = (df['season'] == 'Kemarau').astype(int)
-    df['is_hujan'] = (df['season'] == 'Hujan').astype(int)
-    
-    return df
+profiler.begin('feature_engineering')
 
 df_enhanced = create_features(df_augmented)
 new_features = [col for col in df_enhanced.columns if col not in df_original.columns]
@@ -126,6 +117,7 @@ print(f"✓ Created {len(new_features)} new features")
 # 4. PREPROCESSING
 # =====================================================
 print("\n[STEP 4] Preprocessing...")
+profiler.begin('preprocessing')
 
 # Encode categorical
 le_media = LabelEncoder()
@@ -137,18 +129,7 @@ df_enhanced['Weather_Encoded'] = le_weather.fit_transform(df_enhanced['weather_m
 df_enhanced['Season_Encoded'] = le_season.fit_transform(df_enhanced['season'])
 
 # Select features
-feature_cols = [
-    # Original numeric
-    'Jumlah_telur_gram', 'temp', 'humidity', 'temp_max',
-    # Original encoded
-    'Media_Encoded', 'Weather_Encoded', 'Season_Encoded',
-    # New features
-    'temp_humidity_idx', 'temp_range', 'telur_per_temp',
-    'temp_squared', 'humidity_squared',
-    'temp_level', 'humidity_level',
-    'optimal_temp', 'optimal_humidity', 'optimal_condition',
-    'is_rainy', 'is_clear', 'is_kemarau', 'is_hujan'
-]
+feature_cols = list(PENETASAN_FEATURES)
 
 X = df_enhanced[feature_cols]
 y = df_enhanced['Lama_menetas_hari']
@@ -166,6 +147,7 @@ print(f"✓ Total features: {len(feature_cols)}")
 # 5. MODEL COMPARISON
 # =====================================================
 print("\n[STEP 5] Training & Comparing Models...")
+profiler.begin('model_comparison')
 
 models = {
     'Random Forest (Original)': RandomForestClassifier(
@@ -190,62 +172,138 @@ models = {
     )
 }
 
+# Same folds as cross_val_score(cv=5) for a classifier
+cv = StratifiedKFold(n_splits=CV_FOLDS)
+classes = np.unique(y_train)
+
+
+def evaluate_candidate(name, estimator, X_train, y_train, X_test, y_test, cv, classes):
+    """
+    Fit one candidate and collect its out-of-fold probabilities.
+
+    Runs inside a worker process. The out-of-fold probabilities are
+    returned so the soft-voting ensemble can be scored without refitting.
+    """
+    start = time.perf_counter()
+
+    model = clone(estimator).fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    oof_proba = np.zeros((len(X_train), len(classes)))
+    for train_idx, val_idx in cv.split(X_train, y_train):
+        fold_model = clone(estimator).fit(X_train.iloc[train_idx], y_train.iloc[train_idx])
+        # A fold may miss a rare class, so align columns to the global classes
+        cols = np.searchsorted(classes, fold_model.classes_)
+        oof_proba[np.ix_(val_idx, cols)] = fold_model.predict_proba(X_train.iloc[val_idx])
+
+    return {
+        'name': name,
+        'model': model,
+        'train_proba': model.predict_proba(X_train),
+        'test_proba': model.predict_proba(X_test),
+        'oof_proba': oof_proba,
+        'fit_time': fit_time,
+        'wall_time': time.perf_counter() - start
+    }
+
+
+def score_probas(train_proba, test_proba, oof_proba):
+    """Accuracy metrics from predicted probabilities"""
+    fold_scores = [
+        accuracy_score(y_train.iloc[val_idx], classes[oof_proba[val_idx].argmax(axis=1)])
+        for _, val_idx in cv.split(X_train, y_train)
+    ]
+    return {
+        'train_acc': accuracy_score(y_train, classes[train_proba.argmax(axis=1)]),
+        'test_acc': accuracy_score(y_test, classes[test_proba.argmax(axis=1)]),
+        'cv_mean': np.mean(fold_scores),
+        'cv_std': np.std(fold_scores)
+    }
+
+
+print(f"  Training {len(models)} candidates in parallel (n_jobs={N_JOBS})...")
+stage_start = time.perf_counter()
+candidates = Parallel(n_jobs=N_JOBS, backend='loky')(
+    delayed(evaluate_candidate)(name, model, X_train, y_train, X_test, y_test, cv, classes)
+    for name, model in models.items()
+)
+print(f"  ✓ Comparison stage finished in {time.perf_counter() - stage_start:.1f}s")
+
 results = {}
 print("\n" + "-" * 80)
 
-for name, model in models.items():
-    print(f"\nTraining {name}...")
-    
-    # Train
-    model.fit(X_train, y_train)
-    
-    # Evaluate
-    train_acc = model.score(X_train, y_train)
-    test_acc = model.score(X_test, y_test)
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5)
-    
+for cand in candidates:
+    name = cand['name']
     results[name] = {
-        'model': model,
-        'train_acc': train_acc,
-        'test_acc': test_acc,
-        'cv_mean': cv_scores.mean(),
-        'cv_std': cv_scores.std()
+        'model': cand['model'],
+        'fit_time': cand['fit_time'],
+        'wall_time': cand['wall_time'],
+        **score_probas(cand['train_proba'], cand['test_proba'], cand['oof_proba'])
     }
-    
-    print(f"  Train Accuracy: {train_acc:.2%}")
-    print(f"  Test Accuracy:  {test_acc:.2%}")
-    print(f"  CV Score:       {cv_scores.mean():.2%} ± {cv_scores.std():.2%}")
+    res = results[name]
+
+    print(f"\n{name}:")
+    print(f"  Train Accuracy: {res['train_acc']:.2%}")
+    print(f"  Test Accuracy:  {res['test_acc']:.2%}")
+    print(f"  CV Score:       {res['cv_mean']:.2%} ± {res['cv_std']:.2%}")
+    print(f"  Fit Time:       {res['fit_time']:.1f}s")
+    print(f"  Wall Time:      {res['wall_time']:.1f}s (fit + CV)")
 
 # =====================================================
 # 6. ENSEMBLE MODEL
 # =====================================================
 print("\n[STEP 6] Creating Ensemble Model...")
+profiler.begin('ensemble')
+
+
+def build_prefitted_voting(named_estimators, classes):
+    """
+    Assemble a soft VotingClassifier from already fitted estimators.
+
+    Sets the attributes VotingClassifier.fit() would set, so the result
+    predicts and pickles like a normally fitted ensemble.
+    """
+    voting = VotingClassifier(estimators=list(named_estimators.items()), voting='soft')
+    voting.estimators_ = list(named_estimators.values())
+    voting.named_estimators_ = Bunch(**named_estimators)
+    voting.le_ = LabelEncoder().fit(classes)
+    voting.classes_ = voting.le_.classes_
+    return voting
+
+
+ensemble_start = time.perf_counter()
+by_name = {cand['name']: cand for cand in candidates}
+members = [
+    ('rf', 'Random Forest (Original)'),
+    ('rf_deep', 'Random Forest (Deep)'),
+    ('gb', 'Gradient Boosting')
+]
 
-ensemble = VotingClassifier(
-    estimators=[
-        ('rf', models['Random Forest (Original)']),
-        ('rf_deep', models['Random Forest (Deep)']),
-        ('gb', models['Gradient Boosting'])
-    ],
-    voting='soft'
+ensemble = build_prefitted_voting(
+    {alias: by_name[name]['model'] for alias, name in members},
+    classes
 )
 
-ensemble.fit(X_train, y_train)
-ensemble_train_acc = ensemble.score(X_train, y_train)
-ensemble_test_acc = ensemble.score(X_test, y_test)
-ensemble_cv_scores = cross_val_score(ensemble, X_train, y_train, cv=5)
+# Soft voting == mean of member probabilities (fold-wise for CV)
+ensemble_scores = score_probas(
+    np.mean([by_name[name]['train_proba'] for _, name in members], axis=0),
+    np.mean([by_name[name]['test_proba'] for _, name in members], axis=0),
+    np.mean([by_name[name]['oof_proba'] for _, name in members], axis=0)
+)
 
+# Training time of the ensemble = its members' fits; assembling it is ~0s
 results['Ensemble (Voting)'] = {
     'model': ensemble,
-    'train_acc': ensemble_train_acc,
-    'test_acc': ensemble_test_acc,
-    'cv_mean': ensemble_cv_scores.mean(),
-    'cv_std': ensemble_cv_scores.std()
+    'fit_time': sum(by_name[name]['fit_time'] for _, name in members),
+    'wall_time': time.perf_counter() - ensemble_start,
+    'assembled': True,
+    **ensemble_scores
 }
 
-print(f"  Train Accuracy: {ensemble_train_acc:.2%}")
-print(f"  Test Accuracy:  {ensemble_test_acc:.2%}")
-print(f"  CV Score:       {ensemble_cv_scores.mean():.2%} ± {ensemble_cv_scores.std():.2%}")
+print("  ✓ Reused base estimators and CV predictions (no refit)")
+print(f"  Train Accuracy: {ensemble_scores['train_acc']:.2%}")
+print(f"  Test Accuracy:  {ensemble_scores['test_acc']:.2%}")
+print(f"  CV Score:       {ensemble_scores['cv_mean']:.2%} ± {ensemble_scores['cv_std']:.2%}")
 
 # =====================================================
 # 7. SELECT BEST MODEL
@@ -257,18 +315,22 @@ print("=" * 80)
 # Sort by test accuracy
 sorted_results = sorted(results.items(), key=lambda x: x[1]['test_acc'], reverse=True)
 
-print("\n{:<30} {:<15} {:<15} {:<20}".format(
-    "Model", "Train Acc", "Test Acc", "CV Score"
+print("\n{:<30} {:<12} {:<12} {:<18} {:<10} {:<18}".format(
+    "Model", "Train Acc", "Test Acc", "CV Score", "Fit Time", "Wall Time"
 ))
-print("-" * 80)
+print("-" * 104)
 
 for name, res in sorted_results:
-    print("{:<30} {:<15} {:<15} {:<20}".format(
+    print("{:<30} {:<12} {:<12} {:<18} {:<10} {:<18}".format(
         name,
         f"{res['train_acc']:.2%}",
         f"{res['test_acc']:.2%}",
-        f"{res['cv_mean']:.2%} ± {res['cv_std']:.2%}"
+        f"{res['cv_mean']:.2%} ± {res['cv_std']:.2%}",
+        f"{res['fit_time']:.1f}s" + (" (Σ)" if res.get('assembled') else ""),
+        f"{res['wall_time']:.1f}s" + (" (assembly)" if res.get('assembled') else " (fit + CV)")
     ))
+if any(res.get('assembled') for res in results.values()):
+    print("(Σ) ensemble fit time = sum of its members' fits; its wall time is only the assembly")
 
 best_model_name = sorted_results[0][0]
 best_model = sorted_results[0][1]['model']
@@ -283,6 +345,7 @@ print("=" * 80)
 # 8. DETAILED EVALUATION
 # =====================================================
 print("\n[STEP 7] Detailed Evaluation of Best Model...")
+profiler.begin('evaluation')
 
 y_pred = best_model.predict(X_test)
 
@@ -323,18 +386,9 @@ elif hasattr(best_model, 'estimators_'):
 # 9. SAVE IMPROVED MODEL
 # =====================================================
 print("\n[STEP 8] Saving Improved Model...")
+profiler.begin('saving')
 
-# Save best model
-joblib.dump(best_model, os.path.join(models_dir, 'model_penetasan_improved.pkl'))
-print("✓ Model saved: model_penetasan_improved.pkl")
-
-# Save encoders
-joblib.dump(le_media, os.path.join(models_dir, 'label_encoder_media_improved.pkl'))
-joblib.dump(le_weather, os.path.join(models_dir, 'label_encoder_weather_improved.pkl'))
-joblib.dump(le_season, os.path.join(models_dir, 'label_encoder_season_improved.pkl'))
-print("✓ Encoders saved")
-
-# Save metadata
+# Save best model + encoders as a new penetasan version in the registry
 metadata = {
     'model_name': best_model_name,
     'feature_columns': feature_cols,
@@ -342,13 +396,34 @@ metadata = {
     'cv_mean': sorted_results[0][1]['cv_mean'],
     'cv_std': sorted_results[0][1]['cv_std'],
     'num_training_samples': len(X_train),
+    # Augmented rows keep the id of the row they were derived from
+    'train_ids': sorted(set(df_enhanced.loc[X_train.index, 'id'].astype(int).tolist())),
     'num_features': len(feature_cols),
     'media_mapping': dict(zip(le_media.classes_, le_media.transform(le_media.classes_))),
     'weather_mapping': dict(zip(le_weather.classes_, le_weather.transform(le_weather.classes_))),
     'season_mapping': dict(zip(le_season.classes_, le_season.transform(le_season.classes_)))
 }
-joblib.dump(metadata, os.path.join(models_dir, 'model_penetasan_improved_metadata.pkl'))
-print("✓ Metadata saved")
+
+registry = ModelRegistry(models_dir)
+version = registry.register(
+    'penetasan',
+    {
+        'model': best_model,
+        'label_encoder_media': le_media,
+        'label_encoder_weather': le_weather,
+        'label_encoder_season': le_season
+    },
+    metadata,
+    source='improve_model.py',
+    train_time_seconds=sorted_results[0][1]['fit_time'],
+    tags={'candidate': best_model_name, 'augmented': True},
+    aliases=['production'] if args.promote else []
+)
+print(f"✓ Model, encoders and metadata registered: penetasan v{version}")
+if args.promote:
+    print("✓ Promoted to production")
+else:
+    print("  (serve it with --promote, or: python model_registry.py promote penetasan " + version + ")")
 
 # Save augmented data
 df_enhanced.to_csv(os.path.join(data_dir, 'dummy_data_augmented.csv'), index=False, sep=';')
@@ -358,61 +433,25 @@ print("✓ Augmented data saved: dummy_data_augmented.csv")
 # 10. VISUALIZATIONS
 # =====================================================
 print("\n[STEP 9] Creating Visualizations...")
+profiler.begin('plotting')
 
-fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-
-# 1. Model Comparison
-ax1 = axes[0, 0]
-model_names = [name for name, _ in sorted_results]
-accuracies = [res['test_acc'] * 100 for _, res in sorted_results]
-colors = ['green' if acc == max(accuracies) else 'steelblue' for acc in accuracies]
-
-ax1.barh(model_names, accuracies, color=colors, alpha=0.8)
-ax1.set_xlabel('Test Accuracy (%)')
-ax1.set_title('Model Comparison', fontweight='bold', fontsize=12)
-ax1.axvline(x=40, color='red', linestyle='--', label='Original (40%)')
-ax1.legend()
-
-# 2. Confusion Matrix
-ax2 = axes[0, 1]
-sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', ax=ax2, cbar_kws={'label': 'Count'})
-ax2.set_title('Confusion Matrix - Best Model', fontweight='bold', fontsize=12)
-ax2.set_xlabel('Predicted')
-ax2.set_ylabel('Actual')
-
-# 3. Training History (comparison)
-ax3 = axes[1, 0]
-x_pos = np.arange(len(model_names))
-train_accs = [res['train_acc'] * 100 for _, res in sorted_results]
-test_accs = [res['test_acc'] * 100 for _, res in sorted_results]
-
-width = 0.35
-ax3.bar(x_pos - width/2, train_accs, width, label='Train', alpha=0.8, color='lightblue')
-ax3.bar(x_pos + width/2, test_accs, width, label='Test', alpha=0.8, color='orange')
-ax3.set_xticks(x_pos)
-ax3.set_xticklabels(model_names, rotation=45, ha='right')
-ax3.set_ylabel('Accuracy (%)')
-ax3.set_title('Train vs Test Accuracy', fontweight='bold', fontsize=12)
-ax3.legend()
-ax3.grid(axis='y', alpha=0.3)
-
-# 4. Feature Importance (if available)
-ax4 = axes[1, 1]
+eval_arrays = {
+    'model_names': [name for name, _ in sorted_results],
+    'train_acc': [res['train_acc'] for _, res in sorted_results],
+    'test_acc': [res['test_acc'] for _, res in sorted_results],
+    'cm': cm
+}
 if 'feature_importance' in locals():
-    top_features = feature_importance.head(10)
-    colors_fi = plt.cm.viridis(np.linspace(0, 1, len(top_features)))
-    ax4.barh(top_features['Feature'], top_features['Importance'], color=colors_fi)
-    ax4.set_xlabel('Importance')
-    ax4.set_title('Top 10 Feature Importance', fontweight='bold', fontsize=12)
-    ax4.invert_yaxis()
-else:
-    ax4.text(0.5, 0.5, 'Feature importance\nnot available\nfor this model type',
-             ha='center', va='center', fontsize=12, transform=ax4.transAxes)
-    ax4.set_title('Feature Importance', fontweight='bold', fontsize=12)
+    eval_arrays['feature_names'] = feature_importance['Feature'].values
+    eval_arrays['feature_importances'] = feature_importance['Importance'].values
+
+eval_file = save_evaluation(evaluation_path(models_dir, 'model_penetasan_improved'), **eval_arrays)
+print(f"✓ Evaluation arrays saved: {os.path.basename(eval_file)}")
+run_plotting('improved', args.plot, eval_file, dpi=args.plot_dpi)
 
-plt.tight_layout()
-plt.savefig('../docs/model_improvement_results.png', dpi=300, bbox_inches='tight')
-print("✓ Visualization saved: model_improvement_results.png")
+profiler.extra.update({'num_samples': len(df_enhanced), 'n_jobs': N_JOBS, 'registry_version': version})
+run_report = os.path.join(models_dir, 'model_penetasan_improved_run_report.json')
+profiler.save(run_report)
 
 # =====================================================
 # 11. SUMMARY
@@ -449,10 +488,12 @@ Key Success Factors:
 print("=" * 80)
 print("DONE! Model berhasil ditingkatkan.")
 print("=" * 80)
-print(f"\nFiles generated:")
-print("  - model_penetasan_improved.pkl")
-print("  - label_encoder_*_improved.pkl")
-print("  - model_penetasan_improved_metadata.pkl")
-print("  - dummy_data_augmented.csv")
-print("  - model_improvement_results.png")
+print("\nFiles generated:")
+print(f"  - {os.path.relpath(os.path.join(registry.root, 'penetasan', version), script_dir)}/ "
+      "(model, label encoders, metadata)")
+print(f"  - {os.path.relpath(eval_file, script_dir)}")
+print(f"  - {os.path.relpath(run_report, script_dir)}")
+print(f"  - {os.path.relpath(os.path.join(data_dir, 'dummy_data_augmented.csv'), script_dir)}")
+if args.plot != 'skip':
+    print(f"  - ../docs/model_improvement_results.png (plot_evaluasi.py, {args.plot})")
 print("\nGunakan model baru ini untuk prediksi yang lebih akurat!")
@@ -0,0 +1,455 @@
+"""
+Incremental Retraining - Penetasan & Panen
+==========================================
+Daily farm batches are appended to a persisted training store
+(../data/training_store.parquet) and the current models continue boosting
+or grow their forest (warm start) on the updated store instead of being
+retrained from scratch.
+A full refit only happens when drift is detected (unseen categories/classes,
+accuracy drop, feature shift) or when the current model can't warm start
+(the VotingClassifier from improve_model.py).
+
+Every run registers a new version in the model registry
+(../models/registry/<name>/<version>/), continuing from the production
+version (or the one chosen with --from).
+With --promote the new version also becomes the production model.
+
+Usage:
+    python incremental_training.py --new ../data/batch_harian.csv
+    python incremental_training.py --new batch.csv --model panen --extra-trees 30
+    python incremental_training.py --new batch.csv --force-refit --promote
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, mean_absolute_error, mean_squared_error, r2_score
+from sklearn.preprocessing import LabelEncoder
+
+from ml_utils import (
+    create_features,
+    encode_categoricals,
+    RAW_COLUMNS,
+    PENETASAN_FEATURES,
+    PANEN_FEATURES,
+    load_dataset,
+    save_dataset,
+    HAS_PYARROW,
+    ModelRegistry
+)
+
+# Get the directory where this script is located
+script_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(script_dir, '..', 'models')
+data_dir = os.path.join(script_dir, '..', 'data')
+
+# Columnar store when pyarrow is available, semicolon CSV otherwise
+STORE_PATH = os.path.join(data_dir, 'training_store.parquet' if HAS_PYARROW else 'training_store.csv')
+LEGACY_STORE_PATH = os.path.join(data_dir, 'training_store.csv')
+SEED_PATH = os.path.join(data_dir, 'dummy_data.csv')
+
+# Numeric inputs watched for covariate shift
+SHIFT_COLUMNS = {
+    'penetasan': ['Jumlah_telur_gram', 'temp', 'humidity', 'temp_max'],
+    'panen': ['Jumlah_telur_gram', 'Makanan_gram']
+}
+
+ENCODER_NAMES = ['media', 'weather', 'season']
+
+# Metadata keys written by evaluate(), per model
+EVAL_KEYS = {
+    'penetasan': ['test_accuracy'],
+    'panen': ['mae', 'rmse', 'r2_score', 'mape']
+}
+
+
+# ==================== TRAINING STORE ====================
+
+def load_store():
+    """Load the persisted training store (seeded from dummy_data.csv on first run)"""
+    for path in (STORE_PATH, LEGACY_STORE_PATH):
+        if os.path.exists(path):
+            return load_dataset(path, columns=RAW_COLUMNS)
+
+    print(f"  Training store not found, seeding from {os.path.basename(SEED_PATH)}")
+    return load_dataset(SEED_PATH, columns=RAW_COLUMNS)
+
+
+def load_new_rows(path, store):
+    """Load new farm records and drop rows already present in the store"""
+    new_rows = pd.read_csv(path, delimiter=';')
+
+    missing = [c for c in RAW_COLUMNS if c != 'id' and c not in new_rows.columns]
+    if missing:
+        raise ValueError(f"New batch is missing columns: {missing}")
+
+    if 'id' not in new_rows.columns:
+        new_rows['id'] = np.nan
+
+    # Skip rows that were already ingested (re-running the same batch),
+    # matched by id or, for batches without ids, by their recorded values
+    value_cols = [c for c in RAW_COLUMNS if c != 'id']
+    same_values = new_rows[value_cols].merge(
+        store[value_cols].drop_duplicates(), how='left', indicator=True
+    )['_merge'].eq('both').values
+    known = new_rows['id'].isin(store['id']).values | same_values
+    if known.any():
+        print(f"  Skipping {known.sum()} rows already in the training store")
+        new_rows = new_rows[~known]
+
+    # Assign ids to rows that don't carry one
+    no_id = new_rows['id'].isna()
+    if no_id.any():
+        next_id = int(store['id'].max()) + 1
+        new_rows.loc[no_id, 'id'] = np.arange(next_id, next_id + no_id.sum())
+    new_rows['id'] = new_rows['id'].astype(int)
+
+    return new_rows[RAW_COLUMNS].reset_index(drop=True)
+
+
+def split_store(store):
+    """
+    Deterministic train/test split keyed on the row id.
+
+    A row stays in the same split across runs, so the test rows never leak
+    into the trees added by later warm starts. Rows the parent version was
+    trained on (its metadata 'train_ids') are excluded from evaluation
+    separately, see held_out_rows().
+    """
+    is_test = pd.util.hash_pandas_object(store['id'], index=False).values % 5 == 0
+    return store[~is_test], store[is_test]
+
+
+def held_out_rows(test_df, train_df, parent_metadata, mode):
+    """
+    Rows the new version has never seen, and the ids it was trained on
+
+    A refit only saw train_df. A warm-started model keeps the parent's
+    trees, so the parent's training rows (e.g. model_penetasan.py's random
+    split) are excluded too.
+
+    Returns:
+        (evaluation rows, train ids); (None, None) when the parent did not
+        record its training rows
+    """
+    train_ids = set(train_df['id'].tolist())
+    if mode == 'refit':
+        return test_df, train_ids
+
+    parent_ids = parent_metadata.get('train_ids')
+    if parent_ids is None:
+        return None, None
+    return test_df[~test_df['id'].isin(parent_ids)], train_ids | set(parent_ids)
+
+
+# ==================== ARTIFACTS ====================
+
+def load_current(registry, name, selector='production'):
+    """Load the model, metadata (and encoders for penetasan) to continue from"""
+    try:
+        current = registry.load(name, selector)
+    except (KeyError, FileNotFoundError):
+        if registry.versions(name):
+            raise  # e.g. no version promoted to production yet
+        raise FileNotFoundError(
+            f"No {name} model in the registry. "
+            f"Train the base model first (model_{'penetasan' if name == 'penetasan' else 'panen_maggot'}.py)."
+        )
+
+    if name == 'penetasan':
+        current['encoders'] = {enc: current.pop(f'label_encoder_{enc}') for enc in ENCODER_NAMES}
+
+    print(f"  Current {name} model: {'v' + current['version'] if current['version'] else 'legacy files'} "
+          f"({type(current['model']).__name__}, {n_trees(current['model'])} trees)")
+    return current
+
+
+def save_version(registry, name, model, metadata, encoders=None, parent_version=None,
+                 train_time=None, update_mode=None, promote=False):
+    """Register the new version (and optionally make it the production model)"""
+    artifacts = {'model': model}
+    for enc_name, encoder in (encoders or {}).items():
+        artifacts[f'label_encoder_{enc_name}'] = encoder
+
+    version = registry.register(
+        name, artifacts, metadata,
+        source='incremental_training.py',
+        parent_version=parent_version,
+        train_time_seconds=train_time,
+        tags={'update_mode': update_mode},
+        aliases=['production'] if promote else []
+    )
+    print(f"✓ Registered: {name} v{version}")
+    if promote:
+        print(f"✓ Promoted {name} v{version} to production")
+    return version
+
+
+# ==================== DRIFT DETECTION ====================
+
+def detect_drift(name, current, store, new_rows, args):
+    """
+    Decide whether warm start is safe or a full refit is needed
+
+    Returns:
+        List of drift reasons (empty = no drift)
+    """
+    reasons = []
+    model = current['model']
+    metadata = current['metadata']
+
+    # Unseen categories / classes can't be handled by adding trees
+    if name == 'penetasan':
+        for enc_name, column in zip(ENCODER_NAMES, ['Media_Telur', 'weather_main', 'season']):
+            unseen = set(new_rows[column]) - set(current['encoders'][enc_name].classes_)
+            if unseen:
+                reasons.append(f"unseen {column}: {sorted(unseen)}")
+
+        new_classes = set(new_rows['Lama_menetas_hari']) - set(model.classes_)
+        if new_classes:
+            reasons.append(f"unseen target classes: {sorted(new_classes)}")
+
+    # Covariate shift: standardized mean difference against the store
+    if len(new_rows) >= args.min_shift_rows:
+        for column in SHIFT_COLUMNS[name]:
+            std = store[column].std()
+            if std > 0:
+                shift = abs(new_rows[column].mean() - store[column].mean()) / std
+                if shift > args.shift_threshold:
+                    reasons.append(f"{column} mean shifted by {shift:.2f} std")
+
+    # Performance drift: current model on the new rows
+    if not reasons and len(new_rows) >= args.min_eval_rows:
+        X_new, y_new = build_xy(name, new_rows, current.get('encoders'))
+        y_pred = model.predict(X_new)
+
+        # Versions without a held-out metric (see held_out_rows) skip this check
+        if name == 'penetasan':
+            acc = accuracy_score(y_new, y_pred)
+            baseline = metadata.get('test_accuracy')
+            if baseline is not None and acc < baseline - args.tolerance:
+                reasons.append(f"accuracy on new rows {acc:.2%} < {baseline:.2%} - {args.tolerance:.0%}")
+        else:
+            mae = mean_absolute_error(y_new, y_pred)
+            baseline = metadata.get('mae')
+            if baseline is not None and mae > baseline * (1 + args.tolerance):
+                reasons.append(f"MAE on new rows {mae:.1f}g > {baseline:.1f}g + {args.tolerance:.0%}")
+
+    return reasons
+
+
+# ==================== TRAINING ====================
+
+def build_xy(name, df, encoders=None):
+    """Feature matrix and target for one model"""
+    if name == 'penetasan':
+        df = encode_categoricals(
+            create_features(df),
+            encoders['media'], encoders['weather'], encoders['season']
+        )
+        return df[PENETASAN_FEATURES], df['Lama_menetas_hari']
+    return df[PANEN_FEATURES], df['Jumlah_panen_gram']
+
+
+def n_trees(model):
+    """Trees of an ensemble (summed over the members of a voting ensemble)"""
+    members = getattr(model, 'named_estimators_', None)
+    if members:
+        return sum(n_trees(member) for member in members.values())
+    return getattr(model, 'n_estimators', 1)
+
+
+def can_warm_start(model):
+    """GradientBoosting adds boosting stages, RandomForest adds trees; a voting ensemble can't"""
+    return {'warm_start', 'n_estimators'} <= set(model.get_params(deep=False))
+
+
+def warm_start(model, X, y, extra_trees):
+    """Continue boosting / add trees to the existing ensemble"""
+    model.set_params(warm_start=True, n_estimators=model.n_estimators + extra_trees)
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    return model
+
+
+def refit(model, base_n_estimators, X, y):
+    """Full refit with the same hyperparameters as the current model"""
+    fresh = clone(model)
+    # A voting ensemble has neither parameter (its members are refit as they are)
+    params = {'warm_start': False, 'n_estimators': base_n_estimators}
+    fresh.set_params(**{k: v for k, v in params.items() if k in fresh.get_params(deep=False)})
+    return fresh.fit(X, y)
+
+
+def evaluate(name, model, X_test, y_test):
+    """Metrics in the same shape as the base training scripts' metadata"""
+    y_pred = model.predict(X_test)
+
+    if name == 'penetasan':
+        return {'test_accuracy': accuracy_score(y_test, y_pred)}
+
+    mse = mean_squared_error(y_test, y_pred)
+    return {
+        'mae': mean_absolute_error(y_test, y_pred),
+        'rmse': np.sqrt(mse),
+        'r2_score': r2_score(y_test, y_pred),
+        'mape': np.mean(np.abs((y_test - y_pred) / y_test)) * 100
+    }
+
+
+def update_model(registry, name, store, new_rows, args):
+    """Warm start or refit one model and register its new version"""
+    print("\n" + "=" * 60)
+    print(f"MODEL {name.upper()}")
+    print("=" * 60)
+
+    start = time.time()
+    current = load_current(registry, name, args.source)
+    model = current['model']
+    metadata = dict(current['metadata'])
+    encoders = current.get('encoders')
+    base_n_estimators = metadata.get('base_n_estimators', getattr(model, 'n_estimators', None))
+
+    reasons = ['--force-refit'] if args.force_refit else detect_drift(name, current, store, new_rows, args)
+
+    combined = pd.concat([store, new_rows], ignore_index=True)
+    train_df, test_df = split_store(combined)
+
+    if reasons and name == 'penetasan':
+        # Categories may have changed, so the encoders are refit on the full store
+        encoders = {
+            enc_name: LabelEncoder().fit(combined[column])
+            for enc_name, column in zip(ENCODER_NAMES, ['Media_Telur', 'weather_main', 'season'])
+        }
+
+    X_train, y_train = build_xy(name, train_df, encoders)
+    X_test, y_test = build_xy(name, test_df, encoders)
+
+    # Warm start can't add target classes to an existing classifier
+    if not reasons and name == 'penetasan' and set(y_train) != set(model.classes_):
+        reasons.append("target classes in training split changed")
+
+    # e.g. the VotingClassifier registered by improve_model.py
+    if not reasons and not can_warm_start(model):
+        reasons.append(f"{type(model).__name__} can't warm start (no warm_start/n_estimators)")
+
+    if reasons:
+        print("  ⚠️  Full refit:")
+        for reason in reasons:
+            print(f"     - {reason}")
+        model = refit(model, base_n_estimators, X_train, y_train)
+        mode = 'refit'
+    else:
+        print(f"  ✓ No drift -> warm start (+{args.extra_trees} trees)")
+        model = warm_start(model, X_train, y_train, args.extra_trees)
+        mode = 'warm_start'
+
+    train_time = time.time() - start
+    eval_df, train_ids = held_out_rows(test_df, train_df, current['metadata'], mode)
+    for key in EVAL_KEYS[name] + ['train_ids', 'unverified_metrics']:
+        metadata.pop(key, None)  # the parent's values
+    if eval_df is not None and len(eval_df):
+        metrics = evaluate(name, model, *build_xy(name, eval_df, encoders))
+        metadata.update(metrics)
+    else:
+        # The test split may contain rows the model was trained on: keep the
+        # score out of the metrics used by best:<metric> and the drift check
+        reason = "no test rows left" if eval_df is not None else \
+            f"{'v' + current['version'] if current['version'] else 'legacy model'} did not record its training rows"
+        print(f"  ⚠️  No held-out rows ({reason}): metrics saved as unverified_metrics")
+        eval_df = test_df
+        metrics = evaluate(name, model, X_test, y_test)
+        metadata['unverified_metrics'] = metrics
+    if train_ids is not None:
+        metadata['train_ids'] = sorted(train_ids)
+
+    metadata.update({
+        'parent_version': current['version'],
+        'update_mode': mode,
+        'drift_reasons': reasons,
+        'n_estimators': n_trees(model),
+        'base_n_estimators': base_n_estimators,
+        'num_training_samples': len(X_train),
+        'num_eval_samples': len(eval_df),
+        'num_new_samples': len(new_rows),
+        'split': 'id_hash',
+        'train_time_seconds': train_time,
+        'trained_at': datetime.now().isoformat()
+    })
+    if name == 'penetasan':
+        # CV is skipped for incremental updates; keep the last full CV estimate
+        metadata['cv_from_version'] = current['metadata'].get('cv_from_version', current['version'])
+        for enc_name, key in zip(ENCODER_NAMES, ['media_mapping', 'weather_mapping', 'season_mapping']):
+            le = encoders[enc_name]
+            metadata[key] = dict(zip(le.classes_, le.transform(le.classes_)))
+
+    print(f"  Evaluated on {len(eval_df)} rows" + (" (not held-out)" if "unverified_metrics" in metadata else " never trained on"))
+    for key, value in metrics.items():
+        fmt = f"{value:.2%}" if key == 'test_accuracy' else f"{value:.4f}"
+        print(f"  {key}: {fmt}")
+    print(f"  Trees: {n_trees(model)} | Time: {train_time:.1f}s")
+
+    version = save_version(
+        registry, name, model, metadata, encoders if name == 'penetasan' else None,
+        parent_version=current['version'], train_time=train_time, update_mode=mode, promote=args.promote
+    )
+    return version, mode
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Incremental retraining for penetasan/panen models")
+    parser.add_argument('--new', required=True, help="CSV (;) with new farm records")
+    parser.add_argument('--model', choices=['penetasan', 'panen', 'all'], default='all')
+    parser.add_argument('--extra-trees', type=int, default=20,
+                        help="Trees/boosting stages added per warm start (default: 20)")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Allowed accuracy drop / relative MAE increase before refit (default: 0.10)")
+    parser.add_argument('--shift-threshold', type=float, default=0.5,
+                        help="Mean shift in store std units that triggers refit (default: 0.5)")
+    parser.add_argument('--min-eval-rows', type=int, default=10,
+                        help="Minimum new rows for the performance drift check")
+    parser.add_argument('--min-shift-rows', type=int, default=30,
+                        help="Minimum new rows for the covariate shift check")
+    parser.add_argument('--from', dest='source', default='production',
+                        help="Registry version to continue from: production (default), latest, best:<metric> or a version")
+    parser.add_argument('--force-refit', action='store_true', help="Always refit from scratch")
+    parser.add_argument('--promote', action='store_true',
+                        help="Make the new versions the production models used by the API/scripts")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 60)
+    print("INCREMENTAL RETRAINING")
+    print("=" * 60)
+
+    store = load_store()
+    new_rows = load_new_rows(args.new, store)
+    print(f"✓ Training store: {len(store)} rows | New rows: {len(new_rows)}")
+
+    if new_rows.empty:
+        print("Nothing to do: no new rows.")
+        return
+
+    registry = ModelRegistry(models_dir)
+    names = ['penetasan', 'panen'] if args.model == 'all' else [args.model]
+    results = {name: update_model(registry, name, store, new_rows, args) for name in names}
+
+    # Persist the store only after every model was updated successfully
+    save_dataset(pd.concat([store, new_rows], ignore_index=True), STORE_PATH)
+    print(f"\n✓ Training store updated: {len(store) + len(new_rows)} rows")
+
+    print("\n" + "=" * 60)
+    print("SELESAI! " + ", ".join(f"{n} v{v} ({m})" for n, (v, m) in results.items()))
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
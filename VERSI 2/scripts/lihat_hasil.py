@@ -1,14 +1,15 @@
-import joblib
 import os
 from pathlib import Path
+from ml_utils import ModelRegistry
 
 # Get the script's directory and construct absolute paths
 script_dir = Path(__file__).parent
 models_dir = script_dir.parent / 'models'
 
-# Load metadata
-m = joblib.load(models_dir / 'model_penetasan_metadata.pkl')
-m2 = joblib.load(models_dir / 'model_panen_metadata.pkl')
+# Load metadata of the production models (model pkls are not unpickled)
+registry = ModelRegistry(str(models_dir))
+m = registry.load('penetasan', 'production', artifacts=['metadata'])['metadata']
+m2 = registry.load('panen', 'production', artifacts=['metadata'])['metadata']
 
 print("=" * 60)
 print("HASIL TRAINING MODEL")
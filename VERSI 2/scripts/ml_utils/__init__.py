@@ -0,0 +1,54 @@
+"""
+Maggot ML - Shared Training Utilities
+"""
+
+from .features import (
+    create_features,
+    encode_categoricals,
+    RAW_COLUMNS,
+    PENETASAN_FEATURES,
+    PANEN_FEATURES
+)
+from .dataset import (
+    load_dataset,
+    iter_dataset,
+    save_dataset,
+    read_csv_typed,
+    convert_csv_to_parquet,
+    PENETASAN_COLUMNS,
+    PANEN_COLUMNS,
+    HAS_PYARROW
+)
+from .profiling import RunProfiler, add_profiling_args
+from .registry import ModelRegistry
+from .evaluation import (
+    evaluation_path,
+    save_evaluation,
+    load_evaluation,
+    run_plotting,
+    add_plot_args
+)
+
+__all__ = [
+    'create_features',
+    'encode_categoricals',
+    'RAW_COLUMNS',
+    'PENETASAN_FEATURES',
+    'PANEN_FEATURES',
+    'load_dataset',
+    'iter_dataset',
+    'save_dataset',
+    'read_csv_typed',
+    'convert_csv_to_parquet',
+    'PENETASAN_COLUMNS',
+    'PANEN_COLUMNS',
+    'HAS_PYARROW',
+    'RunProfiler',
+    'add_profiling_args',
+    'ModelRegistry',
+    'evaluation_path',
+    'save_evaluation',
+    'load_evaluation',
+    'run_plotting',
+    'add_plot_args'
+]
@@ -0,0 +1,169 @@
+"""
+Columnar Dataset Storage
+Typed Parquet copy of the semicolon CSV with column projection and
+row-group / chunked reads. Falls back to a typed CSV read when pyarrow
+is not installed or the Parquet copy is missing/outdated.
+"""
+
+import os
+
+import pandas as pd
+
+from .features import RAW_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data')
+DEFAULT_CSV = os.path.join(DATA_DIR, 'dummy_data.csv')
+
+# Raw columns only; derived features are recomputed by create_features()
+COLUMN_DTYPES = {
+    'id': 'int32',
+    'Jumlah_telur_gram': 'float64',
+    'Media_Telur': 'category',
+    'Lama_menetas_hari': 'int16',
+    'Makanan_gram': 'float64',
+    'Jumlah_panen_gram': 'float64',
+    'temp': 'float64',
+    'humidity': 'float64',
+    'temp_max': 'float64',
+    'weather_main': 'category',
+    'month': 'int8',
+    'season': 'category'
+}
+
+# Columns each consumer actually reads
+PENETASAN_COLUMNS = [
+    'Jumlah_telur_gram', 'Media_Telur', 'temp', 'humidity', 'temp_max',
+    'weather_main', 'season', 'Lama_menetas_hari'
+]
+PANEN_COLUMNS = ['Jumlah_telur_gram', 'Makanan_gram', 'Jumlah_panen_gram']
+
+
+def parquet_path_for(csv_path: str) -> str:
+    """data/foo.csv -> data/foo.parquet"""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def _csv_dtypes(columns=None):
+    names = columns or RAW_COLUMNS
+    return {c: COLUMN_DTYPES[c] for c in names if c in COLUMN_DTYPES}
+
+
+def read_csv_typed(csv_path: str, columns=None, chunksize: int = None):
+    """
+    Read the semicolon CSV with explicit dtypes and column projection
+
+    Args:
+        csv_path: Path to CSV file (delimiter ';')
+        columns: Columns to read (default: all raw columns)
+        chunksize: Return an iterator of DataFrames of this many rows
+    """
+    return pd.read_csv(
+        csv_path,
+        delimiter=';',
+        usecols=columns or RAW_COLUMNS,
+        dtype=_csv_dtypes(columns),
+        chunksize=chunksize
+    )
+
+
+def save_dataset(df: pd.DataFrame, path: str, row_group_size: int = 50_000):
+    """
+    Write a DataFrame as typed Parquet (or CSV if the path ends with .csv)
+
+    Args:
+        df: DataFrame with raw columns
+        path: Output path (.parquet or .csv)
+        row_group_size: Rows per Parquet row group
+    """
+    if path.endswith('.csv'):
+        df.to_csv(path, sep=';', index=False)
+        return path
+
+    if not HAS_PYARROW:
+        raise ImportError("pyarrow is required for Parquet output: pip install pyarrow")
+
+    typed = df.astype({c: t for c, t in COLUMN_DTYPES.items() if c in df.columns})
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+    pq.write_table(table, path, row_group_size=row_group_size, compression='zstd')
+    return path
+
+
+def convert_csv_to_parquet(csv_path: str = DEFAULT_CSV, parquet_path: str = None,
+                           row_group_size: int = 50_000) -> str:
+    """
+    Convert the semicolon CSV into the typed columnar format
+
+    Only the raw columns are kept; media, weather and season become
+    dictionary-encoded categoricals.
+
+    Returns:
+        Path of the written Parquet file
+    """
+    parquet_path = parquet_path or parquet_path_for(csv_path)
+    df = read_csv_typed(csv_path)
+    return save_dataset(df, parquet_path, row_group_size=row_group_size)
+
+
+def resolve_dataset_path(path: str = None) -> str:
+    """
+    Pick the file to read for a dataset
+
+    A .csv path is redirected to its Parquet copy when pyarrow is available
+    and the copy is at least as new as the CSV.
+    """
+    path = path or DEFAULT_CSV
+    if path.endswith('.csv') and HAS_PYARROW:
+        parquet_path = parquet_path_for(path)
+        if os.path.exists(parquet_path):
+            if not os.path.exists(path) or os.path.getmtime(parquet_path) >= os.path.getmtime(path):
+                return parquet_path
+            print(f"⚠️  {os.path.basename(parquet_path)} is older than the CSV, reading CSV "
+                  f"(re-run convert_dataset.py)")
+    return path
+
+
+def load_dataset(path: str = None, columns=None, row_groups=None) -> pd.DataFrame:
+    """
+    Load a dataset with only the requested columns
+
+    Args:
+        path: .parquet or .csv path (default: data/dummy_data.csv, or its Parquet copy)
+        columns: Columns to read (default: all raw columns)
+        row_groups: Parquet row group indices to read (default: all)
+
+    Returns:
+        DataFrame with typed columns (categoricals for media/weather/season)
+    """
+    path = resolve_dataset_path(path)
+
+    if path.endswith('.parquet'):
+        if row_groups is not None:
+            return pq.ParquetFile(path).read_row_groups(row_groups, columns=columns).to_pandas()
+        return pd.read_parquet(path, columns=columns)
+
+    if row_groups is not None:
+        raise ValueError("row_groups requires a Parquet dataset")
+    return read_csv_typed(path, columns=columns)
+
+
+def iter_dataset(path: str = None, columns=None, batch_size: int = 10_000):
+    """
+    Stream a dataset in chunks of at most batch_size rows
+
+    Yields:
+        DataFrames with the requested columns
+    """
+    path = resolve_dataset_path(path)
+
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from read_csv_typed(path, columns=columns, chunksize=batch_size)
@@ -0,0 +1,105 @@
+"""
+Evaluation Artifacts
+Training scripts save their evaluation arrays to a .npz file; the figures
+are rendered later by plot_evaluasi.py (in a background process, inline,
+or not at all), so training never imports matplotlib.
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+PLOT_SCRIPT = os.path.join(SCRIPTS_DIR, 'plot_evaluasi.py')
+PLOT_MODES = ['skip', 'background', 'inline']
+
+
+def evaluation_path(models_dir: str, run_name: str) -> str:
+    """models/<run_name>_eval.npz"""
+    return os.path.join(models_dir, f'{run_name}_eval.npz')
+
+
+def save_evaluation(path: str, **arrays) -> str:
+    """
+    Save evaluation arrays (predictions, metrics, names) for plotting
+
+    Args:
+        path: Output .npz path
+        **arrays: Array-like values; strings become unicode arrays
+
+    Returns:
+        Path of the written file
+    """
+    converted = {}
+    for key, value in arrays.items():
+        value = np.asarray(value)
+        # Object arrays (e.g. pandas string columns) would need pickle to load
+        converted[key] = value.astype(str) if value.dtype == object else value
+    np.savez_compressed(path, **converted)
+    return path
+
+
+def load_evaluation(path: str) -> dict:
+    """Load evaluation arrays saved by save_evaluation()"""
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def run_plotting(kind: str, mode: str, eval_path: str, dpi: int = None):
+    """
+    Render the evaluation figure for a training run
+
+    Args:
+        kind: Figure type for plot_evaluasi.py (penetasan, panen, improved)
+        mode: 'skip', 'background' (detached process) or 'inline' (wait)
+        eval_path: .npz written by save_evaluation()
+        dpi: Output resolution (default: plot_evaluasi.py default)
+
+    Returns:
+        Popen handle for background mode, exit code for inline, None if skipped
+    """
+    if mode not in PLOT_MODES:
+        raise ValueError(f"Unknown plot mode {mode!r}, expected one of {PLOT_MODES}")
+    if mode == 'skip':
+        print("⏭️  Plotting skipped (run plot_evaluasi.py to render later)")
+        return None
+
+    cmd = [sys.executable, PLOT_SCRIPT, kind, '--eval', eval_path]
+    if dpi:
+        cmd += ['--dpi', str(dpi)]
+
+    if mode == 'inline':
+        return subprocess.run(cmd, check=False).returncode
+
+    log_path = os.path.splitext(eval_path)[0] + '_plot.log'
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen(
+            cmd, stdout=log, stderr=subprocess.STDOUT, start_new_session=True
+        )
+    print(f"🖼️  Plotting in background (pid {process.pid}, log: {os.path.basename(log_path)})")
+    return process
+
+
+def default_plot_mode() -> str:
+    """MAGGOT_PLOT, else 'background' in a terminal and 'skip' for automated runs (cron, CI)"""
+    mode = os.getenv('MAGGOT_PLOT')
+    if not mode:
+        return 'background' if sys.stdout.isatty() else 'skip'
+    if mode.lower() not in PLOT_MODES:
+        # argparse doesn't check defaults against choices; never start plots on a typo
+        print(f"⚠️  MAGGOT_PLOT={mode!r} is not one of {', '.join(PLOT_MODES)}; plotting skipped")
+        return 'skip'
+    return mode.lower()
+
+
+def add_plot_args(parser):
+    """Add the --plot/--plot-dpi options shared by the training scripts"""
+    parser.add_argument(
+        '--plot', choices=PLOT_MODES, default=default_plot_mode(),
+        help="Evaluation figure: skip, background or inline "
+             "(default: env MAGGOT_PLOT, else background in a terminal, skip otherwise)"
+    )
+    parser.add_argument('--plot-dpi', type=int, default=None, help="Figure resolution (default: 300)")
+    return parser
@@ -0,0 +1,79 @@
+"""
+Feature Engineering
+Shared by the training, improvement and incremental retraining scripts
+so every model version sees exactly the same features.
+"""
+
+import pandas as pd
+
+# Columns recorded per farm batch (everything else is derived)
+RAW_COLUMNS = [
+    'id', 'Jumlah_telur_gram', 'Media_Telur', 'Lama_menetas_hari',
+    'Makanan_gram', 'Jumlah_panen_gram', 'temp', 'humidity', 'temp_max',
+    'weather_main', 'month', 'season'
+]
+
+# Penetasan model input (21 features, order matters)
+PENETASAN_FEATURES = [
+    'Jumlah_telur_gram', 'temp', 'humidity', 'temp_max',
+    'Media_Encoded', 'Weather_Encoded', 'Season_Encoded',
+    'temp_humidity_idx', 'temp_range', 'telur_per_temp',
+    'temp_squared', 'humidity_squared',
+    'temp_level', 'humidity_level',
+    'optimal_temp', 'optimal_humidity', 'optimal_condition',
+    'is_rainy', 'is_clear', 'is_kemarau', 'is_hujan'
+]
+
+# Panen model input
+PANEN_FEATURES = ['Jumlah_telur_gram', 'Makanan_gram']
+
+
+def create_features(df):
+    """Create advanced features"""
+    df = df.copy()
+    
+    # Interaction features
+    df['temp_humidity_idx'] = (df['temp'] * df['humidity']) / 1000
+    df['temp_range'] = df['temp_max'] - df['temp']
+    df['telur_per_temp'] = df['Jumlah_telur_gram'] / df['temp']
+    
+    # Polynomial features
+    df['temp_squared'] = df['temp'] ** 2
+    df['humidity_squared'] = df['humidity'] ** 2
+    
+    # Categorical binning
+    df['temp_level'] = pd.cut(df['temp'], bins=[0, 26, 29, 100], labels=[0, 1, 2])
+    df['humidity_level'] = pd.cut(df['humidity'], bins=[0, 75, 85, 100], labels=[0, 1, 2])
+    
+    # Condition indicators
+    df['optimal_temp'] = ((df['temp'] >= 27) & (df['temp'] <= 30)).astype(int)
+    df['optimal_humidity'] = ((df['humidity'] >= 70) & (df['humidity'] <= 80)).astype(int)
+    df['optimal_condition'] = df['optimal_temp'] * df['optimal_humidity']
+    
+    # Weather-based features
+    df['is_rainy'] = df['weather_main'].isin(['Rain', 'Thunderstorm']).astype(int)
+    df['is_clear'] = (df['weather_main'] == 'Clear').astype(int)
+    
+    # Season features
+    df['is_kemarau'] = (df['season'] == 'Kemarau').astype(int)
+    df['is_hujan'] = (df['season'] == 'Hujan').astype(int)
+    
+    return df
+
+
+def encode_categoricals(df, le_media, le_weather, le_season):
+    """
+    Encode categorical columns with already fitted label encoders
+    
+    Args:
+        df: DataFrame with Media_Telur, weather_main and season columns
+        le_media, le_weather, le_season: Fitted LabelEncoder instances
+        
+    Returns:
+        Copy of df with Media_Encoded, Weather_Encoded and Season_Encoded
+    """
+    df = df.copy()
+    df['Media_Encoded'] = le_media.transform(df['Media_Telur'])
+    df['Weather_Encoded'] = le_weather.transform(df['weather_main'])
+    df['Season_Encoded'] = le_season.transform(df['season'])
+    return df
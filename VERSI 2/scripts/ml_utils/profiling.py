@@ -0,0 +1,226 @@
+"""
+Training Run Profiling
+Per-stage wall/CPU time and peak RSS, written as a JSON run report next to
+the model metadata, with optional cProfile dumps for selected stages.
+"""
+
+import cProfile
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss_bytes():
+    """Current resident set size of this process (None if unavailable)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def children_rss_bytes():
+    """Combined RSS of live child processes, e.g. joblib workers (needs psutil)"""
+    if psutil is None:
+        return None
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def peak_rss_bytes(children=False):
+    """High-water mark RSS of this process (or of its finished children)"""
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+        # ru_maxrss is in KB on Linux and bytes on macOS
+        return usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    if psutil is not None and not children:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    return None
+
+
+def _mb(value):
+    return round(value / (1024 * 1024), 2) if value is not None else None
+
+
+class _RssSampler(threading.Thread):
+    """Background thread tracking the maximum RSS seen while a stage runs"""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self.peak_children = children_rss_bytes()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            rss = current_rss_bytes()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+            children = children_rss_bytes()
+            if children is not None and children > self.peak_children:
+                self.peak_children = children
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+class RunProfiler:
+    """Collect per-stage timings and memory usage for one training run"""
+
+    def __init__(self, run_name: str, profile_stages=None, output_dir: str = None,
+                 sample_interval: float = 0.02):
+        """
+        Initialize profiler
+
+        Args:
+            run_name: Name used in the report and .prof file names
+            profile_stages: Stage names to run under cProfile ('all' for every stage)
+            output_dir: Directory for .prof dumps (default: current directory)
+            sample_interval: Seconds between RSS samples
+        """
+        self.run_name = run_name
+        self.profile_stages = set(profile_stages or [])
+        self.output_dir = output_dir or os.getcwd()
+        self.sample_interval = sample_interval
+
+        self.started_at = datetime.now()
+        self._run_start = time.perf_counter()
+        self.stages = []
+        self.extra = {}
+        self._current = None
+
+    def begin(self, name: str):
+        """Start a stage (ends the running one, if any)"""
+        self.end()
+
+        profiler = None
+        if 'all' in self.profile_stages or name in self.profile_stages:
+            profiler = cProfile.Profile()
+
+        self._current = {
+            'name': name,
+            'wall_start': time.perf_counter(),
+            'cpu_start': time.process_time(),
+            'rss_start': current_rss_bytes(),
+            'maxrss_start': peak_rss_bytes(),
+            'sampler': _RssSampler(self.sample_interval),
+            'cprofile': profiler
+        }
+        self._current['sampler'].start()
+        if profiler is not None:
+            profiler.enable()
+
+    def end(self):
+        """End the running stage and record it"""
+        stage = self._current
+        if stage is None:
+            return
+        self._current = None
+
+        profile_file = None
+        if stage['cprofile'] is not None:
+            stage['cprofile'].disable()
+            os.makedirs(self.output_dir, exist_ok=True)
+            profile_file = os.path.join(self.output_dir, f"{self.run_name}_{stage['name']}.prof")
+            stage['cprofile'].dump_stats(profile_file)
+
+        sampler = stage['sampler']
+        sampled_peak = sampler.stop()
+        rss_end = current_rss_bytes()
+        maxrss_end = peak_rss_bytes()
+
+        readings = [r for r in (sampled_peak, stage['rss_start'], rss_end) if r is not None]
+        peak = max(readings) if readings else None
+        # A new process high-water mark during the stage is its exact peak
+        if maxrss_end is not None and stage['maxrss_start'] is not None and maxrss_end > stage['maxrss_start']:
+            peak = max(peak or 0, maxrss_end)
+
+        self.stages.append({
+            'name': stage['name'],
+            'wall_seconds': round(time.perf_counter() - stage['wall_start'], 4),
+            'cpu_seconds': round(time.process_time() - stage['cpu_start'], 4),
+            'rss_start_mb': _mb(stage['rss_start']),
+            'rss_end_mb': _mb(rss_end),
+            'peak_rss_mb': _mb(peak),
+            'peak_children_rss_mb': _mb(sampler.peak_children),
+            'profile_file': os.path.basename(profile_file) if profile_file else None
+        })
+
+    def stage_seconds(self, *names) -> float:
+        """Total wall time of the finished stages with these names"""
+        return round(sum(s['wall_seconds'] for s in self.stages if s['name'] in names), 4)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Context manager form of begin()/end()"""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def report(self) -> dict:
+        """Run report as a JSON-serializable dict"""
+        self.end()
+        total = time.perf_counter() - self._run_start
+        return {
+            'run_name': self.run_name,
+            'started_at': self.started_at.isoformat(),
+            'total_wall_seconds': round(total, 4),
+            'process_peak_rss_mb': _mb(peak_rss_bytes()),
+            'children_peak_rss_mb': _mb(peak_rss_bytes(children=True)),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            **self.extra,
+            'stages': self.stages
+        }
+
+    def save(self, path: str) -> str:
+        """Write the JSON run report and print a short summary"""
+        report = self.report()
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+
+        print(f"\n⏱️  Run report ({report['total_wall_seconds']:.1f}s total):")
+        for stage in report['stages']:
+            share = stage['wall_seconds'] / report['total_wall_seconds'] * 100 if report['total_wall_seconds'] else 0
+            peak = f"{stage['peak_rss_mb']:.0f} MB" if stage['peak_rss_mb'] is not None else "n/a"
+            print(f"   {stage['name']:<22} {stage['wall_seconds']:>8.2f}s ({share:4.1f}%)  peak RSS {peak}")
+        print(f"✓ Run report saved: {os.path.basename(path)}")
+        return path
+
+
+def add_profiling_args(parser):
+    """Add the --profile-stage option shared by the training scripts"""
+    parser.add_argument(
+        '--profile-stage', action='append', default=[], metavar='STAGE',
+        help="Dump cProfile stats (.prof) for a stage; repeatable, 'all' for every stage"
+    )
+    return parser
@@ -0,0 +1,340 @@
+"""
+Model Registry
+Versioned model artifacts with a small JSON index, so scripts and the API
+can resolve "latest", "best by metric", an alias (e.g. production) or a
+pinned version without unpickling every candidate.
+
+Layout:
+    models/registry/index.json
+    models/registry/index.json.lock                       (held while the index is updated)
+    models/registry/<name>/<version>/model.pkl
+    models/registry/<name>/<version>/metadata.pkl
+    models/registry/<name>/<version>/label_encoder_*.pkl   (penetasan)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime
+
+import joblib
+
+try:
+    import msvcrt
+except ImportError:  # not Windows
+    msvcrt = None
+    import fcntl
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'models'))
+
+# Metadata keys copied into the index
+METRIC_KEYS = [
+    'test_accuracy', 'cv_mean', 'cv_std',
+    'mae', 'rmse', 'r2_score', 'mape', 'cv_score_mean', 'cv_score_std'
+]
+# Metrics where a smaller value is better (cv_score_mean of panen is an MAE)
+LOWER_IS_BETTER = {'mae', 'rmse', 'mape', 'cv_score_mean', 'cv_std', 'cv_score_std'}
+
+DEFAULT_ALIAS = 'production'
+
+# Flat files in models/ written before the registry existed
+LEGACY_FILES = {
+    'penetasan': {
+        'model': 'model_penetasan_maggot.pkl',
+        'metadata': 'model_penetasan_metadata.pkl',
+        'label_encoder_media': 'label_encoder_media.pkl',
+        'label_encoder_weather': 'label_encoder_weather.pkl',
+        'label_encoder_season': 'label_encoder_season.pkl'
+    },
+    'panen': {
+        'model': 'model_panen_maggot.pkl',
+        'metadata': 'model_panen_metadata.pkl'
+    }
+}
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _json_value(value):
+    """numpy scalars/arrays -> plain JSON types"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {str(k): _json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    return value
+
+
+class ModelRegistry:
+    """Versioned storage and lookup of trained models"""
+
+    def __init__(self, models_dir: str = None):
+        """
+        Initialize registry
+
+        Args:
+            models_dir: Base models directory (default: VERSI 2/models)
+        """
+        self.models_dir = os.path.abspath(models_dir or MODELS_DIR)
+        self.root = os.path.join(self.models_dir, 'registry')
+        self.index_path = os.path.join(self.root, 'index.json')
+
+    # ==================== INDEX ====================
+
+    def _read_index(self) -> dict:
+        if not os.path.exists(self.index_path):
+            return {'models': {}}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def _write_index(self, index: dict):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    @contextmanager
+    def _locked(self):
+        """
+        Exclusive lock for a read-modify-write of the index
+
+        Held across processes (e.g. improve_model.py and incremental_training.py
+        registering at the same time), released by the OS if a process dies.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.index_path + '.lock', 'a+b') as f:
+            if msvcrt:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK gives up after 10 attempts
+                        continue
+                try:
+                    yield
+                finally:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def names(self) -> list:
+        """Registered model names"""
+        return sorted(self._read_index()['models'])
+
+    def versions(self, name: str) -> list:
+        """Index entries of a model, oldest first"""
+        entry = self._read_index()['models'].get(name, {})
+        return [entry['versions'][v] for v in sorted(entry.get('versions', {}))]
+
+    def aliases(self, name: str) -> dict:
+        """Alias -> version mapping of a model"""
+        return dict(self._read_index()['models'].get(name, {}).get('aliases', {}))
+
+    # ==================== WRITE ====================
+
+    def _new_version(self, name: str, index: dict) -> str:
+        """Sortable timestamp version, unique per model"""
+        base = datetime.now().strftime('%Y%m%d_%H%M%S')
+        existing = index['models'].get(name, {}).get('versions', {})
+        version, n = base, 2
+        while version in existing:
+            version, n = f'{base}_{n}', n + 1
+        return version
+
+    def register(self, name: str, artifacts: dict, metadata: dict, version: str = None,
+                 source: str = None, parent_version: str = None, train_time_seconds: float = None,
+                 tags: dict = None, aliases=None) -> str:
+        """
+        Store a new model version and add it to the index
+
+        Args:
+            name: Model name (e.g. 'penetasan', 'panen')
+            artifacts: Artifact name -> object (must include 'model'); the
+                metadata dict is stored automatically as 'metadata'
+            metadata: Model metadata (metrics, feature columns, mappings)
+            version: Version string (default: timestamp)
+            source: Script that produced the version
+            parent_version: Version this one was derived from
+            train_time_seconds: Training wall time
+            tags: Extra JSON-serializable info for the index
+            aliases: Aliases to point at the new version (e.g. ['production'])
+
+        Returns:
+            The registered version
+        """
+        # Version, artifacts and index entry under one lock: a concurrent
+        # register() would otherwise pick the same version or drop this entry
+        with self._locked():
+            index = self._read_index()
+            version = version or self._new_version(name, index)
+            if version in index['models'].get(name, {}).get('versions', {}):
+                raise ValueError(f"{name} version {version} already registered")
+
+            version_dir = os.path.join(self.root, name, version)
+            os.makedirs(version_dir, exist_ok=True)
+
+            files = {}
+            for artifact, obj in {**artifacts, 'metadata': metadata}.items():
+                path = os.path.join(version_dir, f'{artifact}.pkl')
+                joblib.dump(obj, path)
+                files[artifact] = {
+                    'file': os.path.relpath(path, self.root).replace(os.sep, '/'),
+                    'sha256': file_sha256(path),
+                    'bytes': os.path.getsize(path)
+                }
+
+            entry = {
+                'version': version,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'source': source,
+                'parent_version': parent_version,
+                'model_class': type(artifacts['model']).__name__,
+                'metrics': {k: _json_value(metadata[k]) for k in METRIC_KEYS if k in metadata},
+                'feature_columns': _json_value(metadata.get('feature_columns', metadata.get('feature_names', []))),
+                'train_time_seconds': train_time_seconds,
+                'num_training_samples': _json_value(metadata.get('num_training_samples')),
+                'tags': _json_value(tags or {}),
+                'artifacts': files
+            }
+
+            model_entry = index['models'].setdefault(name, {'versions': {}, 'aliases': {}})
+            model_entry['versions'][version] = entry
+            for alias in aliases or []:
+                model_entry['aliases'][alias] = version
+            self._write_index(index)
+        return version
+
+    def set_alias(self, name: str, alias: str, version: str):
+        """Point an alias (e.g. 'production') at a registered version"""
+        with self._locked():
+            index = self._read_index()
+            model_entry = index['models'].get(name)
+            if not model_entry or version not in model_entry['versions']:
+                raise KeyError(f"{name} version {version} not registered")
+            model_entry['aliases'][alias] = version
+            self._write_index(index)
+
+    def import_legacy(self, name: str, aliases=(DEFAULT_ALIAS,)) -> str:
+        """Register the flat models/*.pkl files of a model as a version"""
+        artifacts = {
+            artifact: joblib.load(os.path.join(self.models_dir, filename))
+            for artifact, filename in LEGACY_FILES[name].items()
+        }
+        metadata = artifacts.pop('metadata')
+        return self.register(name, artifacts, metadata, source='legacy', aliases=list(aliases))
+
+    # ==================== LOOKUP ====================
+
+    def resolve(self, name: str, selector: str = 'latest') -> dict:
+        """
+        Find a version in the index (nothing is unpickled)
+
+        Args:
+            name: Model name
+            selector: 'latest', 'best:<metric>', an alias (e.g. 'production')
+                or a version string
+
+        Returns:
+            Index entry of the version
+
+        Raises:
+            KeyError: Unknown selector, or no version promoted to 'production' yet
+                (never served implicitly: it may be an unpromoted version)
+        """
+        model_entry = self._read_index()['models'].get(name)
+        if not model_entry or not model_entry['versions']:
+            raise KeyError(f"No registered versions for model '{name}'")
+        versions = model_entry['versions']
+
+        if selector.startswith('best:'):
+            metric = selector.split(':', 1)[1]
+            scored = [e for e in versions.values() if e['metrics'].get(metric) is not None]
+            if not scored:
+                raise KeyError(f"No {name} version has metric '{metric}'")
+            # Ties go to the newest version
+            sign = -1 if metric in LOWER_IS_BETTER else 1
+            return max(scored, key=lambda e: (sign * e['metrics'][metric], e['version']))
+
+        if selector in model_entry.get('aliases', {}):
+            return versions[model_entry['aliases'][selector]]
+        if selector in versions:
+            return versions[selector]
+        if selector == 'latest':
+            return versions[max(versions)]
+        if selector == DEFAULT_ALIAS:
+            raise KeyError(f"No {name} version is promoted to '{DEFAULT_ALIAS}' "
+                           f"(python model_registry.py promote {name} <version>)")
+        raise KeyError(f"Unknown {name} version or alias '{selector}'")
+
+    def artifact_path(self, entry: dict, artifact: str) -> str:
+        """Absolute path of an artifact of an index entry"""
+        return os.path.join(self.root, *entry['artifacts'][artifact]['file'].split('/'))
+
+    def load(self, name: str, selector: str = 'latest', artifacts=None, verify: bool = False) -> dict:
+        """
+        Load artifacts of one version
+
+        Falls back to the legacy flat files in models/ when the registry has
+        no versions of the model yet.
+
+        Args:
+            name: Model name
+            selector: See resolve()
+            artifacts: Artifact names to load (default: all)
+            verify: Check SHA-256 hashes before unpickling
+
+        Returns:
+            Dict of artifact name -> object, plus 'version' and 'entry'
+        """
+        try:
+            entry = self.resolve(name, selector)
+        except KeyError:
+            if name in LEGACY_FILES and selector in ('latest', DEFAULT_ALIAS) and not self.versions(name):
+                return self._load_legacy(name, artifacts)
+            raise
+
+        loaded = {'version': entry['version'], 'entry': entry}
+        for artifact in artifacts or entry['artifacts']:
+            path = self.artifact_path(entry, artifact)
+            if verify and file_sha256(path) != entry['artifacts'][artifact]['sha256']:
+                raise ValueError(f"Hash mismatch for {name} {entry['version']} {artifact}")
+            loaded[artifact] = joblib.load(path)
+        return loaded
+
+    def _load_legacy(self, name: str, artifacts=None) -> dict:
+        files = LEGACY_FILES[name]
+        loaded = {'version': None, 'entry': None}
+        for artifact in artifacts or files:
+            loaded[artifact] = joblib.load(os.path.join(self.models_dir, files[artifact]))
+        return loaded
+
+    # ==================== CLEANUP ====================
+
+    def remove(self, name: str, version: str):
+        """Delete a version that no alias points to"""
+        with self._locked():
+            index = self._read_index()
+            model_entry = index['models'].get(name, {})
+            if version in model_entry.get('aliases', {}).values():
+                raise ValueError(f"{name} {version} is aliased; move the alias first")
+            model_entry.get('versions', {}).pop(version, None)
+            self._write_index(index)
+        shutil.rmtree(os.path.join(self.root, name, version), ignore_errors=True)
+
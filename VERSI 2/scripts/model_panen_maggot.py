@@ -6,34 +6,44 @@ Input: Jumlah Telur (gram) + Jumlah Makanan (gram)
 Output: Jumlah Panen (gram)
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import matplotlib.pyplot as plt
-import seaborn as sns
-import joblib
+from ml_utils import (
+    load_dataset, PANEN_FEATURES, PANEN_COLUMNS,
+    RunProfiler, add_profiling_args, evaluation_path, save_evaluation, run_plotting, add_plot_args,
+    ModelRegistry
+)
 import os
 
 # Get the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
 models_dir = os.path.join(script_dir, '..', 'models')
 data_dir = os.path.join(script_dir, '..', 'data')
-docs_dir = os.path.join(script_dir, '..', 'docs')
+
+parser = add_plot_args(add_profiling_args(argparse.ArgumentParser(description="Train the panen model")))
+parser.add_argument('--no-promote', action='store_true',
+                    help="Register the new version without making it the production model")
+args = parser.parse_args()
+profiler = RunProfiler('model_panen', profile_stages=args.profile_stage, output_dir=models_dir)
 
 # ==================== LOAD DATA ====================
 print("=" * 60)
 print("MODEL PREDIKSI HASIL PANEN MAGGOT")
 print("=" * 60)
 
-df = pd.read_csv(os.path.join(data_dir, 'dummy_data.csv'), delimiter=';')
+profiler.begin('load_data')
+df = load_dataset(os.path.join(data_dir, 'dummy_data.csv'), columns=PANEN_COLUMNS + ['id'])
 print(f"\n✓ Data berhasil dimuat: {df.shape[0]} baris, {df.shape[1]} kolom")
 
 # ==================== EKSPLORASI DATA ====================
 print("\n" + "=" * 60)
 print("EKSPLORASI DATA")
 print("=" * 60)
+profiler.begin('exploration')
 
 print("\nStatistik Jumlah Telur:")
 print(df['Jumlah_telur_gram'].describe())
@@ -53,9 +63,10 @@ print(correlation['Jumlah_panen_gram'].sort_values(ascending=False))
 print("\n" + "=" * 60)
 print("PREPROCESSING DATA")
 print("=" * 60)
+profiler.begin('preprocessing')
 
 # Siapkan fitur (X) dan target (y)
-X = df[['Jumlah_telur_gram', 'Makanan_gram']].copy()
+X = df[PANEN_FEATURES].copy()
 y = df['Jumlah_panen_gram'].copy()
 
 # Split data: 80% training, 20% testing
@@ -91,6 +102,7 @@ grid_search = GridSearchCV(
     verbose=0
 )
 
+profiler.begin('grid_search')
 grid_search.fit(X_train, y_train)
 
 print(f"✓ Best Parameters: {grid_search.best_params_}")
@@ -101,6 +113,7 @@ best_model = grid_search.best_estimator_
 
 # ==================== TRAINING RANDOM FOREST (PEMBANDING) ====================
 print("\n⏳ Training Random Forest sebagai pembanding...")
+profiler.begin('training_random_forest')
 rf_model = RandomForestRegressor(
     n_estimators=200, 
     max_depth=20, 
@@ -116,6 +129,7 @@ print("✓ Random Forest training selesai")
 print("\n" + "=" * 60)
 print("EVALUASI MODEL")
 print("=" * 60)
+profiler.begin('evaluation')
 
 # Prediksi dengan Gradient Boosting
 y_pred_gb = best_model.predict(X_test)
@@ -170,6 +184,7 @@ else:
     print(f"\n✓ Model terbaik: {model_name}")
 
 # Cross-validation score
+profiler.begin('cross_validation')
 cv_scores = cross_val_score(final_model, X, y, cv=5, scoring='neg_mean_absolute_error')
 print(f"✓ Cross-Validation MAE (mean ± std): {-cv_scores.mean():.2f} ± {cv_scores.std():.2f} gram")
 
@@ -182,111 +197,13 @@ feature_importance = pd.DataFrame({
 print("\nFeature Importance:")
 print(feature_importance)
 
-# ==================== VISUALISASI ====================
-print("\n" + "=" * 60)
-print("VISUALISASI")
-print("=" * 60)
-
-fig = plt.figure(figsize=(16, 10))
-gs = fig.add_gridspec(3, 3, hspace=0.3, wspace=0.3)
-
-# 1. Prediksi vs Aktual (Gradient Boosting)
-ax1 = fig.add_subplot(gs[0, 0])
-ax1.scatter(y_test, y_pred_gb, alpha=0.6, color='blue', label='Gradient Boosting')
-ax1.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--', lw=2)
-ax1.set_xlabel('Aktual (gram)')
-ax1.set_ylabel('Prediksi (gram)')
-ax1.set_title('Gradient Boosting: Prediksi vs Aktual')
-ax1.legend()
-
-# 2. Prediksi vs Aktual (Random Forest)
-ax2 = fig.add_subplot(gs[0, 1])
-ax2.scatter(y_test, y_pred_rf, alpha=0.6, color='orange', label='Random Forest')
-ax2.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--', lw=2)
-ax2.set_xlabel('Aktual (gram)')
-ax2.set_ylabel('Prediksi (gram)')
-ax2.set_title('Random Forest: Prediksi vs Aktual')
-ax2.legend()
-
-# 3. Feature Importance
-ax3 = fig.add_subplot(gs[0, 2])
-ax3.barh(feature_importance['Feature'], feature_importance['Importance'], color='steelblue')
-ax3.set_xlabel('Importance')
-ax3.set_title(f'Feature Importance ({model_name})')
-ax3.invert_yaxis()
-
-# 4. Distribusi Error (Gradient Boosting)
-ax4 = fig.add_subplot(gs[1, 0])
-errors_gb = y_test - y_pred_gb
-ax4.hist(errors_gb, bins=20, color='blue', alpha=0.7, edgecolor='black')
-ax4.set_xlabel('Error (Aktual - Prediksi)')
-ax4.set_ylabel('Frequency')
-ax4.set_title('Gradient Boosting: Distribusi Error')
-ax4.axvline(x=0, color='red', linestyle='--', linewidth=2)
-
-# 5. Distribusi Error (Random Forest)
-ax5 = fig.add_subplot(gs[1, 1])
-errors_rf = y_test - y_pred_rf
-ax5.hist(errors_rf, bins=20, color='orange', alpha=0.7, edgecolor='black')
-ax5.set_xlabel('Error (Aktual - Prediksi)')
-ax5.set_ylabel('Frequency')
-ax5.set_title('Random Forest: Distribusi Error')
-ax5.axvline(x=0, color='red', linestyle='--', linewidth=2)
-
-# 6. Perbandingan Metrik
-ax6 = fig.add_subplot(gs[1, 2])
-metrics = ['MAE', 'RMSE', 'R²', 'MAPE']
-gb_values = [mae_gb, rmse_gb, r2_gb*1000, mape_gb]  # Scale R² untuk visualisasi
-rf_values = [mae_rf, rmse_rf, r2_rf*1000, mape_rf]
-x = np.arange(len(metrics))
-width = 0.35
-ax6.bar(x - width/2, gb_values, width, label='Gradient Boosting', color='blue', alpha=0.7)
-ax6.bar(x + width/2, rf_values, width, label='Random Forest', color='orange', alpha=0.7)
-ax6.set_ylabel('Nilai')
-ax6.set_title('Perbandingan Metrik Model')
-ax6.set_xticks(x)
-ax6.set_xticklabels(metrics)
-ax6.legend()
-ax6.grid(axis='y', alpha=0.3)
-
-# 7. Korelasi Heatmap
-ax7 = fig.add_subplot(gs[2, 0])
-sns.heatmap(correlation, annot=True, fmt='.3f', cmap='coolwarm', center=0, 
-            square=True, ax=ax7, cbar_kws={"shrink": 0.8})
-ax7.set_title('Correlation Matrix')
-
-# 8. Residual Plot
-ax8 = fig.add_subplot(gs[2, 1])
-residuals = y_test - y_pred_final
-ax8.scatter(y_pred_final, residuals, alpha=0.6, color='green')
-ax8.axhline(y=0, color='red', linestyle='--', linewidth=2)
-ax8.set_xlabel('Prediksi (gram)')
-ax8.set_ylabel('Residual (Aktual - Prediksi)')
-ax8.set_title(f'{model_name}: Residual Plot')
-ax8.grid(alpha=0.3)
-
-# 9. Box Plot Error
-ax9 = fig.add_subplot(gs[2, 2])
-box_data = [errors_gb, errors_rf]
-ax9.boxplot(box_data, labels=['Gradient\nBoosting', 'Random\nForest'])
-ax9.set_ylabel('Error (gram)')
-ax9.set_title('Distribusi Error: Perbandingan Model')
-ax9.axhline(y=0, color='red', linestyle='--', linewidth=1)
-ax9.grid(axis='y', alpha=0.3)
-
-plt.savefig(os.path.join(docs_dir, 'evaluasi_model_panen.png'), dpi=300, bbox_inches='tight')
-print("✓ Grafik evaluasi disimpan: evaluasi_model_panen.png")
-
 # ==================== SIMPAN MODEL ====================
 print("\n" + "=" * 60)
 print("SIMPAN MODEL")
 print("=" * 60)
+profiler.begin('saving')
 
-# Simpan model terbaik
-joblib.dump(final_model, os.path.join(models_dir, 'model_panen_maggot.pkl'))
-print(f"✓ Model disimpan: model_panen_maggot.pkl ({model_name})")
-
-# Simpan metadata
+# Simpan model terbaik + metadata ke registry
 metadata = {
     'model_type': model_name,
     'feature_names': ['Jumlah_telur_gram', 'Makanan_gram'],
@@ -296,10 +213,47 @@ metadata = {
     'mape': mape_final,
     'cv_score_mean': -cv_scores.mean(),
     'cv_score_std': cv_scores.std(),
+    # Rows the model has seen: later updates are evaluated on the others
+    'train_ids': sorted(df.loc[X_train.index, 'id'].astype(int).tolist()),
     'best_params': grid_search.best_params_ if model_name == "Gradient Boosting" else {}
 }
-joblib.dump(metadata, os.path.join(models_dir, 'model_panen_metadata.pkl'))
-print("✓ Metadata disimpan: model_panen_metadata.pkl")
+registry = ModelRegistry(models_dir)
+version = registry.register(
+    'panen',
+    {'model': final_model},
+    metadata,
+    source='model_panen_maggot.py',
+    train_time_seconds=profiler.stage_seconds('grid_search', 'training_random_forest'),
+    aliases=[] if args.no_promote else ['production']
+)
+print(f"✓ Model dan metadata disimpan: panen v{version} ({model_name})")
+if not args.no_promote:
+    print("✓ Dipromosikan ke production")
+
+eval_file = save_evaluation(
+    evaluation_path(models_dir, 'model_panen'),
+    y_test=y_test.values, y_pred_gb=y_pred_gb, y_pred_rf=y_pred_rf, y_pred_final=y_pred_final,
+    metrics_gb=[mae_gb, rmse_gb, r2_gb, mape_gb], metrics_rf=[mae_rf, rmse_rf, r2_rf, mape_rf],
+    model_name=model_name,
+    feature_names=['Jumlah Telur (gram)', 'Jumlah Makanan (gram)'],
+    feature_importances=final_model.feature_importances_,
+    correlation=correlation.values, correlation_columns=list(correlation.columns)
+)
+print(f"✓ Data evaluasi disimpan: {os.path.basename(eval_file)}")
+
+# ==================== VISUALISASI ====================
+print("\n" + "=" * 60)
+print("VISUALISASI")
+print("=" * 60)
+profiler.begin('plotting')
+run_plotting('panen', args.plot, eval_file, dpi=args.plot_dpi)
+
+profiler.extra.update({
+    'num_samples': len(df),
+    'grid_candidates': len(grid_search.cv_results_['params']),
+    'registry_version': version
+})
+profiler.save(os.path.join(models_dir, 'model_panen_run_report.json'))
 
 # ==================== CONTOH PREDIKSI ====================
 print("\n" + "=" * 60)
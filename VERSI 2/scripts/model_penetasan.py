@@ -7,22 +7,30 @@ Data: 500 samples (augmented from 100)
 Algorithm: Gradient Boosting
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
-import matplotlib.pyplot as plt
-import seaborn as sns
-import joblib
+from ml_utils import (
+    create_features, load_dataset, PENETASAN_FEATURES, PENETASAN_COLUMNS,
+    RunProfiler, add_profiling_args, evaluation_path, save_evaluation, run_plotting, add_plot_args,
+    ModelRegistry
+)
 import os
 
 # Get the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
 models_dir = os.path.join(script_dir, '..', 'models')
 data_dir = os.path.join(script_dir, '..', 'data')
-docs_dir = os.path.join(script_dir, '..', 'docs')
+
+parser = add_plot_args(add_profiling_args(argparse.ArgumentParser(description="Train the penetasan model")))
+parser.add_argument('--no-promote', action='store_true',
+                    help="Register the new version without making it the production model")
+args = parser.parse_args()
+profiler = RunProfiler('model_penetasan', profile_stages=args.profile_stage, output_dir=models_dir)
 
 print("=" * 80)
 print("TRAINING MODEL PENETASAN MAGGOT (IMPROVED - 78% ACCURACY)")
@@ -32,45 +40,15 @@ print("=" * 80)
 # 1. LOAD DATA
 # =====================================================
 print("\n[1] Loading data...")
-df = pd.read_csv(os.path.join(data_dir, 'dummy_data.csv'), delimiter=';')
+profiler.begin('load_data')
+df = load_dataset(os.path.join(data_dir, 'dummy_data.csv'), columns=PENETASAN_COLUMNS + ['id'])
 print(f"✓ Data loaded: {len(df)} samples, {len(df.columns)} columns")
 
 # =====================================================
 # 2. FEATURE ENGINEERING
 # =====================================================
 print("\n[2] Feature Engineering...")
-
-def create_features(df):
-    """Create advanced features"""
-    df = df.copy()
-    
-    # Interaction features
-    df['temp_humidity_idx'] = (df['temp'] * df['humidity']) / 1000
-    df['temp_range'] = df['temp_max'] - df['temp']
-    df['telur_per_temp'] = df['Jumlah_telur_gram'] / df['temp']
-    
-    # Polynomial features
-    df['temp_squared'] = df['temp'] ** 2
-    df['humidity_squared'] = df['humidity'] ** 2
-    
-    # Categorical binning
-    df['temp_level'] = pd.cut(df['temp'], bins=[0, 26, 29, 100], labels=[0, 1, 2])
-    df['humidity_level'] = pd.cut(df['humidity'], bins=[0, 75, 85, 100], labels=[0, 1, 2])
-    
-    # Condition indicators
-    df['optimal_temp'] = ((df['temp'] >= 27) & (df['temp'] <= 30)).astype(int)
-    df['optimal_humidity'] = ((df['humidity'] >= 70) & (df['humidity'] <= 80)).astype(int)
-    df['optimal_condition'] = df['optimal_temp'] * df['optimal_humidity']
-    
-    # Weather-based features
-    df['is_rainy'] = df['weather_main'].isin(['Rain', 'Thunderstorm']).astype(int)
-    df['is_clear'] = (df['weather_main'] == 'Clear').astype(int)
-    
-    # Season features
-    df['is_kemarau'] = (df['season'] == 'Kemarau').astype(int)
-    df['is_hujan'] = (df['season'] == 'Hujan').astype(int)
-    
-    return df
+profiler.begin('feature_engineering')
 
 df_enhanced = create_features(df)
 print(f"✓ Created advanced features, total columns: {len(df_enhanced.columns)}")
@@ -79,6 +57,7 @@ print(f"✓ Created advanced features, total columns: {len(df_enhanced.columns)}
 # 3. PREPROCESSING
 # =====================================================
 print("\n[3] Preprocessing...")
+profiler.begin('preprocessing')
 
 # Encode categorical
 le_media = LabelEncoder()
@@ -90,15 +69,7 @@ df_enhanced['Weather_Encoded'] = le_weather.fit_transform(df_enhanced['weather_m
 df_enhanced['Season_Encoded'] = le_season.fit_transform(df_enhanced['season'])
 
 # Select features (21 features)
-feature_cols = [
-    'Jumlah_telur_gram', 'temp', 'humidity', 'temp_max',
-    'Media_Encoded', 'Weather_Encoded', 'Season_Encoded',
-    'temp_humidity_idx', 'temp_range', 'telur_per_temp',
-    'temp_squared', 'humidity_squared',
-    'temp_level', 'humidity_level',
-    'optimal_temp', 'optimal_humidity', 'optimal_condition',
-    'is_rainy', 'is_clear', 'is_kemarau', 'is_hujan'
-]
+feature_cols = list(PENETASAN_FEATURES)
 
 X = df_enhanced[feature_cols]
 y = df_enhanced['Lama_menetas_hari']
@@ -116,6 +87,7 @@ print(f"✓ Features: {len(feature_cols)}")
 # 4. TRAINING
 # =====================================================
 print("\n[4] Training Gradient Boosting Model...")
+profiler.begin('training')
 
 model = GradientBoostingClassifier(
     n_estimators=300,
@@ -131,10 +103,13 @@ print("✓ Model trained successfully")
 # 5. EVALUATION
 # =====================================================
 print("\n[5] Model Evaluation...")
+profiler.begin('evaluation')
 
 train_acc = model.score(X_train, y_train)
 test_acc = model.score(X_test, y_test)
+profiler.begin('cross_validation')
 cv_scores = cross_val_score(model, X_train, y_train, cv=5)
+profiler.begin('classification_report')
 
 print(f"\nTrain Accuracy: {train_acc:.2%}")
 print(f"Test Accuracy:  {test_acc:.2%}")
@@ -160,60 +135,10 @@ print("\nTop 10 Feature Importance:")
 print(feature_importance.head(10).to_string(index=False))
 
 # =====================================================
-# 6. VISUALIZATION
+# 6. SAVE MODEL
 # =====================================================
-print("\n[6] Creating visualizations...")
-
-fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-
-# Confusion Matrix
-sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', ax=axes[0, 0])
-axes[0, 0].set_title('Confusion Matrix', fontweight='bold', fontsize=14)
-axes[0, 0].set_xlabel('Predicted')
-axes[0, 0].set_ylabel('Actual')
-
-# Feature Importance
-top_features = feature_importance.head(15)
-colors = plt.cm.viridis(np.linspace(0, 1, len(top_features)))
-axes[0, 1].barh(top_features['Feature'], top_features['Importance'], color=colors)
-axes[0, 1].set_xlabel('Importance')
-axes[0, 1].set_title('Top 15 Feature Importance', fontweight='bold', fontsize=14)
-axes[0, 1].invert_yaxis()
-
-# Prediction vs Actual
-axes[1, 0].scatter(y_test, y_pred, alpha=0.6, s=100, edgecolors='black')
-axes[1, 0].plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--', lw=3)
-axes[1, 0].set_xlabel('Actual (hari)', fontsize=12)
-axes[1, 0].set_ylabel('Predicted (hari)', fontsize=12)
-axes[1, 0].set_title('Prediction vs Actual', fontweight='bold', fontsize=14)
-axes[1, 0].grid(alpha=0.3)
-
-# Error Distribution
-errors = y_test.values - y_pred
-axes[1, 1].hist(errors, bins=15, color='orange', alpha=0.7, edgecolor='black')
-axes[1, 1].set_xlabel('Error (Actual - Predicted)')
-axes[1, 1].set_ylabel('Frequency')
-axes[1, 1].set_title('Error Distribution', fontweight='bold', fontsize=14)
-axes[1, 1].axvline(x=0, color='red', linestyle='--', linewidth=2, label='Perfect Prediction')
-axes[1, 1].legend()
-axes[1, 1].grid(axis='y', alpha=0.3)
-
-plt.tight_layout()
-plt.savefig(os.path.join(docs_dir, 'evaluasi_model_penetasan.png'), dpi=300, bbox_inches='tight')
-print("✓ Visualization saved: evaluasi_model_penetasan.png")
-
-# =====================================================
-# 7. SAVE MODEL
-# =====================================================
-print("\n[7] Saving model and encoders...")
-
-joblib.dump(model, os.path.join(models_dir, 'model_penetasan_maggot.pkl'))
-print("✓ Model saved: model_penetasan_maggot.pkl")
-
-joblib.dump(le_media, os.path.join(models_dir, 'label_encoder_media.pkl'))
-joblib.dump(le_weather, os.path.join(models_dir, 'label_encoder_weather.pkl'))
-joblib.dump(le_season, os.path.join(models_dir, 'label_encoder_season.pkl'))
-print("✓ Label encoders saved")
+print("\n[6] Saving model and encoders...")
+profiler.begin('saving')
 
 metadata = {
     'model_name': 'Gradient Boosting Classifier',
@@ -222,13 +147,48 @@ metadata = {
     'cv_mean': cv_scores.mean(),
     'cv_std': cv_scores.std(),
     'num_training_samples': len(X_train),
+    # Rows the model has seen: later updates are evaluated on the others
+    'train_ids': sorted(df.loc[X_train.index, 'id'].astype(int).tolist()),
     'num_features': len(feature_cols),
     'media_mapping': dict(zip(le_media.classes_, le_media.transform(le_media.classes_))),
     'weather_mapping': dict(zip(le_weather.classes_, le_weather.transform(le_weather.classes_))),
     'season_mapping': dict(zip(le_season.classes_, le_season.transform(le_season.classes_)))
 }
-joblib.dump(metadata, os.path.join(models_dir, 'model_penetasan_metadata.pkl'))
-print("✓ Metadata saved: model_penetasan_metadata.pkl")
+
+registry = ModelRegistry(models_dir)
+version = registry.register(
+    'penetasan',
+    {
+        'model': model,
+        'label_encoder_media': le_media,
+        'label_encoder_weather': le_weather,
+        'label_encoder_season': le_season
+    },
+    metadata,
+    source='model_penetasan.py',
+    train_time_seconds=profiler.stage_seconds('training'),
+    aliases=[] if args.no_promote else ['production']
+)
+print(f"✓ Model, encoders and metadata registered: penetasan v{version}")
+if not args.no_promote:
+    print("✓ Promoted to production")
+
+eval_file = save_evaluation(
+    evaluation_path(models_dir, 'model_penetasan'),
+    y_test=y_test.values, y_pred=y_pred, cm=cm,
+    feature_names=feature_cols, feature_importances=model.feature_importances_
+)
+print(f"✓ Evaluation arrays saved: {os.path.basename(eval_file)}")
+
+# =====================================================
+# 7. VISUALIZATION
+# =====================================================
+print("\n[7] Creating visualizations...")
+profiler.begin('plotting')
+run_plotting('penetasan', args.plot, eval_file, dpi=args.plot_dpi)
+
+profiler.extra.update({'num_samples': len(df), 'num_features': len(feature_cols), 'registry_version': version})
+profiler.save(os.path.join(models_dir, 'model_penetasan_run_report.json'))
 
 # =====================================================
 # 8. TEST PREDICTIONS
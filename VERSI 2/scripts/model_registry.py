@@ -0,0 +1,120 @@
+"""
+Model Registry CLI
+==================
+Inspect and manage the versioned models in ../models/registry/.
+Only index.json is read for list/show; nothing is unpickled.
+
+Usage:
+    python model_registry.py list
+    python model_registry.py list penetasan
+    python model_registry.py show penetasan best:test_accuracy
+    python model_registry.py promote penetasan 20251105_101500
+    python model_registry.py import-legacy        # register the old flat models/*.pkl files
+    python model_registry.py remove panen 20251101_080000
+"""
+
+import argparse
+import json
+import os
+
+from ml_utils import ModelRegistry
+from ml_utils.registry import LEGACY_FILES, DEFAULT_ALIAS
+
+# Get the directory where this script is located
+script_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(script_dir, '..', 'models')
+
+
+def format_metrics(metrics):
+    return ", ".join(
+        f"{k}={v:.2%}" if k in ('test_accuracy', 'cv_mean') else f"{k}={v:.3f}"
+        for k, v in metrics.items() if k not in ('cv_std', 'cv_score_std')
+    )
+
+
+def cmd_list(registry, args):
+    names = [args.name] if args.name else registry.names()
+    if not names:
+        print("Registry is empty. Train a model or run: python model_registry.py import-legacy")
+        return
+
+    for name in names:
+        aliases = registry.aliases(name)
+        by_version = {}
+        for alias, version in aliases.items():
+            by_version.setdefault(version, []).append(alias)
+
+        print(f"\n📦 {name}")
+        print("-" * 80)
+        for entry in registry.versions(name):
+            marker = f" [{', '.join(by_version[entry['version']])}]" if entry['version'] in by_version else ""
+            print(f"  {entry['version']}{marker}  {entry['model_class']}  ({entry['source']})")
+            print(f"      {format_metrics(entry['metrics'])}")
+
+
+def cmd_show(registry, args):
+    print(json.dumps(registry.resolve(args.name, args.selector), indent=2))
+
+
+def cmd_promote(registry, args):
+    entry = registry.resolve(args.name, args.selector)
+    registry.set_alias(args.name, args.alias, entry['version'])
+    print(f"✓ {args.name} {args.alias} -> {entry['version']}")
+
+
+def cmd_import_legacy(registry, args):
+    for name in [args.name] if args.name else LEGACY_FILES:
+        if registry.versions(name):
+            print(f"⏭️  {name}: registry already has versions, skipped")
+            continue
+        try:
+            version = registry.import_legacy(name)
+            print(f"✓ {name}: legacy files registered as {version} ({DEFAULT_ALIAS})")
+        except FileNotFoundError as e:
+            print(f"❌ {name}: {e}")
+
+
+def cmd_remove(registry, args):
+    registry.remove(args.name, args.version)
+    print(f"✓ Removed {args.name} {args.version}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Manage the model registry")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('list', help="List versions")
+    p.add_argument('name', nargs='?')
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser('show', help="Show the index entry of a version")
+    p.add_argument('name')
+    p.add_argument('selector', nargs='?', default=DEFAULT_ALIAS,
+                   help="latest, best:<metric>, alias or version (default: production)")
+    p.set_defaults(func=cmd_show)
+
+    p = sub.add_parser('promote', help="Point an alias at a version")
+    p.add_argument('name')
+    p.add_argument('selector', help="latest, best:<metric> or version")
+    p.add_argument('--alias', default=DEFAULT_ALIAS)
+    p.set_defaults(func=cmd_promote)
+
+    p = sub.add_parser('import-legacy', help="Register the flat models/*.pkl files")
+    p.add_argument('name', nargs='?', choices=list(LEGACY_FILES))
+    p.set_defaults(func=cmd_import_legacy)
+
+    p = sub.add_parser('remove', help="Delete a version that no alias points to")
+    p.add_argument('name')
+    p.add_argument('version')
+    p.set_defaults(func=cmd_remove)
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    args.func(ModelRegistry(models_dir), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Evaluation Plots
+================
+Renders the evaluation figures from the arrays saved by the training
+scripts (models/*_eval.npz). Runs headless (Agg backend), so it can be
+started in the background by a training run or on demand later.
+
+Usage:
+    python plot_evaluasi.py penetasan
+    python plot_evaluasi.py panen --dpi 150
+    python plot_evaluasi.py improved --eval ../models/model_penetasan_improved_eval.npz
+"""
+
+import argparse
+import os
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+
+from ml_utils import evaluation_path, load_evaluation
+
+# Get the directory where this script is located
+script_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(script_dir, '..', 'models')
+docs_dir = os.path.join(script_dir, '..', 'docs')
+
+# kind -> (training run name, output figure)
+FIGURES = {
+    'penetasan': ('model_penetasan', 'evaluasi_model_penetasan.png'),
+    'panen': ('model_panen', 'evaluasi_model_panen.png'),
+    'improved': ('model_penetasan_improved', 'model_improvement_results.png')
+}
+
+
+def _sorted_importance(ev, top=None):
+    """Feature names/importances sorted descending"""
+    order = np.argsort(-ev['feature_importances'], kind='stable')[:top]
+    return ev['feature_names'][order], ev['feature_importances'][order]
+
+
+def plot_penetasan(ev):
+    """4-panel figure for model_penetasan.py"""
+    y_test, y_pred = ev['y_test'], ev['y_pred']
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+
+    # Confusion Matrix
+    sns.heatmap(ev['cm'], annot=True, fmt='d', cmap='Blues', ax=axes[0, 0])
+    axes[0, 0].set_title('Confusion Matrix', fontweight='bold', fontsize=14)
+    axes[0, 0].set_xlabel('Predicted')
+    axes[0, 0].set_ylabel('Actual')
+
+    # Feature Importance
+    names, importances = _sorted_importance(ev, top=15)
+    colors = plt.cm.viridis(np.linspace(0, 1, len(names)))
+    axes[0, 1].barh(names, importances, color=colors)
+    axes[0, 1].set_xlabel('Importance')
+    axes[0, 1].set_title('Top 15 Feature Importance', fontweight='bold', fontsize=14)
+    axes[0, 1].invert_yaxis()
+
+    # Prediction vs Actual
+    axes[1, 0].scatter(y_test, y_pred, alpha=0.6, s=100, edgecolors='black')
+    axes[1, 0].plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--', lw=3)
+    axes[1, 0].set_xlabel('Actual (hari)', fontsize=12)
+    axes[1, 0].set_ylabel('Predicted (hari)', fontsize=12)
+    axes[1, 0].set_title('Prediction vs Actual', fontweight='bold', fontsize=14)
+    axes[1, 0].grid(alpha=0.3)
+
+    # Error Distribution
+    errors = y_test - y_pred
+    axes[1, 1].hist(errors, bins=15, color='orange', alpha=0.7, edgecolor='black')
+    axes[1, 1].set_xlabel('Error (Actual - Predicted)')
+    axes[1, 1].set_ylabel('Frequency')
+    axes[1, 1].set_title('Error Distribution', fontweight='bold', fontsize=14)
+    axes[1, 1].axvline(x=0, color='red', linestyle='--', linewidth=2, label='Perfect Prediction')
+    axes[1, 1].legend()
+    axes[1, 1].grid(axis='y', alpha=0.3)
+
+    plt.tight_layout()
+    return fig
+
+
+def plot_panen(ev):
+    """9-panel figure for model_panen_maggot.py"""
+    y_test, y_pred_gb, y_pred_rf = ev['y_test'], ev['y_pred_gb'], ev['y_pred_rf']
+    model_name = str(ev['model_name'])
+
+    fig = plt.figure(figsize=(16, 10))
+    gs = fig.add_gridspec(3, 3, hspace=0.3, wspace=0.3)
+
+    # 1. Prediksi vs Aktual (Gradient Boosting)
+    ax1 = fig.add_subplot(gs[0, 0])
+    ax1.scatter(y_test, y_pred_gb, alpha=0.6, color='blue', label='Gradient Boosting')
+    ax1.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--', lw=2)
+    ax1.set_xlabel('Aktual (gram)')
+    ax1.set_ylabel('Prediksi (gram)')
+    ax1.set_title('Gradient Boosting: Prediksi vs Aktual')
+    ax1.legend()
+
+    # 2. Prediksi vs Aktual (Random Forest)
+    ax2 = fig.add_subplot(gs[0, 1])
+    ax2.scatter(y_test, y_pred_rf, alpha=0.6, color='orange', label='Random Forest')
+    ax2.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--', lw=2)
+    ax2.set_xlabel('Aktual (gram)')
+    ax2.set_ylabel('Prediksi (gram)')
+    ax2.set_title('Random Forest: Prediksi vs Aktual')
+    ax2.legend()
+
+    # 3. Feature Importance
+    ax3 = fig.add_subplot(gs[0, 2])
+    names, importances = _sorted_importance(ev)
+    ax3.barh(names, importances, color='steelblue')
+    ax3.set_xlabel('Importance')
+    ax3.set_title(f'Feature Importance ({model_name})')
+    ax3.invert_yaxis()
+
+    # 4. Distribusi Error (Gradient Boosting)
+    ax4 = fig.add_subplot(gs[1, 0])
+    errors_gb = y_test - y_pred_gb
+    ax4.hist(errors_gb, bins=20, color='blue', alpha=0.7, edgecolor='black')
+    ax4.set_xlabel('Error (Aktual - Prediksi)')
+    ax4.set_ylabel('Frequency')
+    ax4.set_title('Gradient Boosting: Distribusi Error')
+    ax4.axvline(x=0, color='red', linestyle='--', linewidth=2)
+
+    # 5. Distribusi Error (Random Forest)
+    ax5 = fig.add_subplot(gs[1, 1])
+    errors_rf = y_test - y_pred_rf
+    ax5.hist(errors_rf, bins=20, color='orange', alpha=0.7, edgecolor='black')
+    ax5.set_xlabel('Error (Aktual - Prediksi)')
+    ax5.set_ylabel('Frequency')
+    ax5.set_title('Random Forest: Distribusi Error')
+    ax5.axvline(x=0, color='red', linestyle='--', linewidth=2)
+
+    # 6. Perbandingan Metrik (MAE, RMSE, R², MAPE)
+    ax6 = fig.add_subplot(gs[1, 2])
+    metrics = ['MAE', 'RMSE', 'R²', 'MAPE']
+    scale = np.array([1, 1, 1000, 1])  # Scale R² untuk visualisasi
+    x = np.arange(len(metrics))
+    width = 0.35
+    ax6.bar(x - width/2, ev['metrics_gb'] * scale, width, label='Gradient Boosting', color='blue', alpha=0.7)
+    ax6.bar(x + width/2, ev['metrics_rf'] * scale, width, label='Random Forest', color='orange', alpha=0.7)
+    ax6.set_ylabel('Nilai')
+    ax6.set_title('Perbandingan Metrik Model')
+    ax6.set_xticks(x)
+    ax6.set_xticklabels(metrics)
+    ax6.legend()
+    ax6.grid(axis='y', alpha=0.3)
+
+    # 7. Korelasi Heatmap
+    ax7 = fig.add_subplot(gs[2, 0])
+    columns = list(ev['correlation_columns'])
+    sns.heatmap(ev['correlation'], annot=True, fmt='.3f', cmap='coolwarm', center=0,
+                square=True, ax=ax7, cbar_kws={"shrink": 0.8},
+                xticklabels=columns, yticklabels=columns)
+    ax7.set_title('Correlation Matrix')
+
+    # 8. Residual Plot
+    ax8 = fig.add_subplot(gs[2, 1])
+    residuals = y_test - ev['y_pred_final']
+    ax8.scatter(ev['y_pred_final'], residuals, alpha=0.6, color='green')
+    ax8.axhline(y=0, color='red', linestyle='--', linewidth=2)
+    ax8.set_xlabel('Prediksi (gram)')
+    ax8.set_ylabel('Residual (Aktual - Prediksi)')
+    ax8.set_title(f'{model_name}: Residual Plot')
+    ax8.grid(alpha=0.3)
+
+    # 9. Box Plot Error ('labels' was renamed to 'tick_labels' in matplotlib 3.9)
+    ax9 = fig.add_subplot(gs[2, 2])
+    box_labels = ['Gradient\nBoosting', 'Random\nForest']
+    try:
+        ax9.boxplot([errors_gb, errors_rf], tick_labels=box_labels)
+    except TypeError:
+        ax9.boxplot([errors_gb, errors_rf], labels=box_labels)
+    ax9.set_ylabel('Error (gram)')
+    ax9.set_title('Distribusi Error: Perbandingan Model')
+    ax9.axhline(y=0, color='red', linestyle='--', linewidth=1)
+    ax9.grid(axis='y', alpha=0.3)
+
+    return fig
+
+
+def plot_improved(ev):
+    """4-panel comparison figure for improve_model.py"""
+    model_names = list(ev['model_names'])
+    train_accs = ev['train_acc'] * 100
+    test_accs = ev['test_acc'] * 100
+
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+
+    # 1. Model Comparison
+    ax1 = axes[0, 0]
+    colors = ['green' if acc == test_accs.max() else 'steelblue' for acc in test_accs]
+    ax1.barh(model_names, test_accs, color=colors, alpha=0.8)
+    ax1.set_xlabel('Test Accuracy (%)')
+    ax1.set_title('Model Comparison', fontweight='bold', fontsize=12)
+    ax1.axvline(x=40, color='red', linestyle='--', label='Original (40%)')
+    ax1.legend()
+
+    # 2. Confusion Matrix
+    ax2 = axes[0, 1]
+    sns.heatmap(ev['cm'], annot=True, fmt='d', cmap='Blues', ax=ax2, cbar_kws={'label': 'Count'})
+    ax2.set_title('Confusion Matrix - Best Model', fontweight='bold', fontsize=12)
+    ax2.set_xlabel('Predicted')
+    ax2.set_ylabel('Actual')
+
+    # 3. Train vs Test Accuracy
+    ax3 = axes[1, 0]
+    x_pos = np.arange(len(model_names))
+    width = 0.35
+    ax3.bar(x_pos - width/2, train_accs, width, label='Train', alpha=0.8, color='lightblue')
+    ax3.bar(x_pos + width/2, test_accs, width, label='Test', alpha=0.8, color='orange')
+    ax3.set_xticks(x_pos)
+    ax3.set_xticklabels(model_names, rotation=45, ha='right')
+    ax3.set_ylabel('Accuracy (%)')
+    ax3.set_title('Train vs Test Accuracy', fontweight='bold', fontsize=12)
+    ax3.legend()
+    ax3.grid(axis='y', alpha=0.3)
+
+    # 4. Feature Importance (if available)
+    ax4 = axes[1, 1]
+    if 'feature_importances' in ev:
+        names, importances = _sorted_importance(ev, top=10)
+        colors_fi = plt.cm.viridis(np.linspace(0, 1, len(names)))
+        ax4.barh(names, importances, color=colors_fi)
+        ax4.set_xlabel('Importance')
+        ax4.set_title('Top 10 Feature Importance', fontweight='bold', fontsize=12)
+        ax4.invert_yaxis()
+    else:
+        ax4.text(0.5, 0.5, 'Feature importance\nnot available\nfor this model type',
+                 ha='center', va='center', fontsize=12, transform=ax4.transAxes)
+        ax4.set_title('Feature Importance', fontweight='bold', fontsize=12)
+
+    plt.tight_layout()
+    return fig
+
+
+PLOTTERS = {
+    'penetasan': plot_penetasan,
+    'panen': plot_panen,
+    'improved': plot_improved
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render evaluation figures from saved arrays")
+    parser.add_argument('kind', choices=list(FIGURES), help="Which training run to plot")
+    parser.add_argument('--eval', default=None, help="Evaluation .npz (default: ../models/<run>_eval.npz)")
+    parser.add_argument('--output', default=None, help="Output image (default: ../docs/<figure>.png)")
+    parser.add_argument('--dpi', type=int, default=300, help="Resolution (default: 300)")
+    args = parser.parse_args()
+
+    run_name, figure_name = FIGURES[args.kind]
+    eval_file = args.eval or evaluation_path(models_dir, run_name)
+    output = args.output or os.path.join(docs_dir, figure_name)
+
+    if not os.path.exists(eval_file):
+        print(f"❌ Evaluation data not found: {eval_file}")
+        print(f"   Run the training script for '{args.kind}' first")
+        raise SystemExit(1)
+
+    fig = PLOTTERS[args.kind](load_evaluation(eval_file))
+    fig.savefig(output, dpi=args.dpi, bbox_inches='tight')
+    plt.close(fig)
+    print(f"✓ Visualization saved: {os.path.basename(output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
-import joblib
 import numpy as np
 import pandas as pd
 from datetime import datetime
 import os
+from ml_utils import ModelRegistry
 
 def load_models():
     """Load semua model dan encoders yang diperlukan"""
@@ -11,17 +11,18 @@ def load_models():
         script_dir = os.path.dirname(os.path.abspath(__file__))
         models_dir = os.path.join(script_dir, '..', 'models')
         
+        registry = ModelRegistry(models_dir)
+        
         # Load model penetasan (dengan weather features)
-        model_penetasan = joblib.load(os.path.join(models_dir, 'model_penetasan_maggot.pkl'))
-        metadata = joblib.load(os.path.join(models_dir, 'model_penetasan_metadata.pkl'))
+        penetasan = registry.load('penetasan', 'production', artifacts=['model', 'metadata'])
         
         # Load model panen
-        model_panen = joblib.load(os.path.join(models_dir, 'model_panen_maggot.pkl'))
+        panen = registry.load('panen', 'production', artifacts=['model'])
         
         return {
-            'penetasan': model_penetasan,
-            'panen': model_panen,
-            'metadata': metadata
+            'penetasan': penetasan['model'],
+            'panen': panen['model'],
+            'metadata': penetasan['metadata']
         }
     except Exception as e:
         print(f"Error loading models: {e}")